@@ -1,9 +1,13 @@
+import argparse
+import signal
 import threading
+import time
 from pathlib import Path
 from queue import Queue
 import cv2
 import sys
 from pathlib import Path
+from typing import List
 
 # Add the src directory to the Python path
 src_path = Path(__file__).parent / 'src'
@@ -11,30 +15,165 @@ sys.path.append(str(src_path))
 
 from services.video_service import VideoService
 from services.recognition_service import RecognitionService
+from services.multi_stream_service import MultiStreamRecognitionService
+from services.batch_video_service import BatchVideoProcessor
+from services.ingestion_service import ProfileIngestionService
 from services.clustering_service import ClusteringService
 from services.watcher_service import ProfileWatcherService
 from utils.file_manager import FileManager
+from utils.encoding_store import EncodingStore
+from models.face_model import FaceDatabase
+from core.video import (
+    BaseFrameSource,
+    CameraFrameSource,
+    VideoFileFrameSource,
+    ImageFolderFrameSource,
+    JsonlResultSink
+)
 from config.general_config import (
     CAMERA_WIDTH,
     CAMERA_HEIGHT,
-    WINDOW_NAME
+    CAMERA_INDEX,
+    WINDOW_NAME,
+    PROFILE_DIR,
+    HEADLESS_OUTPUT_FILE,
+    BATCH_FRAME_STEP
 )
+from config.models_config import STREAM_WORKERS
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Real-time face recognition")
+    parser.add_argument('--camera', type=int, action='append', default=[],
+                        help=f"Camera index to capture from (default: {CAMERA_INDEX}); repeat for more streams")
+    parser.add_argument('--video', type=Path, action='append', default=[],
+                        help="Process every frame of a video file; repeat for more streams")
+    parser.add_argument('--images', type=Path, action='append', default=[],
+                        help="Process the images in a folder as frames; repeat for more streams")
+    parser.add_argument('--headless', action='store_true',
+                        help="Write results as JSON lines instead of opening a window")
+    parser.add_argument('--output', type=Path, default=HEADLESS_OUTPUT_FILE,
+                        help="Results file in headless mode (default: %(default)s)")
+    parser.add_argument('--workers', type=int, default=STREAM_WORKERS,
+                        help="Recognition worker processes shared by multiple streams (default: %(default)s)")
+    parser.add_argument('--batch', action='store_true',
+                        help="Process the --video files offline as fast as possible, frame by frame")
+    parser.add_argument('--frame-step', type=int, default=BATCH_FRAME_STEP,
+                        help="In batch mode, process every Nth frame (default: %(default)s)")
+    parser.add_argument('--no-resume', action='store_true',
+                        help="In batch mode, start over instead of resuming from a checkpoint")
+    args = parser.parse_args()
+    
+    if args.batch and (not args.video or args.camera or args.images):
+        parser.error("--batch needs one or more --video files and no other sources")
+    
+    if len(args.camera) + len(args.video) + len(args.images) > 1 and not args.headless:
+        parser.error("multiple streams can only be run with --headless")
+    return args
+
+def create_sources(args: argparse.Namespace) -> List[BaseFrameSource]:
+    sources: List[BaseFrameSource] = []
+    sources.extend(CameraFrameSource(index) for index in args.camera)
+    sources.extend(VideoFileFrameSource(path) for path in args.video)
+    sources.extend(ImageFolderFrameSource(path) for path in args.images)
+    return sources or [CameraFrameSource(CAMERA_INDEX)]
+
+def load_known_faces(face_database: FaceDatabase, max_workers: int):
+    """Fill the gallery from the profile images, encoding only what changed."""
+    ingestion_service = ProfileIngestionService(max_workers)
+    try:
+        encoding_store = EncodingStore()
+        encoding_store.refresh(
+            FileManager.get_image_files(Path(PROFILE_DIR)),
+            ingestion_service.encode_images
+        )
+        for name, encoding in encoding_store.get_all().items():
+            face_database.add_face(name, encoding)
+    finally:
+        ingestion_service.stop()
+
+def run_batch(args: argparse.Namespace):
+    """Process video files offline, one after another."""
+    stop_event = threading.Event()
+    face_database = FaceDatabase()
+    load_known_faces(face_database, args.workers)
+    print(f"Loaded {len(face_database)} known faces")
+    
+    processor = BatchVideoProcessor(face_database, max_workers=args.workers, frame_step=args.frame_step)
+    
+    def interrupt(signum, frame):
+        # The first Ctrl+C lets the processor checkpoint its finished frames; a second one aborts
+        if stop_event.is_set():
+            raise KeyboardInterrupt
+        stop_event.set()
+        
+    previous_handler = signal.signal(signal.SIGINT, interrupt)
+    try:
+        for video_path in args.video:
+            if stop_event.is_set():
+                break
+            output_path = args.output
+            if len(args.video) > 1:
+                output_path = args.output.with_name(f"{args.output.stem}_{video_path.stem}{args.output.suffix}")
+                
+            start_time = time.monotonic()
+            processed = processor.process(
+                video_path,
+                output_path,
+                resume=not args.no_resume,
+                stop_event=stop_event
+            )
+            elapsed = time.monotonic() - start_time
+            print(f"{video_path.name}: {processed} frames in {elapsed:.1f}s -> {output_path}")
+            
+    except KeyboardInterrupt:
+        stop_event.set()
+        
+    finally:
+        signal.signal(signal.SIGINT, previous_handler)
+        
+    if stop_event.is_set():
+        print("\nInterrupted; run again to resume from the last checkpoint")
 
 def main():
+    args = parse_args()
+    
+    if args.batch:
+        FileManager.ensure_directories()
+        run_batch(args)
+        return
+        
+
     # Initialize stop event for graceful shutdown
     stop_event = threading.Event()
+    video_services: List[VideoService] = []
     
     try:
         # Ensure required directories exist
         FileManager.ensure_directories()
         
         # Initialize services
-        video_service = VideoService(stop_event)
-        recognition_service = RecognitionService(
-            frame_buffer=video_service.frame_buffer,
-            overlay_buffer=video_service.overlay_buffer,
-            stop_event=stop_event
-        )
+        sources = create_sources(args)
+        sink = JsonlResultSink(args.output) if args.headless else None
+        
+        if len(sources) == 1:
+            video_services.append(VideoService(stop_event, source=sources[0], sink=sink))
+            recognition_service = RecognitionService(
+                frame_buffer=video_services[0].frame_buffer,
+                overlay_buffer=video_services[0].overlay_buffer,
+                stop_event=stop_event
+            )
+        else:
+            # Each stream ends on its own; one shared pool recognizes them all
+            recognition_service = MultiStreamRecognitionService(stop_event, max_workers=args.workers)
+            for source in sources:
+                video_service = VideoService(threading.Event(), source=source, sink=sink)
+                recognition_service.add_stream(
+                    source.name,
+                    video_service.frame_buffer,
+                    video_service.overlay_buffer
+                )
+                video_services.append(video_service)
+                
         clustering_service = ClusteringService(stop_event)
         watcher_service = ProfileWatcherService(
             stop_event=stop_event,
@@ -45,21 +184,37 @@ def main():
         # Start all services
         clustering_service.start()
         recognition_service.start()
+        
+        # Recognize from the last snapshot while it is checked against the profiles;
+        # loaded before watching so no profile change is synced ahead of it
+        known_faces = watcher_service.warm_start()
+        print(f"Loaded {known_faces} known faces from the gallery snapshot")
         watcher_service.start()
         
         # Start video processing
-        video_service.capture_thread.start()
-        video_service.display_thread.start()
-        
-        print(f"System initialized. Press 'q' to quit.")
+        for video_service in video_services:
+            video_service.start()
         
-        # Wait for quit signal
-        while not stop_event.is_set():
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
-            if cv2.getWindowProperty(WINDOW_NAME, cv2.WND_PROP_VISIBLE) < 1:
-                break
+        if args.headless:
+            print(f"System initialized. Writing results to {args.output}, press Ctrl+C to quit.")
+            
+            # Offline sources stop the pipeline themselves once drained
+            while not stop_event.wait(0.5):
+                if all(video_service.stop_event.is_set() for video_service in video_services):
+                    break
+        else:
+            print(f"System initialized. Press 'q' to quit.")
+            
+            # Wait for quit signal
+            while not stop_event.is_set():
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
+                if cv2.getWindowProperty(WINDOW_NAME, cv2.WND_PROP_VISIBLE) < 1:
+                    break
                 
+    except KeyboardInterrupt:
+        pass
+        
     except Exception as e:
         print(f"Error during execution: {e}")
         
@@ -69,7 +224,8 @@ def main():
         stop_event.set()
         
         # Stop all services
-        if 'video_service' in locals():
+        for video_service in video_services:
+            video_service.stop_event.set()
             video_service.stop()
         if 'recognition_service' in locals():
             recognition_service.stop()
@@ -78,7 +234,12 @@ def main():
         if 'watcher_service' in locals():
             watcher_service.stop()
             
-        cv2.destroyAllWindows()
+        # Streams share one sink, so it is closed only once every stream has stopped
+        if 'sink' in locals() and sink is not None:
+            sink.close()
+            
+        if not args.headless:
+            cv2.destroyAllWindows()
 
 if __name__ == "__main__":
     main()
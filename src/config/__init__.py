@@ -18,6 +18,15 @@ def validate_config():
     if FRAME_SCALE_FACTOR <= 0 or FRAME_SCALE_FACTOR > 1:
         raise ValueError("Frame scale factor must be between 0 and 1")
         
+    if not all(0 < scale <= 1 for scale, _, _ in DETECTION_LEVELS):
+        raise ValueError("Detection level scales must be between 0 and 1")
+        
+    if not 0 <= DETECTION_START_LEVEL < len(DETECTION_LEVELS):
+        raise ValueError("Detection start level must be one of the detection levels")
+        
+    if CACHE_EVICTION_POLICY not in ('lru', 'lfu'):
+        raise ValueError("Cache eviction policy must be 'lru' or 'lfu'")
+        
     if not all(ext.startswith('.') for ext in SUPPORTED_IMAGE_EXTENSIONS):
         raise ValueError("Image extensions must start with '.'")
 
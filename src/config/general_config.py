@@ -5,6 +5,10 @@ ROOT_DIR = Path(__file__).parent.parent.parent
 DATA_DIR = ROOT_DIR / "data"
 PROFILE_DIR = DATA_DIR / "profiles"
 CACHE_DIR = DATA_DIR / "cache"
+ANN_INDEX_FILE = CACHE_DIR / "ann_index.npz"
+ENCODING_STORE_FILE = CACHE_DIR / "encoding_store.p"
+GALLERY_SNAPSHOT_FILE = CACHE_DIR / "gallery_snapshot.json"  # Manifest; the encodings sit beside it as .npy
+LEGACY_ENCODE_FILE = CACHE_DIR / "EncodeFile.p"  # [encodings, names] from older versions
 
 # Video Configuration
 CAMERA_WIDTH = 640
@@ -14,11 +18,27 @@ CAMERA_INDEX = 0  # Default webcam
 
 # Buffer Configuration
 FRAME_BUFFER_SIZE = 2
+FRAME_RING_SLOTS = 4  # Frame slots shared by capture, display and recognition
 OVERLAY_BUFFER_SIZE = 1
+OVERLAY_MAX_AGE = 15  # Frames an overlay stays on screen without an update
+
+# Headless Configuration
+HEADLESS_OUTPUT_FILE = DATA_DIR / "results.jsonl"
+HEADLESS_DRAIN_TIMEOUT = 5.0  # Seconds to wait for the last results once a source ends
+
+# Batch Video Configuration
+BATCH_FRAME_STEP = 1  # Process every Nth frame of a video file
+BATCH_CHECKPOINT_INTERVAL = 500  # Frames written between checkpoints
+BATCH_QUEUE_DEPTH = 4  # Frames in flight per worker process
 
 # Display Configuration
 WINDOW_NAME = "Spot's Live Feed"
 DISPLAY_FPS = 30  # Target FPS for display
 
+# Cache Configuration
+CACHE_MEMORY_BUDGET = 256 * 1024 * 1024  # Bytes of cached values a CacheManager keeps in memory
+CACHE_EVICTION_POLICY = 'lru'  # or 'lfu' to keep the most used entries instead of the most recent
+CACHE_FLUSH_INTERVAL = 1.0  # Seconds between background writes of a write-behind CacheManager
+
 # File Processing
 SUPPORTED_IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.bmp')
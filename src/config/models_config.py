@@ -1,16 +1,77 @@
 # Recognition Model Configuration
 FACE_DETECTION_MODEL = 'hog'  # or 'cnn' for GPU systems
+FACE_DETECTION_UPSAMPLE = 1  # Times frames are upsampled to find smaller faces
 RECOGNITION_TOLERANCE = 0.6
 NUM_JITTERS = 1
 RECOGNITION_MODEL = 'small'  # or 'large' for more accuracy
+ENCODING_DIMENSION = 128  # Length of a face encoding vector
+GALLERY_INITIAL_CAPACITY = 1024  # Preallocated rows in the known-face gallery
+GALLERY_JOURNAL_SIZE = 100000  # Gallery changes remembered for incremental index updates
+DISTANCE_CHUNK_BYTES = 64 * 1024 * 1024  # Scratch memory cap per gallery chunk when matching
+FACE_CHIP_SIZE = 150  # Side of the aligned face chips the recognition network takes
+FACE_CHIP_PADDING = 0.25  # Margin around the face in an aligned chip
+FACE_CHIP_CACHE_SIZE = 256  # Aligned chips kept per encoder for re-encoding without detection
+DESCRIPTOR_BATCH_SIZE = 64  # Face chips encoded together in one network call
+DESCRIPTOR_BATCH_DELAY = 0.01  # Seconds a face chip may wait for its batch to fill
+
+# Approximate Nearest-Neighbour Index Configuration
+ANN_NLIST = None  # Coarse clusters in the IVF index (None picks about sqrt(N))
+ANN_NPROBE = 16  # Clusters searched per query; raise for recall, lower for speed
+ANN_MIN_TRAIN_SIZE = 1024  # Below this size the index is one exact list
+ANN_TRAIN_ITERATIONS = 10  # k-means iterations when training coarse centroids
+ANN_TRAIN_SAMPLE = 64  # Training points sampled per coarse cluster
+
+# Batch Detection Configuration
+CNN_BATCH_SIZE = 16  # Images per CNN detection batch
+CNN_BATCH_MAX_SIDE = 640  # Longer side images are shrunk to before batched CNN detection
+CNN_BATCH_SHAPE_STEP = 8  # Images are padded to multiples of this so similar sizes share a batch; larger steps shift CNN boxes
+CNN_UPSAMPLE = 1  # Times images are upsampled to find smaller faces
+HOG_PREPASS_MIN_SCORE = 1.0  # HOG score at which a single face is trusted without running CNN
+HOG_PREPASS_UPSAMPLE = 0  # Times images are upsampled for the HOG pre-pass; only clear faces need to be found
 
 # Real-time Processing Configuration
 FRAME_SCALE_FACTOR = 0.25  # Scale down frames for faster processing
 
+# Face Tracking Configuration
+DETECTION_INTERVAL = 5  # Run full detection every N processed frames
+TRACK_IOU_THRESHOLD = 0.3  # Minimum overlap to associate a detection with a track
+TRACK_MAX_MISSES = 2  # Detection passes a track may go unmatched before removal
+TRACK_REVERIFY_INTERVAL = 30  # Frames before a track's identity is re-encoded
+TRACK_MIN_FLOW_POINTS = 4  # Feature points needed to follow a face by optical flow
+
+# Adaptive Detection Configuration
+LATENCY_BUDGET = 0.1  # Target seconds from capture to result per frame
+LATENCY_SMOOTHING = 0.2  # Weight of the newest frame in the running latency average
+LATENCY_ADJUST_FRAMES = 15  # Frames measured before the detection settings change again
+LATENCY_HEADROOM = 0.5  # Share of the budget under which more thorough settings are tried
+DETECTION_LEVELS = [  # (scale, upsample, detection interval), cheapest first
+    (0.2, 0, 8),
+    (0.25, 0, 6),
+    (FRAME_SCALE_FACTOR, FACE_DETECTION_UPSAMPLE, DETECTION_INTERVAL),
+    (0.35, 1, 4),
+    (0.5, 1, 3)
+]
+DETECTION_START_LEVEL = 2  # Level used until latency has been measured
+
+# Motion Gating Configuration
+MOTION_FRAME_WIDTH = 80  # Width frames are shrunk to before comparing against the background
+MOTION_PIXEL_THRESHOLD = 25  # Gray level change that marks a pixel as changed
+MOTION_MIN_AREA = 0.002  # Fraction of the frame a change must cover to count as motion
+MOTION_LEARNING_RATE = 0.05  # How fast the background model absorbs changes
+MOTION_REGION_MARGIN = 0.5  # Margin added around a changed region, relative to its size
+MOTION_FULL_FRAME_RATIO = 0.5  # Changed share of the frame beyond which the whole frame is detected
+MOTION_IDLE_REFRESH = 150  # Idle frames after which the whole frame is detected anyway
+
+# Multi-stream Configuration
+STREAM_WORKERS = 4  # Recognition worker processes shared by all streams
+STREAM_POLL_INTERVAL = 0.005  # Seconds the scheduler waits for results before polling streams again
+
 # Clustering Configuration
 CLUSTERING_EPS = 0.5  # Maximum distance between samples
 CLUSTERING_MIN_SAMPLES = 2  # Minimum cluster size
 CLUSTERING_METRIC = 'euclidean'
+CLUSTERING_REFIT_INTERVAL = 600  # Seconds between background full re-fits, 0 to disable
+CLUSTERING_MATCH_TOLERANCE = 0.6  # Maximum distance to assign a face to a group
 
 # Image Processing Configuration
 TARGET_FACE_SIZE = (216, 216)  # Size for processed face images
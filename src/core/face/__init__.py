@@ -9,7 +9,8 @@ from .detectors import (
 from .encoders import (
     BaseFaceEncoder,
     RealtimeFaceEncoder,
-    ClusterFaceEncoder
+    ClusterFaceEncoder,
+    DescriptorBatch
 )
 
 # Import matchers
@@ -17,9 +18,22 @@ from .matchers import (
     BaseFaceMatcher,
     EuclideanFaceMatcher,
     CosineFaceMatcher,
+    IVFFaceMatcher,
     DEFAULT_MATCHER
 )
 
+# Import clusterers
+from .clusterers import (
+    BaseFaceClusterer,
+    IncrementalClusterer
+)
+
+# Import trackers
+from .trackers import (
+    BaseFaceTracker,
+    IoUFaceTracker
+)
+
 __all__ = [
     # Detectors
     'BaseFaceDetector',
@@ -30,10 +44,20 @@ __all__ = [
     'BaseFaceEncoder',
     'RealtimeFaceEncoder',
     'ClusterFaceEncoder',
+    'DescriptorBatch',
     
     # Matchers
     'BaseFaceMatcher',
     'EuclideanFaceMatcher',
     'CosineFaceMatcher',
-    'DEFAULT_MATCHER'
+    'IVFFaceMatcher',
+    'DEFAULT_MATCHER',
+    
+    # Clusterers
+    'BaseFaceClusterer',
+    'IncrementalClusterer',
+    
+    # Trackers
+    'BaseFaceTracker',
+    'IoUFaceTracker'
 ]
@@ -0,0 +1,9 @@
+from .base_clusterer import BaseFaceClusterer
+from .incremental_clusterer import IncrementalClusterer
+from .cluster_index import ClusterIndex
+
+__all__ = [
+    'BaseFaceClusterer',
+    'IncrementalClusterer',
+    'ClusterIndex'
+]
@@ -0,0 +1,48 @@
+from abc import ABC, abstractmethod
+import numpy as np
+from typing import Dict, List
+
+class BaseFaceClusterer(ABC):
+    """Abstract base class for face clustering engines."""
+    
+    @abstractmethod
+    def add(self, key: str, encoding: np.ndarray) -> None:
+        """
+        Add or replace a face encoding.
+        
+        Args:
+            key: Unique identifier of the face
+            encoding: Face encoding
+        """
+        pass
+        
+    @abstractmethod
+    def remove(self, key: str) -> None:
+        """
+        Remove a face encoding if present.
+        
+        Args:
+            key: Unique identifier of the face
+        """
+        pass
+        
+    @abstractmethod
+    def fit(self, keys: List[str], encodings: List[np.ndarray]) -> None:
+        """
+        Cluster a full set of encodings from scratch.
+        
+        Args:
+            keys: Unique identifier of each face
+            encodings: Face encodings in the same order
+        """
+        pass
+        
+    @abstractmethod
+    def groups(self) -> Dict[str, List[np.ndarray]]:
+        """
+        Get the current clusters.
+        
+        Returns:
+            Dictionary mapping group names to their encodings
+        """
+        pass
@@ -0,0 +1,75 @@
+import numpy as np
+from typing import Dict, List, Optional
+
+from core.face.matchers.distance import euclidean_top_k
+
+class ClusterIndex:
+    """
+    Read-only lookup structure over a set of face groups.
+    
+    All encodings are stacked into one matrix with a group label per row.
+    Each group also keeps its centroid and radius, so a query only scores
+    the rows of groups that could hold a point within the tolerance.
+    """
+    
+    def __init__(self, groups: Dict[str, List[np.ndarray]]):
+        self.group_names: List[str] = [name for name, encodings in groups.items() if len(encodings)]
+        sizes = np.array([len(groups[name]) for name in self.group_names], dtype=np.int64)
+        
+        if self.group_names:
+            self.matrix = np.concatenate(
+                [np.asarray(groups[name], dtype=np.float32).reshape(len(groups[name]), -1)
+                 for name in self.group_names]
+            )
+        else:
+            self.matrix = np.empty((0, 0), dtype=np.float32)
+        self.labels = np.repeat(np.arange(len(self.group_names)), sizes)
+        self.norms = np.linalg.norm(self.matrix, axis=1)
+        
+        # Rows are grouped by label, so per-group sums are runs of the matrix
+        self.centroids = np.empty((len(sizes), self.matrix.shape[1]), dtype=np.float64)
+        self.radii = np.empty(len(sizes), dtype=np.float64)
+        if len(sizes):
+            starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+            self.centroids = np.add.reduceat(self.matrix.astype(np.float64), starts, axis=0) / sizes[:, np.newaxis]
+            spread = np.linalg.norm(self.matrix - self.centroids[self.labels], axis=1)
+            self.radii = np.maximum.reduceat(spread, starts)
+            
+    def nearest_groups(self, encodings: np.ndarray, tolerance: float) -> List[Optional[str]]:
+        """
+        Find the group of the nearest encoding for each query.
+        
+        Args:
+            encodings: U x D array of face encodings
+            tolerance: Distance the nearest group member must be under
+            
+        Returns:
+            Group name per query, or None where no member is close enough
+        """
+        queries = np.atleast_2d(np.asarray(encodings, dtype=np.float32))
+        if not len(self.group_names) or not len(queries):
+            return [None] * len(queries)
+            
+        # A group can only hold a match if its ball comes within the tolerance.
+        # Centroid distances use float64 so the bound stays conservative.
+        queries64 = queries.astype(np.float64)
+        centroid_sq = (np.einsum('ij,ij->i', queries64, queries64)[:, np.newaxis]
+                       - 2 * (queries64 @ self.centroids.T)
+                       + np.einsum('ij,ij->i', self.centroids, self.centroids))
+        centroid_dist = np.sqrt(np.maximum(centroid_sq, 0))
+        candidates = (centroid_dist - self.radii[np.newaxis, :]) <= tolerance
+        rows = np.nonzero(candidates.any(axis=0)[self.labels])[0]
+        if not len(rows):
+            return [None] * len(queries)
+            
+        indices, distances = euclidean_top_k(queries, self.matrix[rows], self.norms[rows])
+        results = []
+        for index, distance in zip(indices[:, 0], distances[:, 0]):
+            if distance < tolerance:
+                results.append(self.group_names[self.labels[rows[index]]])
+            else:
+                results.append(None)
+        return results
+        
+    def __len__(self) -> int:
+        return len(self.matrix)
@@ -0,0 +1,335 @@
+import threading
+from collections import Counter
+import numpy as np
+from typing import Dict, List, Optional, Set, Tuple
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+from sklearn.cluster import DBSCAN
+from sklearn.neighbors import NearestNeighbors
+
+from .base_clusterer import BaseFaceClusterer
+from config.models_config import (
+    CLUSTERING_EPS,
+    CLUSTERING_MIN_SAMPLES,
+    ENCODING_DIMENSION,
+    GALLERY_INITIAL_CAPACITY
+)
+
+NOISE = -1
+
+class IncrementalClusterer(BaseFaceClusterer):
+    """
+    Online DBSCAN over Euclidean face encodings.
+    
+    Each point keeps a count of its eps-neighbours, so adding a face is a
+    single radius query: neighbours that become core points merge the
+    clusters they now bridge, and nearby noise becomes border points.
+    Removing a face only re-clusters the clusters it could have split.
+    Cluster ids are stable across changes so group names do not move.
+    """
+    
+    def __init__(self,
+                 eps: float = CLUSTERING_EPS,
+                 min_samples: int = CLUSTERING_MIN_SAMPLES,
+                 dimension: int = ENCODING_DIMENSION,
+                 initial_capacity: int = GALLERY_INITIAL_CAPACITY):
+        self.eps = eps
+        self.min_samples = min_samples
+        self.dimension = dimension
+        
+        capacity = max(1, initial_capacity)
+        self._matrix = np.empty((capacity, dimension), dtype=np.float32)
+        self._sq_norms = np.empty(capacity, dtype=np.float32)
+        self._counts = np.empty(capacity, dtype=np.int64)
+        self._labels = np.empty(capacity, dtype=np.int64)
+        self._keys: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._next_label = 0
+        self._version = 0
+        self._lock = threading.RLock()
+        
+    def add(self, key: str, encoding: np.ndarray) -> None:
+        with self._lock:
+            if key in self._index:
+                self.remove(key)
+                
+            vector = np.asarray(encoding, dtype=np.float32).reshape(self.dimension)
+            neighbours = self._neighbours(vector[np.newaxis])[0]
+            
+            row = len(self._keys)
+            if row == self._matrix.shape[0]:
+                self._grow()
+            self._matrix[row] = vector
+            self._sq_norms[row] = np.dot(vector, vector)
+            self._labels[row] = NOISE
+            self._counts[row] = len(neighbours) + 1
+            self._counts[neighbours] += 1
+            self._keys.append(key)
+            self._index[key] = row
+            
+            # Points that just reached min_samples, including possibly the new one
+            new_cores = neighbours[self._counts[neighbours] == self.min_samples]
+            if self._counts[row] >= self.min_samples:
+                new_cores = np.append(new_cores, row)
+                
+            for core in new_cores.tolist():
+                core_neighbours = neighbours if core == row else self._neighbours(self._matrix[core:core + 1])[0]
+                self._expand_core(core, core_neighbours)
+                
+            # A new border point joins any core it is close to
+            if self._counts[row] < self.min_samples:
+                self._labels[row] = self._core_label(neighbours)
+                
+            self._version += 1
+            
+    def remove(self, key: str) -> None:
+        with self._lock:
+            row = self._index.get(key)
+            if row is None:
+                return
+                
+            neighbours = self._neighbours(self._matrix[row:row + 1])[0]
+            neighbours = neighbours[neighbours != row]
+            self._counts[neighbours] -= 1
+            
+            # Only clusters that lost a core point can split or shed borders
+            affected: Set[int] = set()
+            if self._counts[row] >= self.min_samples:
+                affected.add(int(self._labels[row]))
+            lost_cores = neighbours[self._counts[neighbours] == self.min_samples - 1]
+            affected.update(self._labels[lost_cores].tolist())
+            affected.discard(NOISE)
+            
+            self._delete_row(row)
+            for label in affected:
+                self._split_cluster(label)
+                
+            self._version += 1
+            
+    def fit(self, keys: List[str], encodings: List[np.ndarray]) -> None:
+        vectors = np.asarray(encodings, dtype=np.float32).reshape(-1, self.dimension)
+        labels, counts = self._fit_labels(vectors)
+        with self._lock:
+            self._install(list(keys), vectors, labels, counts)
+            
+    def refit(self) -> bool:
+        """
+        Re-cluster everything from scratch without blocking other callers.
+        
+        The points are copied under the lock and clustered outside it. The
+        result is dropped if the contents changed in the meantime.
+        
+        Returns:
+            True if the refit was applied
+        """
+        with self._lock:
+            version = self._version
+            keys = list(self._keys)
+            vectors = self._matrix[:len(keys)].copy()
+            
+        labels, counts = self._fit_labels(vectors)
+        
+        with self._lock:
+            if self._version != version:
+                return False
+            self._install(keys, vectors, labels, counts)
+            return True
+            
+    def groups(self) -> Dict[str, List[np.ndarray]]:
+        with self._lock:
+            groups: Dict[str, List[np.ndarray]] = {}
+            for row, key in enumerate(self._keys):
+                label = int(self._labels[row])
+                group_name = f"Group_Single_{key}" if label == NOISE else f"Group_{label}"
+                groups.setdefault(group_name, []).append(self._matrix[row].astype(np.float64))
+            return groups
+            
+    def get_label(self, key: str) -> Optional[int]:
+        """Get the cluster id of a face, or NOISE if it is not in any cluster."""
+        with self._lock:
+            row = self._index.get(key)
+            return None if row is None else int(self._labels[row])
+            
+    def _expand_core(self, core: int, neighbours: np.ndarray) -> None:
+        """Merge every cluster a new core point touches and claim nearby noise."""
+        members = np.append(neighbours, core)
+        cores = members[self._counts[members] >= self.min_samples]
+        merging = np.unique(self._labels[cores])
+        merging = merging[merging != NOISE]
+        
+        # Border points belong to a core of their cluster, which is also a neighbour here
+        border_label = self._labels[core]
+        if border_label != NOISE and border_label not in merging:
+            merging = np.append(merging, border_label)
+            
+        if len(merging):
+            target = int(merging.min())
+            size = len(self._keys)
+            if len(merging) > 1:
+                relabel = np.isin(self._labels[:size], merging)
+                self._labels[:size][relabel] = target
+        else:
+            target = self._new_label()
+            
+        self._labels[core] = target
+        noise = members[self._labels[members] == NOISE]
+        self._labels[noise] = target
+        
+    def _split_cluster(self, label: int) -> None:
+        """Re-derive a cluster from its remaining core points after a removal."""
+        size = len(self._keys)
+        members = np.nonzero(self._labels[:size] == label)[0]
+        if not len(members):
+            return
+            
+        is_core = self._counts[members] >= self.min_samples
+        cores = members[is_core]
+        self._labels[members] = NOISE
+        
+        if len(cores):
+            # Connected components of the core points within eps of each other
+            vectors = self._matrix[cores]
+            sq = self._sq_norms[cores]
+            adjacency = (sq[:, np.newaxis] + sq[np.newaxis, :] - 2 * (vectors @ vectors.T)) <= self.eps ** 2
+            n_components, components = connected_components(csr_matrix(adjacency), directed=False)
+            
+            # The first component keeps the old id
+            component_labels = [label] + [self._new_label() for _ in range(n_components - 1)]
+            self._labels[cores] = np.asarray(component_labels)[components]
+            
+        # Former borders re-attach to any core still in reach, in any cluster
+        borders = members[~is_core]
+        if len(borders):
+            for border, neighbours in zip(borders.tolist(), self._neighbours(self._matrix[borders])):
+                self._labels[border] = self._core_label(neighbours)
+                
+    def _core_label(self, neighbours: np.ndarray) -> int:
+        """Label of the first core point among the neighbours, or NOISE."""
+        cores = neighbours[self._counts[neighbours] >= self.min_samples]
+        return int(self._labels[cores[0]]) if len(cores) else NOISE
+        
+    def _neighbours(self, queries: np.ndarray) -> List[np.ndarray]:
+        """Rows within eps of each query, using the GEMM distance identity."""
+        size = len(self._keys)
+        if size == 0:
+            return [np.empty(0, dtype=np.int64) for _ in range(len(queries))]
+            
+        sq = queries @ self._matrix[:size].T
+        sq *= -2
+        sq += np.einsum('ij,ij->i', queries, queries)[:, np.newaxis]
+        sq += self._sq_norms[:size]
+        return [np.nonzero(row <= self.eps ** 2)[0] for row in sq]
+        
+    def _fit_labels(self, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Run a full DBSCAN, also returning each point's neighbour count."""
+        if not len(vectors):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+            
+        # One radius graph serves both the counts and DBSCAN itself
+        graph = NearestNeighbors(radius=self.eps).fit(vectors).radius_neighbors_graph(mode='distance')
+        counts = graph.getnnz(axis=1).astype(np.int64) + 1
+        labels = DBSCAN(
+            eps=self.eps,
+            min_samples=self.min_samples,
+            metric='precomputed'
+        ).fit(graph).labels_
+        return labels.astype(np.int64), counts
+        
+    def _install(self,
+                 keys: List[str],
+                 vectors: np.ndarray,
+                 labels: np.ndarray,
+                 counts: np.ndarray) -> None:
+        """Replace the contents, keeping old cluster ids where clusters overlap."""
+        previous = {key: int(self._labels[row]) for key, row in self._index.items()}
+        
+        mapping: Dict[int, int] = {}
+        taken: Set[int] = set()
+        for label in np.unique(labels[labels != NOISE]).tolist():
+            votes = Counter(
+                previous.get(keys[row], NOISE) for row in np.nonzero(labels == label)[0].tolist()
+            )
+            votes.pop(NOISE, None)
+            for old_label, _ in votes.most_common():
+                if old_label not in taken:
+                    mapping[label] = old_label
+                    taken.add(old_label)
+                    break
+                    
+        self._next_label = max([self._next_label] + [label + 1 for label in taken])
+        for label in np.unique(labels[labels != NOISE]).tolist():
+            if label not in mapping:
+                mapping[label] = self._new_label()
+                
+        capacity = max(self._matrix.shape[0], len(keys))
+        self._matrix = np.empty((capacity, self.dimension), dtype=np.float32)
+        self._sq_norms = np.empty(capacity, dtype=np.float32)
+        self._counts = np.empty(capacity, dtype=np.int64)
+        self._labels = np.empty(capacity, dtype=np.int64)
+        
+        size = len(keys)
+        self._matrix[:size] = vectors
+        self._sq_norms[:size] = np.einsum('ij,ij->i', vectors, vectors)
+        self._counts[:size] = counts
+        self._labels[:size] = [mapping.get(int(label), NOISE) for label in labels]
+        self._keys = keys
+        self._index = {key: row for row, key in enumerate(keys)}
+        self._version += 1
+        
+    def _delete_row(self, row: int) -> None:
+        """Remove a row by moving the last one into it."""
+        last = len(self._keys) - 1
+        key = self._keys[row]
+        if row != last:
+            moved = self._keys[last]
+            self._matrix[row] = self._matrix[last]
+            self._sq_norms[row] = self._sq_norms[last]
+            self._counts[row] = self._counts[last]
+            self._labels[row] = self._labels[last]
+            self._keys[row] = moved
+            self._index[moved] = row
+        self._keys.pop()
+        del self._index[key]
+        
+    def _new_label(self) -> int:
+        label = self._next_label
+        self._next_label += 1
+        return label
+        
+    def _grow(self) -> None:
+        """Double the storage capacity."""
+        size = len(self._keys)
+        capacity = self._matrix.shape[0] * 2
+        for attr in ('_matrix', '_sq_norms', '_counts', '_labels'):
+            old = getattr(self, attr)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:size] = old[:size]
+            setattr(self, attr, new)
+            
+    @property
+    def lock(self) -> threading.RLock:
+        return self._lock
+        
+    @property
+    def version(self) -> int:
+        return self._version
+        
+    @property
+    def matrix(self) -> np.ndarray:
+        """Encodings of every clustered face, one per row."""
+        return self._matrix[:len(self._keys)]
+        
+    @property
+    def labels(self) -> np.ndarray:
+        """Cluster id per row of the matrix, NOISE for unclustered faces."""
+        return self._labels[:len(self._keys)]
+        
+    @property
+    def keys(self) -> List[str]:
+        return self._keys
+        
+    def __len__(self) -> int:
+        return len(self._keys)
+        
+    def __contains__(self, key: str) -> bool:
+        return key in self._index
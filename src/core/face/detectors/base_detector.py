@@ -1,8 +1,12 @@
 from abc import ABC, abstractmethod
+import dlib
+import face_recognition.api as face_api
 import numpy as np
 from typing import List, Tuple, Optional
 
 from models.face_model import FaceLocation
+from utils.frame_context import as_frame_context
+from config.models_config import FACE_CHIP_SIZE, FACE_CHIP_PADDING
 
 class BaseFaceDetector(ABC):
     """Abstract base class for face detectors."""
@@ -13,7 +17,7 @@ class BaseFaceDetector(ABC):
         Detect faces in the given image.
         
         Args:
-            image: numpy array of image data (BGR format)
+            image: numpy array of image data (BGR format), or its FrameContext
             
         Returns:
             List of FaceLocation objects
@@ -26,7 +30,7 @@ class BaseFaceDetector(ABC):
         Get face encodings from the image.
         
         Args:
-            image: numpy array of image data (BGR format)
+            image: numpy array of image data (BGR format), or its FrameContext
             locations: Optional list of face locations to encode
             
         Returns:
@@ -39,11 +43,13 @@ class BaseFaceDetector(ABC):
         Detect faces and get their encodings in one pass.
         
         Args:
-            image: numpy array of image data (BGR format)
+            image: numpy array of image data (BGR format), or its FrameContext
             
         Returns:
             Tuple of (face locations, face encodings)
         """
+        # Both steps share one colour conversion
+        image = as_frame_context(image)
         locations = self.detect(image)
         encodings = self.get_encodings(image, locations)
         return locations, encodings
@@ -75,3 +81,82 @@ class BaseFaceDetector(ABC):
             Array of distances for each face
         """
         pass
+    
+    def detect_regions(self,
+                       image: np.ndarray,
+                       regions: Optional[List[FaceLocation]] = None) -> List[FaceLocation]:
+        """
+        Detect faces only inside the given regions of an image.
+        
+        Args:
+            image: numpy array of image data (BGR format), or its FrameContext
+            regions: Non-overlapping regions to search, None for the whole image
+            
+        Returns:
+            List of FaceLocation objects in image coordinates
+        """
+        if regions is None:
+            return self.detect(image)
+            
+        context = as_frame_context(image)
+        locations = []
+        for region in regions:
+            crop = context.crop(region.top, region.right, region.bottom, region.left)
+            if crop.image.size == 0:
+                continue
+            for location in self.detect(crop):
+                locations.append(FaceLocation(
+                    top=location.top + region.top,
+                    right=location.right + region.left,
+                    bottom=location.bottom + region.top,
+                    left=location.left + region.left
+                ))
+        return locations
+        
+    def get_face_chips(self, image: np.ndarray, locations: List[FaceLocation]) -> List[np.ndarray]:
+        """
+        Align and crop faces the way the recognition network expects them.
+        Subclasses provide model_type to pick the landmark model.
+        
+        Args:
+            image: numpy array of image data (BGR format), or its FrameContext
+            locations: Face locations to crop
+            
+        Returns:
+            One aligned RGB face chip per location
+        """
+        if not locations:
+            return []
+            
+        rgb_image = as_frame_context(image).rgb
+        predictor = (face_api.pose_predictor_68_point if self.model_type == 'large'
+                     else face_api.pose_predictor_5_point)
+        
+        shapes = dlib.full_object_detections()
+        for location in locations:
+            shapes.append(predictor(
+                rgb_image,
+                dlib.rectangle(location.left, location.top, location.right, location.bottom)
+            ))
+        return list(dlib.get_face_chips(rgb_image, shapes, size=FACE_CHIP_SIZE, padding=FACE_CHIP_PADDING))
+        
+    def encode_face_chips(self, chips: List[np.ndarray], num_jitters: Optional[int] = None) -> List[np.ndarray]:
+        """
+        Compute descriptors for aligned face chips, from any number of
+        images, in one call to the recognition network. Subclasses provide
+        num_jitters.
+        
+        Args:
+            chips: Face chips from get_face_chips()
+            num_jitters: Override of the detector's jitter count
+            
+        Returns:
+            One face encoding per chip
+        """
+        if not chips:
+            return []
+        descriptors = face_api.face_encoder.compute_face_descriptor(
+            chips,
+            self.num_jitters if num_jitters is None else num_jitters
+        )
+        return [np.array(descriptor) for descriptor in descriptors]
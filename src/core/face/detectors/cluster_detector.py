@@ -1,13 +1,22 @@
 import face_recognition
+import face_recognition.api as face_api
 import numpy as np
-from typing import List, Optional
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
 import cv2
 
 from .base_detector import BaseFaceDetector
 from models.face_model import FaceLocation
+from utils.frame_context import as_frame_context
 from config.models_config import (
     RECOGNITION_MODEL,
-    NUM_JITTERS
+    NUM_JITTERS,
+    CNN_BATCH_SIZE,
+    CNN_BATCH_MAX_SIDE,
+    CNN_BATCH_SHAPE_STEP,
+    CNN_UPSAMPLE,
+    HOG_PREPASS_MIN_SCORE,
+    HOG_PREPASS_UPSAMPLE
 )
 
 class ClusterFaceDetector(BaseFaceDetector):
@@ -31,23 +40,100 @@ class ClusterFaceDetector(BaseFaceDetector):
         """
         Detect faces using CNN detector for higher accuracy.
         """
-        # Convert BGR to RGB
-        rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        # Convert BGR to RGB, once per frame
+        rgb_image = as_frame_context(image).rgb
         
         # Use CNN model for more accurate detection
         face_locations = face_recognition.face_locations(
             rgb_image,
+            number_of_times_to_upsample=CNN_UPSAMPLE,
             model="cnn"  # Always use CNN for clustering
         )
         
         return [FaceLocation.from_tuple(loc) for loc in face_locations]
     
+    def batch_detect(self,
+                     images: List[np.ndarray],
+                     hog_prepass: bool = True) -> List[List[FaceLocation]]:
+        """
+        Detect faces in many images, running the CNN on batches of images.
+        
+        Images are shrunk to at most CNN_BATCH_MAX_SIDE and padded to a
+        shared shape. A quick HOG pass runs on that image first; an image
+        where HOG finds exactly one face scoring at least HOG_PREPASS_MIN_SCORE
+        keeps that face and skips the CNN. The other images are grouped by
+        shape and detected in batches of CNN_BATCH_SIZE.
+        
+        Args:
+            images: numpy arrays of image data (BGR format), or their FrameContexts
+            hog_prepass: Trust clear HOG detections instead of running the CNN
+        
+        Returns:
+            Face locations per image, in the coordinates of that image
+        """
+        results: List[Optional[List[FaceLocation]]] = [None] * len(images)
+        groups: Dict[Tuple[int, int], List[Tuple[int, np.ndarray, float]]] = defaultdict(list)
+        
+        for i, image in enumerate(images):
+            padded, scale = self._prepare_batch_image(as_frame_context(image).rgb)
+            
+            if hog_prepass:
+                rects, scores, _ = face_api.face_detector.run(padded, HOG_PREPASS_UPSAMPLE, 0)
+                if len(rects) == 1 and scores[0] >= HOG_PREPASS_MIN_SCORE:
+                    rect = rects[0]
+                    results[i] = [self._to_location((rect.top(), rect.right(), rect.bottom(), rect.left()),
+                                                    scale, image.shape)]
+                    continue
+            
+            groups[padded.shape[:2]].append((i, padded, scale))
+        
+        for members in groups.values():
+            for start in range(0, len(members), CNN_BATCH_SIZE):
+                chunk = members[start:start + CNN_BATCH_SIZE]
+                detections = face_recognition.batch_face_locations(
+                    [padded for _, padded, _ in chunk],
+                    number_of_times_to_upsample=CNN_UPSAMPLE,
+                    batch_size=len(chunk)
+                )
+                for (i, _, scale), locations in zip(chunk, detections):
+                    results[i] = [self._to_location(loc, scale, images[i].shape) for loc in locations]
+        
+        return results
+    
+    @staticmethod
+    def _prepare_batch_image(rgb_image: np.ndarray) -> Tuple[np.ndarray, float]:
+        """Shrink an image to the batch size limit and pad it to the shape grid."""
+        height, width = rgb_image.shape[:2]
+        scale = min(1.0, CNN_BATCH_MAX_SIDE / max(height, width))
+        if scale < 1.0:
+            rgb_image = cv2.resize(rgb_image, (max(1, round(width * scale)), max(1, round(height * scale))),
+                                   interpolation=cv2.INTER_AREA)
+            height, width = rgb_image.shape[:2]
+        
+        step = CNN_BATCH_SHAPE_STEP
+        padded_height, padded_width = -(-height // step) * step, -(-width // step) * step
+        padded = cv2.copyMakeBorder(rgb_image, 0, padded_height - height, 0, padded_width - width,
+                                    cv2.BORDER_CONSTANT, value=0)
+        return padded, scale
+    
+    @staticmethod
+    def _to_location(location: Tuple[int, int, int, int], scale: float, shape: Tuple[int, ...]) -> FaceLocation:
+        """Map a (top, right, bottom, left) box from a resized image back into the original, clipped to it."""
+        height, width = shape[:2]
+        top, right, bottom, left = (int(round(v / scale)) for v in location)
+        return FaceLocation(
+            top=max(top, 0),
+            right=min(right, width),
+            bottom=min(bottom, height),
+            left=max(left, 0)
+        )
+    
     def get_encodings(self, image: np.ndarray, locations: Optional[List[FaceLocation]] = None) -> List[np.ndarray]:
         """
         Get high-accuracy face encodings for clustering.
         """
-        # Convert BGR to RGB
-        rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        # Convert BGR to RGB, once per frame
+        rgb_image = as_frame_context(image).rgb
         
         # Convert locations to tuples if provided
         face_locations = None
@@ -83,12 +169,12 @@ class ClusterFaceDetector(BaseFaceDetector):
     def batch_encode(self, images: List[np.ndarray]) -> List[np.ndarray]:
         """
         Batch encode multiple images for efficient clustering.
+        The aligned faces of all images go through the network in one call.
         """
-        encodings = []
-        for image in images:
-            locs = self.detect(image)
+        # Detection and alignment share each image's colour conversion
+        images = [as_frame_context(image) for image in images]
+        chips = []
+        for image, locs in zip(images, self.batch_detect(images)):
             if locs:
-                encs = self.get_encodings(image, [locs[0]])  # Take first face only
-                if encs:
-                    encodings.append(encs[0])
-        return encodings
+                chips.extend(self.get_face_chips(image, [locs[0]]))  # Take first face only
+        return self.encode_face_chips(chips)
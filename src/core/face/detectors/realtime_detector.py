@@ -1,12 +1,13 @@
 import face_recognition
 import numpy as np
 from typing import List, Optional
-import cv2
 
 from .base_detector import BaseFaceDetector
 from models.face_model import FaceLocation
+from utils.frame_context import as_frame_context
 from config.models_config import (
     FACE_DETECTION_MODEL,
+    FACE_DETECTION_UPSAMPLE,
     RECOGNITION_TOLERANCE,
     NUM_JITTERS,
     RECOGNITION_MODEL
@@ -18,7 +19,8 @@ class RealtimeFaceDetector(BaseFaceDetector):
     def __init__(self, 
                 model: str = FACE_DETECTION_MODEL,
                 num_jitters: int = NUM_JITTERS,
-                model_type: str = RECOGNITION_MODEL):
+                model_type: str = RECOGNITION_MODEL,
+                upsample: int = FACE_DETECTION_UPSAMPLE):
         """
         Initialize the realtime face detector.
         
@@ -26,8 +28,10 @@ class RealtimeFaceDetector(BaseFaceDetector):
             model: Face detection model ('hog' or 'cnn')
             num_jitters: Number of times to sample face during encoding
             model_type: Face recognition model type ('small' or 'large')
+            upsample: Times frames are upsampled to find smaller faces
         """
         self.model = model
+        self.upsample = upsample
         self.num_jitters = num_jitters
         self.model_type = model_type
         self.tolerance = RECOGNITION_TOLERANCE
@@ -36,12 +40,13 @@ class RealtimeFaceDetector(BaseFaceDetector):
         """
         Detect faces in the image using HOG-based detector for speed.
         """
-        # Convert BGR to RGB
-        rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        # Convert BGR to RGB, once per frame
+        rgb_image = as_frame_context(image).rgb
         
         # Get face locations
         face_locations = face_recognition.face_locations(
             rgb_image,
+            number_of_times_to_upsample=self.upsample,
             model=self.model
         )
         
@@ -52,8 +57,8 @@ class RealtimeFaceDetector(BaseFaceDetector):
         """
         Get face encodings optimized for real-time processing.
         """
-        # Convert BGR to RGB
-        rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        # Convert BGR to RGB, once per frame
+        rgb_image = as_frame_context(image).rgb
         
         # Convert locations to tuples if provided
         face_locations = None
@@ -1,9 +1,11 @@
 from .base_encoder import BaseFaceEncoder
 from .realtime_encoder import RealtimeFaceEncoder
 from .cluster_encoder import ClusterFaceEncoder
+from .descriptor_batch import DescriptorBatch
 
 __all__ = [
     'BaseFaceEncoder',
     'RealtimeFaceEncoder',
-    'ClusterFaceEncoder'
+    'ClusterFaceEncoder',
+    'DescriptorBatch'
 ]
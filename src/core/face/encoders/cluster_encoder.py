@@ -1,72 +1,92 @@
 import cv2
 import numpy as np
-from typing import List, Optional, Tuple
+from collections import OrderedDict
+from typing import Hashable, List, Optional, Tuple
 from pathlib import Path
 import concurrent.futures
+import multiprocessing
 from tqdm import tqdm
 
 from .base_encoder import BaseFaceEncoder
 from models.face_model import FaceEncoding, FaceLocation
 from ..detectors.cluster_detector import ClusterFaceDetector
-from config.models_config import MAX_CONCURRENT_PROCESSES
-from utils.image_processor import smart_crop_and_resize
+from config.models_config import MAX_CONCURRENT_PROCESSES, FACE_CHIP_CACHE_SIZE
+from utils.frame_context import FrameContext, as_frame_context
 
 class ClusterFaceEncoder(BaseFaceEncoder):
-    """Face encoder optimized for clustering operations."""
+    """
+    Face encoder optimized for clustering operations.
     
-    def __init__(self, detector: Optional[ClusterFaceDetector] = None):
+    Faces are aligned into chips at their known locations and the chips go
+    straight to the recognition network, so CNN detection runs at most once
+    per image. Recent chips are cached, so an image can be encoded again,
+    e.g. with more jitters, without loading or detecting it again.
+    """
+    
+    def __init__(self,
+                 detector: Optional[ClusterFaceDetector] = None,
+                 chip_cache_size: int = FACE_CHIP_CACHE_SIZE):
         super().__init__(detector or ClusterFaceDetector())
-        
+        self.chip_cache_size = chip_cache_size
+        self._chip_cache: 'OrderedDict[Hashable, np.ndarray]' = OrderedDict()
+    
+    def __getstate__(self):
+        # Worker processes get their own cache rather than a pickled copy
+        state = self.__dict__.copy()
+        state['_chip_cache'] = OrderedDict()
+        return state
+    
     def encode_face(self,
                    image: np.ndarray,
-                   face_location: Optional[FaceLocation] = None) -> Optional[np.ndarray]:
+                   face_location: Optional[FaceLocation] = None,
+                   num_jitters: Optional[int] = None) -> Optional[np.ndarray]:
         """Encode a single face with high accuracy for clustering."""
-        # Get face location if not provided
-        if not face_location:
-            locations = self.detector.detect(image)
-            if not locations:
-                return None
-            face_location = locations[0]
-        
-        # Crop and standardize face region
-        top, right, bottom, left = face_location.to_tuple()
-        face_image = image[top:bottom, left:right]
-        face_image = smart_crop_and_resize(face_image)
-        
-        # Get encoding with high accuracy settings
-        encodings = self.detector.get_encodings(face_image)
-        return encodings[0] if encodings else None
+        chip = self.get_face_chip(image, face_location)
+        if chip is None:
+            return None
+        return self.detector.encode_face_chips([chip], num_jitters)[0]
     
     def encode_faces(self,
                     image: np.ndarray,
-                    face_locations: Optional[List[FaceLocation]] = None) -> List[np.ndarray]:
+                    face_locations: Optional[List[FaceLocation]] = None,
+                    num_jitters: Optional[int] = None) -> List[np.ndarray]:
         """Encode all faces with high accuracy for clustering."""
+        image = as_frame_context(image)
+        
         # Get face locations if not provided
         if not face_locations:
             face_locations = self.detector.detect(image)
         
-        encodings = []
-        for location in face_locations:
-            encoding = self.encode_face(image, location)
-            if encoding is not None:
-                encodings.append(encoding)
+        chips = self.detector.get_face_chips(image, face_locations)
+        return self.detector.encode_face_chips(chips, num_jitters)
+    
+    def get_face_chip(self,
+                      image: np.ndarray,
+                      face_location: Optional[FaceLocation] = None) -> Optional[np.ndarray]:
+        """Align the given face, or the first detected one, into a face chip."""
+        image = as_frame_context(image)
         
-        return encodings
+        # Get face location if not provided
+        if not face_location:
+            locations = self.detector.detect(image)
+            if not locations:
+                return None
+            face_location = locations[0]
+        
+        return self.detector.get_face_chips(image, [face_location])[0]
     
     def encode_image_file(self,
                          image_path: Path,
-                         face_location: Optional[FaceLocation] = None) -> Optional[FaceEncoding]:
+                         face_location: Optional[FaceLocation] = None,
+                         num_jitters: Optional[int] = None) -> Optional[FaceEncoding]:
         """Encode face from image file with high accuracy."""
         try:
-            # Load image
-            image = cv2.imread(str(image_path))
-            if image is None:
+            chip = self._load_chip(image_path, face_location)
+            if chip is None:
                 return None
             
             # Get encoding
-            encoding = self.encode_face(image, face_location)
-            if encoding is None:
-                return None
+            encoding = self.detector.encode_face_chips([chip], num_jitters)[0]
             
             return FaceEncoding(
                 encoding=encoding,
@@ -75,14 +95,98 @@ class ClusterFaceEncoder(BaseFaceEncoder):
         except Exception:
             return None
     
+    def _load_chip(self,
+                   image_path: Path,
+                   face_location: Optional[FaceLocation] = None) -> Optional[np.ndarray]:
+        """Get the face chip of a file from the cache, or load and align it."""
+        key = self._chip_key(image_path, face_location)
+        chip = self._cached_chip(key)
+        if chip is not None:
+            return chip
+        
+        # Load image
+        image = cv2.imread(str(image_path))
+        if image is None:
+            return None
+        
+        chip = self.get_face_chip(image, face_location)
+        if chip is not None:
+            self._cache_chip(key, chip)
+        return chip
+    
+    @staticmethod
+    def _chip_key(image_path: Path, face_location: Optional[FaceLocation]) -> Hashable:
+        """Identify a face in a file; a changed file gets a new key."""
+        stat = Path(image_path).stat()
+        location = face_location.to_tuple() if face_location else None
+        return str(image_path), stat.st_size, stat.st_mtime_ns, location
+    
+    def _cached_chip(self, key: Hashable) -> Optional[np.ndarray]:
+        chip = self._chip_cache.get(key)
+        if chip is not None:
+            self._chip_cache.move_to_end(key)
+        return chip
+    
+    def _cache_chip(self, key: Hashable, chip: np.ndarray):
+        if self.chip_cache_size <= 0:
+            return
+        self._chip_cache[key] = chip
+        self._chip_cache.move_to_end(key)
+        while len(self._chip_cache) > self.chip_cache_size:
+            self._chip_cache.popitem(last=False)
+    
+    def clear_chip_cache(self):
+        """Forget all cached face chips."""
+        self._chip_cache.clear()
+    
     def _process_batch(self,
                       batch_paths: List[Path]) -> List[Tuple[Path, Optional[FaceEncoding]]]:
         """Process a batch of images for parallel encoding."""
-        results = []
+        chips = {}
+        to_detect = []
         for path in batch_paths:
-            encoding = self.encode_image_file(path)
-            results.append((path, encoding))
-        return results
+            try:
+                key = self._chip_key(path, None)
+                chip = self._cached_chip(key)
+                if chip is not None:
+                    chips[path] = chip
+                    continue
+                image = cv2.imread(str(path))
+            except Exception:
+                continue
+            if image is not None:
+                to_detect.append((path, key, FrameContext(image)))
+        
+        # Detect faces in all uncached images together; if the batch fails,
+        # detect one image at a time so only the failing files are skipped
+        images = [image for _, _, image in to_detect]
+        try:
+            locations = self.detector.batch_detect(images)
+        except Exception:
+            locations = [self._detect_single(image) for image in images]
+        
+        for (path, key, image), locs in zip(to_detect, locations):
+            if not locs:
+                continue
+            try:
+                chips[path] = self.detector.get_face_chips(image, [locs[0]])[0]
+            except Exception:
+                continue
+            self._cache_chip(key, chips[path])
+        
+        # One network call for every face in the batch
+        encodings = dict(zip(chips, self.detector.encode_face_chips(list(chips.values()))))
+        return [
+            (path, FaceEncoding(encoding=encodings[path], name=path.stem) if path in encodings else None)
+            for path in batch_paths
+        ]
+    
+    def _detect_single(self, image: FrameContext) -> List[FaceLocation]:
+        """Detect faces in one image, giving no faces if detection fails."""
+        try:
+            return self.detector.batch_detect([image])[0]
+        except Exception:
+            return []
     
     def batch_encode_files(self,
                           image_paths: List[Path],
@@ -94,8 +198,11 @@ class ClusterFaceEncoder(BaseFaceEncoder):
         batches = [image_paths[i:i + batch_size] 
                   for i in range(0, len(image_paths), batch_size)]
         
-        # Process batches in parallel
-        with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_CONCURRENT_PROCESSES) as executor:
+        # Process batches in parallel processes; each worker loads the models once
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=MAX_CONCURRENT_PROCESSES,
+            mp_context=multiprocessing.get_context('spawn')
+        ) as executor:
             futures = [executor.submit(self._process_batch, batch) 
                       for batch in batches]
             
@@ -0,0 +1,69 @@
+import time
+import numpy as np
+from typing import Any, List, Optional, Tuple
+
+from config.models_config import DESCRIPTOR_BATCH_SIZE, DESCRIPTOR_BATCH_DELAY
+
+class DescriptorBatch:
+    """
+    Collects aligned face chips from many frames, streams or files so they
+    can be encoded in one network call.
+    
+    Each request is tagged with an owner. The batch is due once it holds
+    max_faces chips or its oldest request has waited max_delay seconds.
+    The caller then encodes take()'s chips in one call and routes the
+    results back with split().
+    """
+    
+    def __init__(self,
+                 max_faces: int = DESCRIPTOR_BATCH_SIZE,
+                 max_delay: float = DESCRIPTOR_BATCH_DELAY):
+        self.max_faces = max_faces
+        self.max_delay = max_delay
+        self._owners: List[Tuple[Any, int]] = []
+        self._chips: List[np.ndarray] = []
+        self._oldest: Optional[float] = None
+        
+    def add(self, owner: Any, chips: List[np.ndarray]) -> None:
+        """Queue the face chips of one request."""
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+        self._owners.append((owner, len(chips)))
+        self._chips.extend(chips)
+        
+    def due(self) -> bool:
+        """Check whether the batch is full or has waited long enough."""
+        if not self._owners:
+            return False
+        return len(self._chips) >= self.max_faces or self.time_left() <= 0
+        
+    def time_left(self) -> Optional[float]:
+        """Seconds until the batch is due by its deadline, None when empty."""
+        if self._oldest is None:
+            return None
+        return self.max_delay - (time.monotonic() - self._oldest)
+        
+    def take(self) -> Tuple[List[Tuple[Any, int]], List[np.ndarray]]:
+        """
+        Empty the batch.
+        
+        Returns:
+            Tuple of ((owner, chip count) per request, all chips in order)
+        """
+        owners, chips = self._owners, self._chips
+        self._owners, self._chips, self._oldest = [], [], None
+        return owners, chips
+        
+    @staticmethod
+    def split(owners: List[Tuple[Any, int]],
+              encodings: List[np.ndarray]) -> List[Tuple[Any, List[np.ndarray]]]:
+        """Hand each request the encodings of its own chips."""
+        results = []
+        start = 0
+        for owner, count in owners:
+            results.append((owner, encodings[start:start + count]))
+            start += count
+        return results
+        
+    def __len__(self) -> int:
+        return len(self._chips)
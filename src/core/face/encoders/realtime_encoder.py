@@ -7,7 +7,7 @@ from .base_encoder import BaseFaceEncoder
 from models.face_model import FaceEncoding, FaceLocation
 from ..detectors.realtime_detector import RealtimeFaceDetector
 from config.models_config import FRAME_SCALE_FACTOR
-from utils.image_processor import smart_crop_and_resize
+from utils.frame_context import as_frame_context
 
 class RealtimeFaceEncoder(BaseFaceEncoder):
     """Face encoder optimized for real-time video processing."""
@@ -19,21 +19,10 @@ class RealtimeFaceEncoder(BaseFaceEncoder):
                    image: np.ndarray,
                    face_location: Optional[FaceLocation] = None) -> Optional[np.ndarray]:
         """Encode a single face with real-time optimizations."""
-        # Scale down image for faster processing
-        if FRAME_SCALE_FACTOR != 1.0:
-            height, width = image.shape[:2]
-            new_size = (int(width * FRAME_SCALE_FACTOR), 
-                       int(height * FRAME_SCALE_FACTOR))
-            image = cv2.resize(image, new_size)
-            
-            if face_location:
-                # Scale face location
-                face_location = FaceLocation(
-                    top=int(face_location.top * FRAME_SCALE_FACTOR),
-                    right=int(face_location.right * FRAME_SCALE_FACTOR),
-                    bottom=int(face_location.bottom * FRAME_SCALE_FACTOR),
-                    left=int(face_location.left * FRAME_SCALE_FACTOR)
-                )
+        # Scale down image for faster processing; a FrameContext resizes once per frame
+        image = as_frame_context(image).scaled(FRAME_SCALE_FACTOR)
+        if face_location:
+            face_location = face_location.scale(FRAME_SCALE_FACTOR)
         
         # Get face location if not provided
         if not face_location:
@@ -50,24 +39,10 @@ class RealtimeFaceEncoder(BaseFaceEncoder):
                     image: np.ndarray,
                     face_locations: Optional[List[FaceLocation]] = None) -> List[np.ndarray]:
         """Encode all faces in frame with real-time optimizations."""
-        # Scale down image
-        if FRAME_SCALE_FACTOR != 1.0:
-            height, width = image.shape[:2]
-            new_size = (int(width * FRAME_SCALE_FACTOR), 
-                       int(height * FRAME_SCALE_FACTOR))
-            image = cv2.resize(image, new_size)
-            
-            if face_locations:
-                # Scale face locations
-                face_locations = [
-                    FaceLocation(
-                        top=int(loc.top * FRAME_SCALE_FACTOR),
-                        right=int(loc.right * FRAME_SCALE_FACTOR),
-                        bottom=int(loc.bottom * FRAME_SCALE_FACTOR),
-                        left=int(loc.left * FRAME_SCALE_FACTOR)
-                    )
-                    for loc in face_locations
-                ]
+        # Scale down image; a FrameContext resizes once per frame
+        image = as_frame_context(image).scaled(FRAME_SCALE_FACTOR)
+        if face_locations:
+            face_locations = [location.scale(FRAME_SCALE_FACTOR) for location in face_locations]
         
         # Get face locations if not provided
         if not face_locations:
@@ -1,6 +1,9 @@
 from .base_matcher import BaseFaceMatcher
 from .euclidean_matcher import EuclideanFaceMatcher
 from .cosine_matcher import CosineFaceMatcher
+from .ivf_index import IVFIndex
+from .ivf_matcher import IVFFaceMatcher
+from .distance import euclidean_top_k
 
 # Default matcher to use
 DEFAULT_MATCHER = EuclideanFaceMatcher
@@ -9,5 +12,8 @@ __all__ = [
     'BaseFaceMatcher',
     'EuclideanFaceMatcher',
     'CosineFaceMatcher',
+    'IVFFaceMatcher',
+    'IVFIndex',
+    'euclidean_top_k',
     'DEFAULT_MATCHER'
 ]
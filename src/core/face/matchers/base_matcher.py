@@ -1,10 +1,13 @@
 from abc import ABC, abstractmethod
 import numpy as np
-from typing import List, Tuple, Optional
+from typing import List, Tuple, Optional, Union
 
-from models.face_model import FaceEncoding, RecognitionResult
+from models.face_model import FaceEncoding, FaceDatabase, RecognitionResult
 from config.models_config import RECOGNITION_TOLERANCE
 
+# Known faces may be given as a list or as a database with a prebuilt matrix
+KnownFaces = Union[List[FaceEncoding], FaceDatabase]
+
 class BaseFaceMatcher(ABC):
     """Abstract base class for face matching operations."""
     
@@ -14,13 +17,13 @@ class BaseFaceMatcher(ABC):
     @abstractmethod
     def match(self, 
               unknown_encoding: np.ndarray,
-              known_encodings: List[FaceEncoding]) -> Optional[RecognitionResult]:
+              known_encodings: KnownFaces) -> Optional[RecognitionResult]:
         """
         Match an unknown face encoding against known face encodings.
         
         Args:
             unknown_encoding: Face encoding to match
-            known_encodings: List of known face encodings to match against
+            known_encodings: Known face encodings, or a FaceDatabase to match against
             
         Returns:
             RecognitionResult if match found, None otherwise
@@ -30,13 +33,13 @@ class BaseFaceMatcher(ABC):
     @abstractmethod
     def batch_match(self,
                    unknown_encodings: List[np.ndarray],
-                   known_encodings: List[FaceEncoding]) -> List[Optional[RecognitionResult]]:
+                   known_encodings: KnownFaces) -> List[Optional[RecognitionResult]]:
         """
         Match multiple unknown face encodings against known faces.
         
         Args:
             unknown_encodings: List of face encodings to match
-            known_encodings: List of known face encodings to match against
+            known_encodings: Known face encodings, or a FaceDatabase to match against
             
         Returns:
             List of RecognitionResult, None for no matches
@@ -59,6 +62,21 @@ class BaseFaceMatcher(ABC):
         """
         pass
 
+    @staticmethod
+    def _gallery(known_encodings: KnownFaces) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        """
+        Get the known faces as a float32 matrix with row norms and names.
+        
+        A FaceDatabase hands out views of its own matrix, so nothing is
+        copied; a plain list is stacked once for this call.
+        """
+        if isinstance(known_encodings, FaceDatabase):
+            return known_encodings.matrix, known_encodings.norms, known_encodings.names
+        
+        matrix = np.array([enc.encoding for enc in known_encodings], dtype=np.float32)
+        names = [enc.name for enc in known_encodings]
+        return matrix, np.linalg.norm(matrix, axis=1), names
+
     @property
     @abstractmethod
     def name(self) -> str:
@@ -3,8 +3,8 @@ from typing import List, Optional
 from datetime import datetime
 from scipy.spatial.distance import cosine
 
-from .base_matcher import BaseFaceMatcher
-from models.face_model import FaceEncoding, RecognitionResult
+from .base_matcher import BaseFaceMatcher, KnownFaces
+from models.face_model import RecognitionResult
 from config.models_config import RECOGNITION_TOLERANCE
 
 class CosineFaceMatcher(BaseFaceMatcher):
@@ -16,18 +16,20 @@ class CosineFaceMatcher(BaseFaceMatcher):
     
     def match(self, 
               unknown_encoding: np.ndarray,
-              known_encodings: List[FaceEncoding]) -> Optional[RecognitionResult]:
+              known_encodings: KnownFaces) -> Optional[RecognitionResult]:
         """
         Match using Cosine similarity.
         """
         if not known_encodings:
             return None
             
-        # Extract numpy arrays from FaceEncoding objects
-        known_arrays = [enc.encoding for enc in known_encodings]
+        # Get the gallery matrix with precomputed norms
+        known_arrays, known_norms, known_names = self._gallery(known_encodings)
         
         # Calculate similarities
-        similarities = [1 - cosine(unknown_encoding, enc) for enc in known_arrays]
+        similarities = (known_arrays @ unknown_encoding) / (
+            known_norms * np.linalg.norm(unknown_encoding)
+        )
         
         # Find best match
         max_similarity_idx = np.argmax(similarities)
@@ -35,11 +37,9 @@ class CosineFaceMatcher(BaseFaceMatcher):
         
         # Check if match is within tolerance
         if max_similarity >= (1 - self.tolerance):
-            matched_encoding = known_encodings[max_similarity_idx]
-            
             return RecognitionResult(
                 location=None,
-                name=matched_encoding.name,
+                name=known_names[max_similarity_idx],
                 confidence=float(max_similarity),
                 encoding=unknown_encoding,
                 timestamp=datetime.now()
@@ -49,23 +49,22 @@ class CosineFaceMatcher(BaseFaceMatcher):
     
     def batch_match(self,
                    unknown_encodings: List[np.ndarray],
-                   known_encodings: List[FaceEncoding]) -> List[Optional[RecognitionResult]]:
+                   known_encodings: KnownFaces) -> List[Optional[RecognitionResult]]:
         """
         Batch match using vectorized cosine similarity.
         """
         if not unknown_encodings or not known_encodings:
             return [None] * len(unknown_encodings)
             
-        # Extract numpy arrays from FaceEncoding objects
-        known_arrays = np.array([enc.encoding for enc in known_encodings])
-        unknown_arrays = np.array(unknown_encodings)
+        # Get the gallery matrix with precomputed norms
+        known_arrays, known_norms, known_names = self._gallery(known_encodings)
+        unknown_arrays = np.array(unknown_encodings, dtype=np.float32)
         
-        # Normalize vectors for faster cosine similarity
-        known_norm = known_arrays / np.linalg.norm(known_arrays, axis=1)[:, np.newaxis]
+        # Normalize the unknowns; gallery norms are applied after the product
         unknown_norm = unknown_arrays / np.linalg.norm(unknown_arrays, axis=1)[:, np.newaxis]
         
         # Calculate all similarities at once
-        similarities = np.dot(unknown_norm, known_norm.T)
+        similarities = np.dot(unknown_norm, known_arrays.T) / known_norms
         
         results = []
         for i, sim_row in enumerate(similarities):
@@ -73,11 +72,9 @@ class CosineFaceMatcher(BaseFaceMatcher):
             max_sim = sim_row[max_idx]
             
             if max_sim >= (1 - self.tolerance):
-                matched_encoding = known_encodings[max_idx]
-                
                 result = RecognitionResult(
                     location=None,
-                    name=matched_encoding.name,
+                    name=known_names[max_idx],
                     confidence=float(max_sim),
                     encoding=unknown_encodings[i],
                     timestamp=datetime.now()
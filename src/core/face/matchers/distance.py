@@ -0,0 +1,97 @@
+import numpy as np
+from typing import Optional, Tuple
+
+from config.models_config import DISTANCE_CHUNK_BYTES
+
+# Bytes of scratch space per (query, gallery row) pair: the float32 product
+# and distance blocks plus the int64 indices from argpartition
+_BYTES_PER_PAIR = 16
+
+# Extra candidates kept per query beyond k, so near-ties that float32
+# rounding misorders are still settled by the exact re-score
+_RESCORE_MARGIN = 4
+
+def smallest_k(values: np.ndarray, k: int) -> np.ndarray:
+    """Column indices of the k smallest values in each row, unordered."""
+    if k == 1:
+        return np.argmin(values, axis=1)[:, np.newaxis]
+    return np.argpartition(values, k - 1, axis=1)[:, :k]
+
+def euclidean_top_k(queries: np.ndarray,
+                    gallery: np.ndarray,
+                    gallery_norms: Optional[np.ndarray] = None,
+                    k: int = 1,
+                    max_chunk_bytes: int = DISTANCE_CHUNK_BYTES) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find the k nearest gallery rows to each query by Euclidean distance.
+    
+    Squared distances come from ||a||^2 + ||b||^2 - 2ab, so each gallery
+    chunk costs one matrix multiply and no U x N x D temporary. The gallery
+    is walked in chunks sized to stay under max_chunk_bytes, keeping a
+    running list of the k + _RESCORE_MARGIN best candidates per query,
+    which are re-scored in float64 by direct subtraction before the k
+    nearest are taken. Neighbours whose float32 distances are within
+    rounding of each other are therefore ranked by their exact distance.
+    
+    Args:
+        queries: U x D array of encodings to look up
+        gallery: N x D array of known encodings
+        gallery_norms: Optional precomputed L2 norm of each gallery row
+        k: Number of neighbours to return per query
+        max_chunk_bytes: Scratch memory budget per chunk
+        
+    Returns:
+        Tuple of (U x k indices, U x k distances), nearest first
+    """
+    exact_queries = np.atleast_2d(np.asarray(queries))
+    exact_gallery = np.asarray(gallery)
+    queries = exact_queries.astype(np.float32, copy=False)
+    gallery = exact_gallery.astype(np.float32, copy=False)
+    num_queries, num_known = len(queries), len(gallery)
+    k = min(k, num_known)
+    keep = min(k + _RESCORE_MARGIN, num_known)
+    
+    if num_queries == 0 or k == 0:
+        return (np.empty((num_queries, 0), dtype=np.int64),
+                np.empty((num_queries, 0), dtype=np.float64))
+                
+    if gallery_norms is None:
+        gallery_sq = np.einsum('ij,ij->i', gallery, gallery)
+    else:
+        gallery_sq = np.square(gallery_norms, dtype=np.float32)
+    query_sq = np.einsum('ij,ij->i', queries, queries)[:, np.newaxis]
+    
+    chunk_rows = max(keep, max_chunk_bytes // (num_queries * _BYTES_PER_PAIR))
+    best_idx = np.empty((num_queries, 0), dtype=np.int64)
+    best_sq = np.empty((num_queries, 0), dtype=np.float32)
+    
+    for start in range(0, num_known, chunk_rows):
+        stop = min(start + chunk_rows, num_known)
+        
+        # Squared distances for this chunk via one GEMM
+        chunk_sq = queries @ gallery[start:stop].T
+        chunk_sq *= -2
+        chunk_sq += query_sq
+        chunk_sq += gallery_sq[start:stop]
+        
+        # Keep the chunk's best candidates and merge them with the running ones
+        chunk_k = min(keep, stop - start)
+        chunk_idx = smallest_k(chunk_sq, chunk_k)
+        candidate_sq = np.concatenate(
+            [best_sq, np.take_along_axis(chunk_sq, chunk_idx, axis=1)], axis=1)
+        candidate_idx = np.concatenate([best_idx, chunk_idx + start], axis=1)
+        
+        if candidate_sq.shape[1] > keep:
+            kept = smallest_k(candidate_sq, keep)
+            candidate_sq = np.take_along_axis(candidate_sq, kept, axis=1)
+            candidate_idx = np.take_along_axis(candidate_idx, kept, axis=1)
+        best_sq, best_idx = candidate_sq, candidate_idx
+        
+    # Re-score the candidates exactly and keep the k nearest, nearest first
+    distances = np.linalg.norm(
+        exact_gallery[best_idx].astype(np.float64) - exact_queries[:, np.newaxis].astype(np.float64),
+        axis=2
+    )
+    order = np.argsort(distances, axis=1, kind='stable')[:, :k]
+    return (np.take_along_axis(best_idx, order, axis=1),
+            np.take_along_axis(distances, order, axis=1))
@@ -2,8 +2,9 @@ import numpy as np
 from typing import List, Optional, Tuple
 from datetime import datetime
 
-from .base_matcher import BaseFaceMatcher
-from models.face_model import FaceEncoding, RecognitionResult
+from .base_matcher import BaseFaceMatcher, KnownFaces
+from .distance import euclidean_top_k
+from models.face_model import RecognitionResult
 from config.models_config import RECOGNITION_TOLERANCE
 
 class EuclideanFaceMatcher(BaseFaceMatcher):
@@ -15,31 +16,28 @@ class EuclideanFaceMatcher(BaseFaceMatcher):
     
     def match(self, 
               unknown_encoding: np.ndarray,
-              known_encodings: List[FaceEncoding]) -> Optional[RecognitionResult]:
+              known_encodings: KnownFaces) -> Optional[RecognitionResult]:
         """
         Match using Euclidean distance.
         """
         if not known_encodings:
             return None
             
-        # Extract numpy arrays from FaceEncoding objects
-        known_arrays = [enc.encoding for enc in known_encodings]
-        
-        # Calculate distances
-        distances = np.linalg.norm(np.array(known_arrays) - unknown_encoding, axis=1)
+        # Get the gallery matrix
+        known_arrays, known_norms, known_names = self._gallery(known_encodings)
         
         # Find best match
-        min_distance_idx = np.argmin(distances)
-        min_distance = distances[min_distance_idx]
+        indices, distances = euclidean_top_k(unknown_encoding, known_arrays, known_norms)
+        min_distance_idx = indices[0, 0]
+        min_distance = distances[0, 0]
         
         # Check if match is within tolerance
         if min_distance <= self.tolerance:
             confidence = 1 - (min_distance / self.tolerance)
-            matched_encoding = known_encodings[min_distance_idx]
             
             return RecognitionResult(
                 location=None,  # Location not needed for matching only
-                name=matched_encoding.name,
+                name=known_names[min_distance_idx],
                 confidence=float(confidence),
                 encoding=unknown_encoding,
                 timestamp=datetime.now()
@@ -49,35 +47,31 @@ class EuclideanFaceMatcher(BaseFaceMatcher):
     
     def batch_match(self,
                    unknown_encodings: List[np.ndarray],
-                   known_encodings: List[FaceEncoding]) -> List[Optional[RecognitionResult]]:
+                   known_encodings: KnownFaces) -> List[Optional[RecognitionResult]]:
         """
-        Batch match using vectorized operations.
+        Batch match using a chunked matrix-multiply distance kernel.
         """
         if not unknown_encodings or not known_encodings:
             return [None] * len(unknown_encodings)
             
-        # Extract numpy arrays from FaceEncoding objects
-        known_arrays = np.array([enc.encoding for enc in known_encodings])
+        # Get the gallery matrix
+        known_arrays, known_norms, known_names = self._gallery(known_encodings)
         unknown_arrays = np.array(unknown_encodings)
         
-        # Calculate all distances at once
-        distances = np.linalg.norm(
-            unknown_arrays[:, np.newaxis] - known_arrays, 
-            axis=2
-        )
+        # Nearest gallery row for every face, in bounded memory
+        indices, distances = euclidean_top_k(unknown_arrays, known_arrays, known_norms)
         
         results = []
-        for i, dist_row in enumerate(distances):
-            min_idx = np.argmin(dist_row)
-            min_dist = dist_row[min_idx]
+        for i in range(len(unknown_encodings)):
+            min_idx = indices[i, 0]
+            min_dist = distances[i, 0]
             
             if min_dist <= self.tolerance:
                 confidence = 1 - (min_dist / self.tolerance)
-                matched_encoding = known_encodings[min_idx]
                 
                 result = RecognitionResult(
                     location=None,
-                    name=matched_encoding.name,
+                    name=known_names[min_idx],
                     confidence=float(confidence),
                     encoding=unknown_encodings[i],
                     timestamp=datetime.now()
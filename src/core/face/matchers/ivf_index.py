@@ -0,0 +1,305 @@
+import numpy as np
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .distance import euclidean_top_k, smallest_k
+from config.models_config import (
+    ENCODING_DIMENSION,
+    ANN_NLIST,
+    ANN_NPROBE,
+    ANN_MIN_TRAIN_SIZE,
+    ANN_TRAIN_ITERATIONS,
+    ANN_TRAIN_SAMPLE
+)
+
+class _InvertedList:
+    """Packed, growable storage for the encodings assigned to one coarse cluster."""
+    
+    def __init__(self, dimension: int, capacity: int = 16):
+        self.vectors = np.empty((capacity, dimension), dtype=np.float32)
+        self.sq_norms = np.empty(capacity, dtype=np.float32)
+        self.names: List[str] = []
+        
+    def append(self, name: str, vector: np.ndarray) -> int:
+        row = len(self.names)
+        if row == self.vectors.shape[0]:
+            self._grow()
+        self.vectors[row] = vector
+        self.sq_norms[row] = np.dot(self.vectors[row], self.vectors[row])
+        self.names.append(name)
+        return row
+        
+    def remove(self, row: int) -> Optional[str]:
+        """Remove a row by moving the last one into it. Returns the moved name, if any."""
+        last = len(self.names) - 1
+        moved = None
+        if row != last:
+            moved = self.names[last]
+            self.vectors[row] = self.vectors[last]
+            self.sq_norms[row] = self.sq_norms[last]
+            self.names[row] = moved
+        self.names.pop()
+        return moved
+        
+    def _grow(self) -> None:
+        size = len(self.names)
+        vectors = np.empty((size * 2, self.vectors.shape[1]), dtype=np.float32)
+        sq_norms = np.empty(size * 2, dtype=np.float32)
+        vectors[:size] = self.vectors[:size]
+        sq_norms[:size] = self.sq_norms[:size]
+        self.vectors = vectors
+        self.sq_norms = sq_norms
+        
+    @property
+    def data(self) -> np.ndarray:
+        return self.vectors[:len(self.names)]
+
+class IVFIndex:
+    """
+    Inverted-file index over face encodings.
+    
+    Encodings are bucketed by their nearest k-means centroid. A query scans
+    only the nprobe closest buckets and scores those candidates exactly,
+    so nprobe trades recall for speed. Small indexes stay as a single
+    bucket, which is an exact scan.
+    """
+    
+    def __init__(self,
+                 dimension: int = ENCODING_DIMENSION,
+                 nlist: Optional[int] = ANN_NLIST,
+                 nprobe: int = ANN_NPROBE,
+                 min_train_size: int = ANN_MIN_TRAIN_SIZE):
+        self.dimension = dimension
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        
+        self._centroids = np.zeros((1, dimension), dtype=np.float32)
+        self._lists: List[_InvertedList] = [_InvertedList(dimension)]
+        self._locations: Dict[str, Tuple[int, int]] = {}
+        self._trained_size = 0
+        
+    def build(self, names: List[str], vectors: np.ndarray) -> None:
+        """Train centroids on the given encodings and bucket all of them."""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dimension)
+        self._centroids = self._train(vectors)
+        self._trained_size = len(vectors)
+        
+        assignments = np.zeros(len(vectors), dtype=np.int64)
+        if len(vectors) and len(self._centroids) > 1:
+            assignments = euclidean_top_k(vectors, self._centroids)[0][:, 0]
+            
+        # Group rows by bucket so each bucket is filled with one copy
+        order = np.argsort(assignments, kind='stable')
+        sizes = np.bincount(assignments, minlength=len(self._centroids))
+        self._fill([names[i] for i in order], vectors[order], sizes)
+        
+    def add(self, name: str, vector: np.ndarray) -> None:
+        """Insert or replace a single encoding."""
+        self.remove(name)
+        vector = np.asarray(vector, dtype=np.float32)
+        
+        list_no = 0
+        if len(self._centroids) > 1:
+            list_no = int(np.argmin(np.linalg.norm(self._centroids - vector, axis=1)))
+        self._insert(name, vector, list_no)
+        
+        # Retrain once the index has outgrown the centroids it was built with
+        if len(self) >= max(self.min_train_size, 4 * self._trained_size):
+            self.rebuild()
+            
+    def remove(self, name: str) -> None:
+        """Delete an encoding if present."""
+        location = self._locations.pop(name, None)
+        if location is None:
+            return
+            
+        list_no, row = location
+        moved = self._lists[list_no].remove(row)
+        if moved is not None:
+            self._locations[moved] = (list_no, row)
+            
+    def get(self, name: str) -> Optional[np.ndarray]:
+        """Get the stored encoding for a name."""
+        location = self._locations.get(name)
+        if location is None:
+            return None
+        list_no, row = location
+        return self._lists[list_no].vectors[row]
+        
+    def rebuild(self) -> None:
+        """Retrain centroids on the current contents."""
+        names, vectors = self._contents()
+        self.build(names, vectors)
+        
+    def search(self,
+               queries: np.ndarray,
+               k: int = 1,
+               nprobe: Optional[int] = None) -> List[List[Tuple[str, float]]]:
+        """
+        Find approximate nearest neighbours for each query.
+        
+        Args:
+            queries: U x D array of encodings
+            k: Neighbours to return per query
+            nprobe: Buckets to scan, defaults to the index setting
+            
+        Returns:
+            Per query, a list of (name, distance) pairs, nearest first
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        nprobe = min(nprobe or self.nprobe, len(self._lists))
+        probes, _ = euclidean_top_k(queries, self._centroids, k=nprobe)
+        query_sq = np.einsum('ij,ij->i', queries, queries)[:, np.newaxis]
+        
+        # Running top-k per query as (squared distance, bucket, row)
+        best_sq = np.full((len(queries), k), np.inf, dtype=np.float32)
+        best_list = np.full((len(queries), k), -1, dtype=np.int64)
+        best_row = np.full((len(queries), k), -1, dtype=np.int64)
+        
+        # Visit each probed bucket once with every query that probes it
+        for list_no in np.unique(probes):
+            inverted = self._lists[list_no]
+            size = len(inverted.names)
+            if size == 0:
+                continue
+                
+            query_idx = np.nonzero((probes == list_no).any(axis=1))[0]
+            bucket_sq = queries[query_idx] @ inverted.data.T
+            bucket_sq *= -2
+            bucket_sq += query_sq[query_idx]
+            bucket_sq += inverted.sq_norms[:size]
+            
+            bucket_k = min(k, size)
+            rows = smallest_k(bucket_sq, bucket_k)
+            candidate_sq = np.concatenate(
+                [best_sq[query_idx], np.take_along_axis(bucket_sq, rows, axis=1)], axis=1)
+            candidate_list = np.concatenate(
+                [best_list[query_idx], np.full_like(rows, list_no)], axis=1)
+            candidate_row = np.concatenate([best_row[query_idx], rows], axis=1)
+            
+            keep = smallest_k(candidate_sq, k)
+            best_sq[query_idx] = np.take_along_axis(candidate_sq, keep, axis=1)
+            best_list[query_idx] = np.take_along_axis(candidate_list, keep, axis=1)
+            best_row[query_idx] = np.take_along_axis(candidate_row, keep, axis=1)
+            
+        # Score the survivors exactly and order them nearest first
+        results = []
+        for query, lists, rows in zip(queries, best_list, best_row):
+            found = [(int(list_no), int(row)) for list_no, row in zip(lists, rows) if list_no >= 0]
+            if not found:
+                results.append([])
+                continue
+                
+            vectors = np.array([self._lists[list_no].vectors[row] for list_no, row in found])
+            distances = np.linalg.norm(vectors - query, axis=1)
+            order = np.argsort(distances, kind='stable')
+            results.append([
+                (self._lists[found[i][0]].names[found[i][1]], float(distances[i]))
+                for i in order
+            ])
+            
+        return results
+        
+    def save(self, path: Path) -> None:
+        """Save the index to an .npz file with an atomic replace."""
+        names, vectors = self._contents()
+        sizes = [len(inverted.names) for inverted in self._lists]
+        
+        path = Path(path)
+        temp_file = path.with_suffix('.tmp.npz')
+        try:
+            np.savez(
+                temp_file,
+                centroids=self._centroids,
+                vectors=vectors,
+                names=np.array(names, dtype=str),
+                sizes=np.array(sizes, dtype=np.int64),
+                settings=np.array([self.nprobe, self.min_train_size, self._trained_size,
+                                   -1 if self.nlist is None else self.nlist], dtype=np.int64)
+            )
+            temp_file.replace(path)
+        finally:
+            if temp_file.exists():
+                temp_file.unlink()
+                
+    @classmethod
+    def load(cls, path: Path) -> 'IVFIndex':
+        """Load an index saved with save()."""
+        with np.load(Path(path), allow_pickle=False) as data:
+            nprobe, min_train_size, trained_size, nlist = data['settings'].tolist()
+            centroids = data['centroids']
+            index = cls(
+                dimension=centroids.shape[1],
+                nlist=None if nlist < 0 else nlist,
+                nprobe=nprobe,
+                min_train_size=min_train_size
+            )
+            index._centroids = centroids
+            index._trained_size = trained_size
+            index._fill(data['names'].tolist(), data['vectors'], data['sizes'])
+            
+        return index
+        
+    def _fill(self, names: List[str], vectors: np.ndarray, sizes: np.ndarray) -> None:
+        """Replace all buckets with consecutive runs of the given rows."""
+        self._lists = []
+        self._locations = {}
+        
+        start = 0
+        for list_no, size in enumerate(sizes.tolist()):
+            inverted = _InvertedList(self.dimension, max(16, size))
+            inverted.names = names[start:start + size]
+            inverted.vectors[:size] = vectors[start:start + size]
+            inverted.sq_norms[:size] = np.einsum('ij,ij->i', inverted.data, inverted.data)
+            self._locations.update(
+                (name, (list_no, row)) for row, name in enumerate(inverted.names)
+            )
+            self._lists.append(inverted)
+            start += size
+            
+    def _insert(self, name: str, vector: np.ndarray, list_no: int) -> None:
+        row = self._lists[list_no].append(name, vector)
+        self._locations[name] = (list_no, row)
+        
+    def _contents(self) -> Tuple[List[str], np.ndarray]:
+        """All names and encodings, bucket by bucket."""
+        names = [name for inverted in self._lists for name in inverted.names]
+        vectors = np.concatenate([inverted.data for inverted in self._lists])
+        return names, vectors
+        
+    def _train(self, vectors: np.ndarray) -> np.ndarray:
+        """Run k-means on a sample of the encodings to get coarse centroids."""
+        if len(vectors) < self.min_train_size:
+            return np.zeros((1, self.dimension), dtype=np.float32)
+            
+        nlist = self.nlist or int(np.sqrt(len(vectors)))
+        nlist = max(1, min(nlist, len(vectors)))
+        
+        rng = np.random.default_rng(0)
+        sample_size = min(len(vectors), nlist * ANN_TRAIN_SAMPLE)
+        sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+        
+        for _ in range(ANN_TRAIN_ITERATIONS):
+            assignments = euclidean_top_k(sample, centroids)[0][:, 0]
+            counts = np.bincount(assignments, minlength=nlist)
+            
+            # Sum each cluster's points over runs of the sorted assignments
+            order = np.argsort(assignments, kind='stable')
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+            empty = counts == 0
+            sums = np.add.reduceat(sample[order], starts[~empty], axis=0)
+            
+            # Reseed empty clusters from random sample points
+            centroids[~empty] = sums / counts[~empty, np.newaxis]
+            if empty.any():
+                centroids[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+                
+        return centroids
+        
+    def __len__(self) -> int:
+        return len(self._locations)
+        
+    def __contains__(self, name: str) -> bool:
+        return name in self._locations
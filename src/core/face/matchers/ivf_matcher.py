@@ -0,0 +1,171 @@
+import numpy as np
+from pathlib import Path
+from typing import List, Optional
+from datetime import datetime
+
+from .base_matcher import BaseFaceMatcher, KnownFaces
+from .euclidean_matcher import EuclideanFaceMatcher
+from .ivf_index import IVFIndex
+from models.face_model import FaceDatabase, RecognitionResult
+from config.general_config import ANN_INDEX_FILE
+from config.models_config import RECOGNITION_TOLERANCE, ANN_NPROBE
+
+class IVFFaceMatcher(BaseFaceMatcher):
+    """Face matcher using an approximate nearest-neighbour index for large galleries."""
+
+    def __init__(self,
+                 tolerance: float = RECOGNITION_TOLERANCE,
+                 nprobe: int = ANN_NPROBE,
+                 index_path: Path = ANN_INDEX_FILE):
+        """
+        Initialize the IVF matcher.
+
+        Args:
+            tolerance: Maximum Euclidean distance for a match
+            nprobe: Index buckets scanned per query; higher means better recall, slower search
+            index_path: File used by save() and load()
+        """
+        super().__init__(tolerance)
+        self._name = "ivf"
+        self.index = IVFIndex(nprobe=nprobe)
+        self.index_path = Path(index_path)
+
+        # Plain lists have no change journal, so they are matched exactly
+        self._exact_matcher = EuclideanFaceMatcher(tolerance)
+
+        # Database the index mirrors and the version it last caught up to
+        self._database: Optional[FaceDatabase] = None
+        self._synced_version: Optional[int] = None
+
+    @property
+    def nprobe(self) -> int:
+        return self.index.nprobe
+
+    @nprobe.setter
+    def nprobe(self, value: int) -> None:
+        self.index.nprobe = max(1, value)
+
+    def sync(self, database: FaceDatabase) -> None:
+        """
+        Bring the index up to date with a database, applying only the
+        journaled changes when possible and rebuilding otherwise.
+        """
+        with database.lock:
+            if database is self._database and database.version == self._synced_version:
+                return
+
+            changes = None
+            if database is self._database and self._synced_version is not None:
+                changes = database.changes_since(self._synced_version)
+
+            if changes is None:
+                self.index.build(list(database.names), database.matrix.copy())
+            else:
+                for name in set(changes):
+                    encoding = database.get_encoding(name)
+                    if encoding is None:
+                        self.index.remove(name)
+                    else:
+                        self.index.add(name, encoding)
+
+            self._database = database
+            self._synced_version = database.version
+
+    def match(self,
+              unknown_encoding: np.ndarray,
+              known_encodings: KnownFaces) -> Optional[RecognitionResult]:
+        """
+        Match using the approximate index.
+        """
+        return self.batch_match([unknown_encoding], known_encodings)[0]
+
+    def batch_match(self,
+                   unknown_encodings: List[np.ndarray],
+                   known_encodings: KnownFaces) -> List[Optional[RecognitionResult]]:
+        """
+        Batch match by searching the index, with exact distances on the candidates.
+        """
+        if not unknown_encodings or not known_encodings:
+            return [None] * len(unknown_encodings)
+
+        if not isinstance(known_encodings, FaceDatabase):
+            return self._exact_matcher.batch_match(unknown_encodings, known_encodings)
+
+        self.sync(known_encodings)
+        neighbours = self.index.search(np.array(unknown_encodings), k=1)
+
+        results = []
+        for unknown_encoding, candidates in zip(unknown_encodings, neighbours):
+            result = None
+            if candidates:
+                name, min_dist = candidates[0]
+                if min_dist <= self.tolerance:
+                    result = RecognitionResult(
+                        location=None,
+                        name=name,
+                        confidence=float(1 - (min_dist / self.tolerance)),
+                        encoding=unknown_encoding,
+                        timestamp=datetime.now()
+                    )
+            results.append(result)
+
+        return results
+
+    def compute_similarity(self,
+                         encoding1: np.ndarray,
+                         encoding2: np.ndarray) -> float:
+        """
+        Compute similarity score using Euclidean distance.
+        """
+        return self._exact_matcher.compute_similarity(encoding1, encoding2)
+
+    def save(self) -> None:
+        """Save the index next to the other cache files."""
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        self.index.save(self.index_path)
+
+    def load(self, database: Optional[FaceDatabase] = None) -> bool:
+        """
+        Load a saved index. If a database is given and the index holds
+        exactly its current names and encodings, the index is taken to
+        mirror it so no rebuild happens on the next match. A stale index is
+        rebuilt on the next match instead.
+
+        Returns:
+            True if an index was loaded
+        """
+        if not self.index_path.exists():
+            return False
+
+        try:
+            index = IVFIndex.load(self.index_path)
+        except Exception as e:
+            print(f"Error loading ANN index: {e}")
+            return False
+
+        index.nprobe = self.index.nprobe
+        self.index = index
+        self._database = database
+        self._synced_version = None
+        if database is not None:
+            with database.lock:
+                if self._mirrors(database):
+                    self._synced_version = database.version
+                else:
+                    print("ANN index does not match the known faces, rebuilding on the next match")
+        return True
+
+    def _mirrors(self, database: FaceDatabase) -> bool:
+        """Check whether the index holds exactly the database's names and encodings."""
+        matrix = database.matrix
+        if len(self.index) != matrix.shape[0]:
+            return False
+        for row, name in enumerate(database.names):
+            encoding = self.index.get(name)
+            if encoding is None or not np.array_equal(encoding, matrix[row]):
+                return False
+        return True
+
+    @property
+    def name(self) -> str:
+        return self._name
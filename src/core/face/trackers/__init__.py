@@ -0,0 +1,7 @@
+from .base_tracker import BaseFaceTracker
+from .iou_tracker import IoUFaceTracker
+
+__all__ = [
+    'BaseFaceTracker',
+    'IoUFaceTracker'
+]
@@ -0,0 +1,66 @@
+from abc import ABC, abstractmethod
+import numpy as np
+from typing import List
+
+from models.face_model import FaceLocation, FaceTrack
+
+class BaseFaceTracker(ABC):
+    """Abstract base class for face trackers."""
+    
+    @abstractmethod
+    def update(self, image: np.ndarray, locations: List[FaceLocation]) -> List[FaceTrack]:
+        """
+        Associate freshly detected faces with existing tracks.
+        
+        Args:
+            image: numpy array of image data (BGR format)
+            locations: Face locations detected in the image
+            
+        Returns:
+            List of active FaceTrack objects
+        """
+        pass
+        
+    @abstractmethod
+    def predict(self, image: np.ndarray) -> List[FaceTrack]:
+        """
+        Move existing tracks to the given image without running detection.
+        
+        Args:
+            image: numpy array of image data (BGR format)
+            
+        Returns:
+            List of active FaceTrack objects
+        """
+        pass
+        
+    @abstractmethod
+    def needs_detection(self) -> bool:
+        """
+        Check whether the next frame should go through full detection.
+        
+        Returns:
+            True if detection is due or a track was lost
+        """
+        pass
+        
+    @abstractmethod
+    def rescale(self, factor: float) -> None:
+        """
+        Move tracks to frames resized by the given factor, keeping their identities.
+        
+        Args:
+            factor: New frame size divided by the old one
+        """
+        pass
+        
+    @abstractmethod
+    def reset(self) -> None:
+        """Drop all tracks."""
+        pass
+        
+    @property
+    @abstractmethod
+    def tracks(self) -> List[FaceTrack]:
+        """Currently active tracks."""
+        pass
@@ -0,0 +1,189 @@
+import cv2
+import numpy as np
+from typing import List, Optional
+
+from .base_tracker import BaseFaceTracker
+from models.face_model import FaceLocation, FaceTrack
+from utils.frame_context import as_frame_context
+from config.models_config import (
+    DETECTION_INTERVAL,
+    TRACK_IOU_THRESHOLD,
+    TRACK_MAX_MISSES,
+    TRACK_MIN_FLOW_POINTS
+)
+
+class IoUFaceTracker(BaseFaceTracker):
+    """Tracks faces by IoU association, following them with optical flow between detections."""
+    
+    def __init__(self,
+                detection_interval: int = DETECTION_INTERVAL,
+                iou_threshold: float = TRACK_IOU_THRESHOLD,
+                max_misses: int = TRACK_MAX_MISSES,
+                min_flow_points: int = TRACK_MIN_FLOW_POINTS):
+        """
+        Initialize the tracker.
+        
+        Args:
+            detection_interval: Frames between full detection passes
+            iou_threshold: Minimum IoU to associate a detection with a track
+            max_misses: Detection passes a track may go unmatched before removal
+            min_flow_points: Feature points needed to follow a face by optical flow
+        """
+        self.detection_interval = max(1, detection_interval)
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+        self.min_flow_points = min_flow_points
+        
+        self._tracks: List[FaceTrack] = []
+        self._next_track_id = 0
+        self._frames_since_detection = 0
+        self._track_lost = False
+        self._prev_gray: Optional[np.ndarray] = None
+        
+    def update(self, image: np.ndarray, locations: List[FaceLocation]) -> List[FaceTrack]:
+        """
+        Greedily match detections to tracks by IoU, then spawn and expire tracks.
+        """
+        self._remember(as_frame_context(image).gray)
+        self._frames_since_detection = 0
+        self._track_lost = False
+        
+        matched_tracks = set()
+        matched_detections = set()
+        
+        if self._tracks and locations:
+            ious = np.array([
+                [track.location.iou(location) for location in locations]
+                for track in self._tracks
+            ])
+            
+            # Take the best remaining pair until nothing overlaps enough
+            for flat_idx in np.argsort(ious, axis=None)[::-1]:
+                track_idx, det_idx = np.unravel_index(flat_idx, ious.shape)
+                if ious[track_idx, det_idx] < self.iou_threshold:
+                    break
+                if track_idx in matched_tracks or det_idx in matched_detections:
+                    continue
+                    
+                track = self._tracks[track_idx]
+                track.location = locations[det_idx]
+                track.hits += 1
+                track.misses = 0
+                matched_tracks.add(track_idx)
+                matched_detections.add(det_idx)
+                
+        # Age unmatched tracks and drop the ones that have been gone too long
+        active_tracks = []
+        for idx, track in enumerate(self._tracks):
+            if idx not in matched_tracks:
+                track.misses += 1
+                if track.misses > self.max_misses:
+                    continue
+            active_tracks.append(track)
+            
+        # Every unmatched detection starts a new, unidentified track
+        for idx, location in enumerate(locations):
+            if idx not in matched_detections:
+                active_tracks.append(FaceTrack(track_id=self._next_track_id, location=location))
+                self._next_track_id += 1
+                
+        self._tracks = active_tracks
+        self._advance_verification()
+        return self.tracks
+        
+    def predict(self, image: np.ndarray) -> List[FaceTrack]:
+        """
+        Shift each track by the median optical flow of the features inside its box.
+        """
+        gray = as_frame_context(image).gray
+        self._frames_since_detection += 1
+        
+        if self._prev_gray is not None and self._prev_gray.shape == gray.shape:
+            height, width = gray.shape[:2]
+            for track in self._tracks:
+                shift = self._estimate_shift(self._prev_gray, gray, track.location)
+                if shift is None:
+                    self._track_lost = True
+                    continue
+                    
+                dx, dy = shift
+                location = track.location
+                track.location = FaceLocation(
+                    top=int(np.clip(location.top + dy, 0, height - 1)),
+                    right=int(np.clip(location.right + dx, 1, width)),
+                    bottom=int(np.clip(location.bottom + dy, 1, height)),
+                    left=int(np.clip(location.left + dx, 0, width - 1))
+                )
+        elif self._tracks:
+            self._track_lost = True
+            
+        self._remember(gray)
+        self._advance_verification()
+        return self.tracks
+        
+    def needs_detection(self) -> bool:
+        """
+        Detection is due every interval frames, or right away once a track is lost.
+        """
+        return (self._prev_gray is None
+                or self._track_lost
+                or self._frames_since_detection + 1 >= self.detection_interval)
+                
+    def rescale(self, factor: float) -> None:
+        """Scale every track and force detection, since the last frame no longer matches."""
+        for track in self._tracks:
+            track.location = track.location.scale(factor)
+        self._prev_gray = None
+        
+    def reset(self) -> None:
+        """Drop all tracks and force detection on the next frame."""
+        self._tracks = []
+        self._prev_gray = None
+        self._frames_since_detection = 0
+        self._track_lost = False
+        
+    @property
+    def tracks(self) -> List[FaceTrack]:
+        return list(self._tracks)
+        
+    def _remember(self, gray: np.ndarray) -> None:
+        """Keep a copy of the frame for optical flow; the caller may reuse its buffer."""
+        if self._prev_gray is not None and self._prev_gray.shape == gray.shape:
+            np.copyto(self._prev_gray, gray)
+        else:
+            self._prev_gray = gray.copy()
+            
+    def _advance_verification(self) -> None:
+        """Count another frame since each identified track was last verified."""
+        for track in self._tracks:
+            if track.frames_since_verified is not None:
+                track.frames_since_verified += 1
+                
+    def _estimate_shift(self,
+                       prev_gray: np.ndarray,
+                       gray: np.ndarray,
+                       location: FaceLocation) -> Optional[np.ndarray]:
+        """Median displacement of trackable points inside a face box, or None if lost."""
+        mask = np.zeros_like(prev_gray)
+        mask[location.top:location.bottom, location.left:location.right] = 255
+        
+        points = cv2.goodFeaturesToTrack(
+            prev_gray,
+            maxCorners=30,
+            qualityLevel=0.01,
+            minDistance=3,
+            mask=mask
+        )
+        if points is None or len(points) < self.min_flow_points:
+            return None
+            
+        next_points, status, _ = cv2.calcOpticalFlowPyrLK(prev_gray, gray, points, None)
+        if next_points is None:
+            return None
+            
+        good = status.reshape(-1) == 1
+        if np.count_nonzero(good) < self.min_flow_points:
+            return None
+            
+        displacement = (next_points[good] - points[good]).reshape(-1, 2)
+        return np.median(displacement, axis=0)
@@ -0,0 +1,20 @@
+from .base_source import BaseFrameSource
+from .camera_source import CameraFrameSource
+from .video_file_source import VideoFileFrameSource
+from .image_folder_source import ImageFolderFrameSource
+from .base_sink import BaseResultSink
+from .jsonl_sink import JsonlResultSink
+from .motion_detector import MotionDetector
+from .latency_controller import LatencyController, DetectionSettings
+
+__all__ = [
+    'BaseFrameSource',
+    'CameraFrameSource',
+    'VideoFileFrameSource',
+    'ImageFolderFrameSource',
+    'BaseResultSink',
+    'JsonlResultSink',
+    'MotionDetector',
+    'LatencyController',
+    'DetectionSettings'
+]
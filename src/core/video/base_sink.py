@@ -0,0 +1,23 @@
+from abc import ABC, abstractmethod
+from typing import Optional, Tuple
+
+from models.face_model import FrameOverlay
+
+class BaseResultSink(ABC):
+    """Abstract base class for consumers of per-frame recognition results."""
+    
+    @abstractmethod
+    def write(self, overlay: FrameOverlay, frame_size: Optional[Tuple[int, int]] = None) -> None:
+        """
+        Record the results for one frame.
+        
+        Args:
+            overlay: Boxes and labels recognized on the frame
+            frame_size: Optional (width, height) to scale the boxes to
+        """
+        pass
+        
+    @abstractmethod
+    def close(self) -> None:
+        """Flush and release the sink."""
+        pass
@@ -0,0 +1,44 @@
+from abc import ABC, abstractmethod
+import numpy as np
+from typing import Optional, Tuple
+
+class BaseFrameSource(ABC):
+    """Abstract base class for sources of video frames."""
+    
+    @abstractmethod
+    def read(self, buffer: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray]]:
+        """
+        Read the next frame.
+        
+        Args:
+            buffer: Optional array to decode into when the source supports it
+            
+        Returns:
+            Tuple of (success, frame in BGR format)
+        """
+        pass
+        
+    @abstractmethod
+    def release(self) -> None:
+        """Free the underlying device or file."""
+        pass
+        
+    @property
+    @abstractmethod
+    def is_live(self) -> bool:
+        """
+        Whether frames arrive in real time. Live sources drop frames the
+        pipeline is too slow for; offline sources wait so none are skipped.
+        """
+        pass
+        
+    @property
+    @abstractmethod
+    def name(self) -> str:
+        """Get the name of the source."""
+        pass
+        
+    @property
+    def frame_label(self) -> Optional[str]:
+        """Name of the input the last frame was read from, None if frames have no separate inputs."""
+        return None
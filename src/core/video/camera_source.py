@@ -0,0 +1,46 @@
+import cv2
+import numpy as np
+from typing import Optional, Tuple
+
+from .base_source import BaseFrameSource
+from config.general_config import (
+    CAMERA_WIDTH,
+    CAMERA_HEIGHT,
+    CAMERA_FPS,
+    CAMERA_INDEX
+)
+
+class CameraFrameSource(BaseFrameSource):
+    """Frames from a local camera."""
+    
+    def __init__(self,
+                 index: int = CAMERA_INDEX,
+                 width: int = CAMERA_WIDTH,
+                 height: int = CAMERA_HEIGHT,
+                 fps: int = CAMERA_FPS):
+        self.index = index
+        self.capture = cv2.VideoCapture(index)
+        if not self.capture.isOpened():
+            raise RuntimeError("Failed to open camera")
+            
+        # Set camera properties
+        self.capture.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.capture.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        self.capture.set(cv2.CAP_PROP_FPS, fps)
+        self.capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Minimize camera buffering
+        
+    def read(self, buffer: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray]]:
+        if not self.capture.isOpened():
+            return False, None
+        return self.capture.read(buffer)
+        
+    def release(self) -> None:
+        self.capture.release()
+        
+    @property
+    def is_live(self) -> bool:
+        return True
+        
+    @property
+    def name(self) -> str:
+        return f"camera:{self.index}"
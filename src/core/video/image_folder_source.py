@@ -0,0 +1,52 @@
+import numpy as np
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from .base_source import BaseFrameSource
+from utils.file_manager import FileManager
+from utils.image_processor import load_image
+
+class ImageFolderFrameSource(BaseFrameSource):
+    """Frames read from the images in a folder, in file name order."""
+    
+    def __init__(self, folder: Path):
+        self.folder = Path(folder)
+        if not self.folder.is_dir():
+            raise RuntimeError(f"Image folder not found: {self.folder}")
+            
+        self.image_paths: List[Path] = sorted(FileManager.get_image_files(self.folder))
+        self._position = 0
+        self.current_path: Optional[Path] = None
+        
+    def read(self, buffer: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray]]:
+        # Unreadable images are skipped rather than ending the stream
+        while self._position < len(self.image_paths):
+            path = self.image_paths[self._position]
+            self._position += 1
+            
+            image = load_image(path)
+            if image is None:
+                continue
+                
+            self.current_path = path
+            if buffer is not None and buffer.shape == image.shape:
+                np.copyto(buffer, image)
+                return True, buffer
+            return True, image
+            
+        return False, None
+        
+    def release(self) -> None:
+        self._position = len(self.image_paths)
+        
+    @property
+    def is_live(self) -> bool:
+        return False
+        
+    @property
+    def name(self) -> str:
+        return f"images:{self.folder}"
+        
+    @property
+    def frame_label(self) -> Optional[str]:
+        return self.current_path.name if self.current_path else None
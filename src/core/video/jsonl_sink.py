@@ -0,0 +1,43 @@
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Tuple
+
+from .base_sink import BaseResultSink
+from models.face_model import FrameOverlay
+
+class JsonlResultSink(BaseResultSink):
+    """Writes one JSON object per processed frame to a file."""
+    
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._lock = threading.Lock()
+        
+    def write(self, overlay: FrameOverlay, frame_size: Optional[Tuple[int, int]] = None) -> None:
+        boxes = overlay.scaled_boxes(*frame_size) if frame_size else overlay.boxes
+        record = {
+            'stream': overlay.stream_id,
+            'frame': overlay.frame_seq,
+            'source': overlay.source,
+            'timestamp': datetime.now().isoformat(),
+            'faces': [
+                {'name': box.label, 'box': list(box.location.to_tuple())}
+                for box in boxes
+            ]
+        }
+        if overlay.stream_id is None:
+            del record['stream']
+        if overlay.source is None:
+            del record['source']
+            
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(json.dumps(record) + '\n')
+                
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
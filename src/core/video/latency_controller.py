@@ -0,0 +1,98 @@
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from config.models_config import (
+    LATENCY_BUDGET,
+    LATENCY_SMOOTHING,
+    LATENCY_ADJUST_FRAMES,
+    LATENCY_HEADROOM,
+    DETECTION_LEVELS,
+    DETECTION_START_LEVEL
+)
+
+@dataclass(frozen=True)
+class DetectionSettings:
+    """How thoroughly frames are searched for faces."""
+    scale: float  # Factor frames are resized by before detection
+    upsample: int  # Times the detector upsamples the frame to find smaller faces
+    interval: int  # Frames between full detection passes
+    
+    def __str__(self) -> str:
+        return f"scale {self.scale:g}, upsample {self.upsample}, detection every {self.interval} frames"
+
+class LatencyController:
+    """
+    Picks detection settings that keep per-frame latency within a budget.
+    
+    The settings form a ladder from cheapest to most thorough. A running
+    average of the measured latency moves one step down when it exceeds
+    the budget and one step up when it stays well under it, so busy scenes
+    meet their deadlines and quiet ones get the more accurate settings.
+    """
+    
+    def __init__(self,
+                 budget: float = LATENCY_BUDGET,
+                 levels: List[Tuple[float, int, int]] = DETECTION_LEVELS,
+                 start_level: int = DETECTION_START_LEVEL,
+                 smoothing: float = LATENCY_SMOOTHING,
+                 adjust_frames: int = LATENCY_ADJUST_FRAMES,
+                 headroom: float = LATENCY_HEADROOM):
+        """
+        Initialize the controller.
+        
+        Args:
+            budget: Target latency per frame in seconds
+            levels: (scale, upsample, interval) settings, cheapest first
+            start_level: Level used until latency has been measured
+            smoothing: Weight of the newest frame in the latency average
+            adjust_frames: Frames measured before the settings change again
+            headroom: Share of the budget under which the next level is tried
+        """
+        self.budget = budget
+        self.levels = [DetectionSettings(*level) for level in levels]
+        self.level = min(max(0, start_level), len(self.levels) - 1)
+        self.smoothing = smoothing
+        self.adjust_frames = adjust_frames
+        self.headroom = headroom
+        
+        self.latency: Optional[float] = None
+        self._frames_since_change = 0
+        
+    @property
+    def settings(self) -> DetectionSettings:
+        """Settings for the next frame."""
+        return self.levels[self.level]
+        
+    def record(self, latency: float) -> bool:
+        """
+        Add the latency of a processed frame.
+        
+        Args:
+            latency: Seconds from capture to result
+            
+        Returns:
+            True if the settings changed
+        """
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += self.smoothing * (latency - self.latency)
+            
+        self._frames_since_change += 1
+        if self._frames_since_change < self.adjust_frames:
+            return False
+            
+        if self.latency > self.budget and self.level > 0:
+            self.level -= 1
+        elif self.latency < self.budget * self.headroom and self.level < len(self.levels) - 1:
+            self.level += 1
+        else:
+            return False
+            
+        self._frames_since_change = 0
+        return True
+        
+    def describe(self) -> str:
+        """Report the current settings and the latency they were chosen for."""
+        latency = f"{self.latency * 1000:.0f} ms" if self.latency is not None else "not measured"
+        return f"{self.settings} (latency {latency}, budget {self.budget * 1000:.0f} ms)"
@@ -0,0 +1,162 @@
+import cv2
+import numpy as np
+from typing import List, Optional
+
+from models.face_model import FaceLocation
+from utils.frame_context import as_frame_context
+from config.models_config import (
+    MOTION_FRAME_WIDTH,
+    MOTION_PIXEL_THRESHOLD,
+    MOTION_MIN_AREA,
+    MOTION_LEARNING_RATE,
+    MOTION_REGION_MARGIN,
+    MOTION_FULL_FRAME_RATIO,
+    MOTION_IDLE_REFRESH
+)
+
+class MotionDetector:
+    """
+    Finds the parts of a frame that changed against a running background model.
+    
+    Frames are shrunk to a small grayscale image and compared with an
+    exponentially averaged background, so a check costs a fraction of a
+    face detection. Lets a static camera skip detection while nothing
+    moves and limit it to the changed regions otherwise.
+    """
+    
+    def __init__(self,
+                 width: int = MOTION_FRAME_WIDTH,
+                 pixel_threshold: int = MOTION_PIXEL_THRESHOLD,
+                 min_area: float = MOTION_MIN_AREA,
+                 learning_rate: float = MOTION_LEARNING_RATE,
+                 margin: float = MOTION_REGION_MARGIN,
+                 full_frame_ratio: float = MOTION_FULL_FRAME_RATIO,
+                 idle_refresh: int = MOTION_IDLE_REFRESH):
+        """
+        Initialize the motion detector.
+        
+        Args:
+            width: Width frames are shrunk to before comparison
+            pixel_threshold: Gray level change that marks a pixel as changed
+            min_area: Fraction of the frame a change must cover to count
+            learning_rate: How fast the background absorbs changes
+            margin: Margin added around changed regions, relative to their size
+            full_frame_ratio: Changed share of the frame beyond which the whole frame is reported
+            idle_refresh: Idle frames between periodic checks of the whole frame
+        """
+        self.width = width
+        self.pixel_threshold = pixel_threshold
+        self.min_area = min_area
+        self.learning_rate = learning_rate
+        self.margin = margin
+        self.full_frame_ratio = full_frame_ratio
+        self.idle_refresh = idle_refresh
+        
+        self._background: Optional[np.ndarray] = None
+        self._idle_frames = 0
+        self._kernel = np.ones((3, 3), dtype=np.uint8)
+        
+    def update(self, image: np.ndarray) -> Optional[List[FaceLocation]]:
+        """
+        Compare a frame with the background and fold it into the model.
+        
+        Args:
+            image: numpy array of image data (BGR format), or its FrameContext
+            
+        Returns:
+            Changed regions in image coordinates, an empty list if nothing
+            changed, or None if the whole frame should be checked (first
+            frame, new frame size, or most of the frame changed)
+        """
+        height, width = image.shape[:2]
+        scale = min(1.0, self.width / width)
+        gray = as_frame_context(image).gray
+        if scale < 1.0:
+            gray = cv2.resize(gray, (max(1, round(width * scale)), max(1, round(height * scale))),
+                              interpolation=cv2.INTER_AREA)
+        gray = cv2.GaussianBlur(gray, (5, 5), 0)
+        
+        if self._background is None or self._background.shape != gray.shape:
+            self._background = gray.astype(np.float32)
+            self._idle_frames = 0
+            return None
+            
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self._background))
+        cv2.accumulateWeighted(gray, self._background, self.learning_rate)
+        _, mask = cv2.threshold(diff, self.pixel_threshold, 255, cv2.THRESH_BINARY)
+        
+        regions = self._find_regions(mask, scale, width, height)
+        if regions:
+            self._idle_frames = 0
+            if sum(region.area for region in regions) > self.full_frame_ratio * height * width:
+                return None
+            return regions
+            
+        self._idle_frames += 1
+        return []
+        
+    @property
+    def refresh_due(self) -> bool:
+        """
+        Whether the current idle frame should be checked as a whole anyway,
+        in case a change was missed. Due every idle_refresh idle frames.
+        """
+        return self._idle_frames > 0 and self._idle_frames % self.idle_refresh == 0
+        
+    def reset(self) -> None:
+        """Forget the background; the next frame is reported as a whole."""
+        self._background = None
+        self._idle_frames = 0
+        
+    @staticmethod
+    def outside(locations: List[FaceLocation], regions: List[FaceLocation]) -> List[FaceLocation]:
+        """Get the locations that no changed region touches."""
+        return [
+            location for location in locations
+            if not any(location.iou(region) > 0 for region in regions)
+        ]
+        
+    def _find_regions(self, mask: np.ndarray, scale: float, width: int, height: int) -> List[FaceLocation]:
+        """Bounding boxes of large enough changes, padded, scaled up and merged."""
+        min_pixels = max(1, int(self.min_area * mask.size))
+        if cv2.countNonZero(mask) < min_pixels:
+            return []
+            
+        mask = cv2.dilate(mask, self._kernel, iterations=2)
+        count, _, stats, _ = cv2.connectedComponentsWithStats(mask)
+        
+        regions = []
+        for x, y, w, h, area in stats[1:count]:
+            if area < min_pixels:
+                continue
+            pad = self.margin * max(w, h)
+            regions.append(FaceLocation(
+                top=max(0, int((y - pad) / scale)),
+                right=min(width, int(np.ceil((x + w + pad) / scale))),
+                bottom=min(height, int(np.ceil((y + h + pad) / scale))),
+                left=max(0, int((x - pad) / scale))
+            ))
+        return self._merge(regions)
+        
+    @staticmethod
+    def _merge(regions: List[FaceLocation]) -> List[FaceLocation]:
+        """Union overlapping regions until none overlap, so no face is detected twice."""
+        merged = True
+        while merged:
+            merged = False
+            for i in range(len(regions)):
+                for j in range(i + 1, len(regions)):
+                    a, b = regions[i], regions[j]
+                    if a.iou(b) > 0:
+                        regions[i] = FaceLocation(
+                            top=min(a.top, b.top),
+                            right=max(a.right, b.right),
+                            bottom=max(a.bottom, b.bottom),
+                            left=min(a.left, b.left)
+                        )
+                        del regions[j]
+                        merged = True
+                        break
+                if merged:
+                    break
+        return regions
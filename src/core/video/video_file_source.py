@@ -0,0 +1,36 @@
+import cv2
+import numpy as np
+from pathlib import Path
+from typing import Optional, Tuple
+
+from .base_source import BaseFrameSource
+
+class VideoFileFrameSource(BaseFrameSource):
+    """Frames decoded from a video file, one after another."""
+    
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.capture = cv2.VideoCapture(str(self.path))
+        if not self.capture.isOpened():
+            raise RuntimeError(f"Failed to open video file: {self.path}")
+            
+    def read(self, buffer: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray]]:
+        if not self.capture.isOpened():
+            return False, None
+        return self.capture.read(buffer)
+        
+    def release(self) -> None:
+        self.capture.release()
+        
+    @property
+    def fps(self) -> float:
+        """Frame rate stored in the file, 0 if unknown."""
+        return self.capture.get(cv2.CAP_PROP_FPS)
+        
+    @property
+    def is_live(self) -> bool:
+        return False
+        
+    @property
+    def name(self) -> str:
+        return f"video:{self.path}"
@@ -2,6 +2,9 @@ from .face_model import (
     FaceEncoding,
     FaceLocation,
     RecognitionResult,
+    FaceTrack,
+    OverlayBox,
+    FrameOverlay,
     ClusterGroup,
     FaceDatabase
 )
@@ -10,6 +13,9 @@ __all__ = [
     'FaceEncoding',
     'FaceLocation',
     'RecognitionResult',
+    'FaceTrack',
+    'OverlayBox',
+    'FrameOverlay',
     'ClusterGroup',
     'FaceDatabase'
 ]
@@ -1,8 +1,15 @@
 from dataclasses import dataclass
 from typing import List, Tuple, Optional, Dict
+import threading
 import numpy as np
 from datetime import datetime
 
+from config.models_config import (
+    ENCODING_DIMENSION,
+    GALLERY_INITIAL_CAPACITY,
+    GALLERY_JOURNAL_SIZE
+)
+
 @dataclass
 class FaceEncoding:
     """Represents a face encoding with its metadata."""
@@ -24,6 +31,30 @@ class FaceLocation:
     @classmethod
     def from_tuple(cls, location: Tuple[int, int, int, int]) -> 'FaceLocation':
         return cls(location[0], location[1], location[2], location[3])
+    
+    @property
+    def area(self) -> int:
+        return max(0, self.bottom - self.top) * max(0, self.right - self.left)
+    
+    def iou(self, other: 'FaceLocation') -> float:
+        """Intersection over union with another face location."""
+        top = max(self.top, other.top)
+        right = min(self.right, other.right)
+        bottom = min(self.bottom, other.bottom)
+        left = max(self.left, other.left)
+        
+        intersection = max(0, bottom - top) * max(0, right - left)
+        union = self.area + other.area - intersection
+        return intersection / union if union > 0 else 0.0
+    
+    def scale(self, factor: float) -> 'FaceLocation':
+        """Return a copy of this location scaled by the given factor."""
+        return FaceLocation(
+            top=int(self.top * factor),
+            right=int(self.right * factor),
+            bottom=int(self.bottom * factor),
+            left=int(self.left * factor)
+        )
 
 @dataclass
 class RecognitionResult:
@@ -34,6 +65,64 @@ class RecognitionResult:
     encoding: Optional[np.ndarray] = None
     timestamp: datetime = datetime.now()
 
+@dataclass
+class FaceTrack:
+    """Represents a face followed across consecutive video frames."""
+    track_id: int
+    location: FaceLocation
+    name: str = "Unknown"
+    confidence: float = 0.0
+    encoding: Optional[np.ndarray] = None
+    hits: int = 1
+    misses: int = 0
+    frames_since_verified: Optional[int] = None  # None until first identified
+    
+    def due_for_verification(self, interval: int) -> bool:
+        """Check whether the track identity should be recomputed."""
+        return self.frames_since_verified is None or self.frames_since_verified >= interval
+    
+    def assign_identity(self, result: Optional['RecognitionResult'], encoding: np.ndarray) -> None:
+        """Store the outcome of a recognition pass on this track."""
+        self.encoding = encoding
+        self.name = result.name if result else "Unknown"
+        self.confidence = result.confidence if result else 0.0
+        self.frames_since_verified = 0
+
+@dataclass
+class OverlayBox:
+    """A labelled box to draw over a video frame."""
+    location: FaceLocation
+    label: str
+    color: Tuple[int, int, int]
+
+@dataclass
+class FrameOverlay:
+    """Boxes and labels recognized on one video frame."""
+    frame_seq: int
+    frame_size: Tuple[int, int]  # (width, height) the box coordinates refer to
+    boxes: List[OverlayBox]
+    stream_id: Optional[str] = None
+    source_size: Optional[Tuple[int, int]] = None  # (width, height) of the full-resolution frame
+    source: Optional[str] = None  # Input the frame was read from, e.g. an image file name
+    
+    def scaled_boxes(self, width: int, height: int) -> List[OverlayBox]:
+        """Get the boxes scaled to a frame of the given size."""
+        factor_x = width / self.frame_size[0]
+        factor_y = height / self.frame_size[1]
+        return [
+            OverlayBox(
+                location=FaceLocation(
+                    top=int(box.location.top * factor_y),
+                    right=int(box.location.right * factor_x),
+                    bottom=int(box.location.bottom * factor_y),
+                    left=int(box.location.left * factor_x)
+                ),
+                label=box.label,
+                color=box.color
+            )
+            for box in self.boxes
+        ]
+
 @dataclass
 class ClusterGroup:
     """Represents a group of similar faces."""
@@ -45,25 +134,101 @@ class ClusterGroup:
         return len(self.face_files)
 
 class FaceDatabase:
-    """Manages the collection of known face encodings."""
-    def __init__(self):
-        self._encodings: Dict[str, FaceEncoding] = {}
+    """Manages the collection of known face encodings.
+
+    Encodings live in one preallocated, contiguous float32 matrix with a
+    name index, so matchers can use the gallery without rebuilding arrays.
+    Rows are kept packed: removal moves the last row into the freed slot.
+    """
+    def __init__(self,
+                 dimension: int = ENCODING_DIMENSION,
+                 initial_capacity: int = GALLERY_INITIAL_CAPACITY):
+        self._matrix = np.empty((max(1, initial_capacity), dimension), dtype=np.float32)
+        self._norms = np.empty(max(1, initial_capacity), dtype=np.float32)
+        self._names: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._timestamps: List[datetime] = []
         self._clusters: List[ClusterGroup] = []
+        self._lock = threading.RLock()
         self.last_updated: datetime = datetime.now()
 
+        # Change journal so indexes built on the gallery can catch up incrementally
+        self._version = 0
+        self._journal: List[str] = []
+        self._journal_base = 0
+
     def add_face(self, name: str, encoding: np.ndarray) -> None:
-        """Add a new face encoding to the database."""
-        self._encodings[name] = FaceEncoding(encoding=encoding, name=name)
-        self.last_updated = datetime.now()
+        """Add a new face encoding to the database, replacing any with the same name."""
+        with self._lock:
+            row = self._index.get(name)
+            if row is None:
+                row = len(self._names)
+                if row == self._matrix.shape[0]:
+                    self._grow()
+                self._index[name] = row
+                self._names.append(name)
+                self._timestamps.append(datetime.now())
+            else:
+                self._timestamps[row] = datetime.now()
+
+            self._matrix[row] = encoding
+            self._norms[row] = np.linalg.norm(self._matrix[row])
+            self._record_change(name)
+
+    def add_faces(self, names: List[str], encodings: np.ndarray) -> None:
+        """Add or replace many face encodings at once, copying the rows in bulk."""
+        with self._lock:
+            now = datetime.now()
+            rows = np.empty(len(names), dtype=np.intp)
+            for i, name in enumerate(names):
+                row = self._index.get(name)
+                if row is None:
+                    row = len(self._names)
+                    if row == self._matrix.shape[0]:
+                        self._grow()
+                    self._index[name] = row
+                    self._names.append(name)
+                    self._timestamps.append(now)
+                else:
+                    self._timestamps[row] = now
+                rows[i] = row
+                self._record_change(name)
+
+            self._matrix[rows] = encodings
+            self._norms[rows] = np.linalg.norm(self._matrix[rows], axis=1)
 
     def get_face(self, name: str) -> Optional[FaceEncoding]:
         """Retrieve a face encoding by name."""
-        return self._encodings.get(name)
+        with self._lock:
+            row = self._index.get(name)
+            if row is None:
+                return None
+            return FaceEncoding(
+                encoding=self._matrix[row].copy(),
+                name=name,
+                timestamp=self._timestamps[row]
+            )
 
     def remove_face(self, name: str) -> None:
         """Remove a face encoding from the database."""
-        self._encodings.pop(name, None)
-        self.last_updated = datetime.now()
+        with self._lock:
+            row = self._index.pop(name, None)
+            if row is None:
+                return
+
+            # Move the last row into the freed slot to keep the matrix packed
+            last = len(self._names) - 1
+            if row != last:
+                moved_name = self._names[last]
+                self._matrix[row] = self._matrix[last]
+                self._norms[row] = self._norms[last]
+                self._names[row] = moved_name
+                self._timestamps[row] = self._timestamps[last]
+                self._index[moved_name] = row
+
+            self._names.pop()
+            self._timestamps.pop()
+            self._record_change(name)
 
     def update_clusters(self, clusters: List[ClusterGroup]) -> None:
         """Update the face clusters."""
@@ -72,7 +237,8 @@ class FaceDatabase:
 
     def get_all_encodings(self) -> List[Tuple[str, np.ndarray]]:
         """Get all face encodings with their names."""
-        return [(name, face.encoding) for name, face in self._encodings.items()]
+        with self._lock:
+            return [(name, self._matrix[row].copy()) for row, name in enumerate(self._names)]
 
     def get_clusters(self) -> List[ClusterGroup]:
         """Get all face clusters."""
@@ -80,11 +246,84 @@ class FaceDatabase:
 
     def clear(self) -> None:
         """Clear all data from the database."""
-        self._encodings.clear()
-        self._clusters.clear()
+        with self._lock:
+            self._names.clear()
+            self._index.clear()
+            self._timestamps.clear()
+            self._clusters.clear()
+            self._version += 1
+            self._journal.clear()
+            self._journal_base = self._version
+            self.last_updated = datetime.now()
+
+    def changes_since(self, version: int) -> Optional[List[str]]:
+        """
+        Names added, replaced or removed since the given version.
+        Returns None if the journal no longer reaches back that far.
+        """
+        with self._lock:
+            if version < self._journal_base:
+                return None
+            return self._journal[version - self._journal_base:]
+
+    def get_encoding(self, name: str) -> Optional[np.ndarray]:
+        """Get the stored float32 encoding for a name without copying."""
+        with self._lock:
+            row = self._index.get(name)
+            return None if row is None else self._matrix[row]
+
+    def _record_change(self, name: str) -> None:
+        """Bump the version and journal the changed name."""
+        self._version += 1
+        self._journal.append(name)
+        if len(self._journal) > GALLERY_JOURNAL_SIZE:
+            dropped = len(self._journal) // 2
+            del self._journal[:dropped]
+            self._journal_base += dropped
         self.last_updated = datetime.now()
 
+    def _grow(self) -> None:
+        """Double the matrix capacity."""
+        capacity = self._matrix.shape[0] * 2
+        matrix = np.empty((capacity, self._matrix.shape[1]), dtype=np.float32)
+        norms = np.empty(capacity, dtype=np.float32)
+        matrix[:len(self._names)] = self._matrix[:len(self._names)]
+        norms[:len(self._names)] = self._norms[:len(self._names)]
+        self._matrix = matrix
+        self._norms = norms
+
+    @property
+    def lock(self) -> threading.RLock:
+        """Lock to hold while reading the matrix, norms and names together."""
+        return self._lock
+
+    @property
+    def version(self) -> int:
+        """Counter bumped on every change to the encodings."""
+        return self._version
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """N x dimension float32 view of all encodings, in row order."""
+        return self._matrix[:len(self._names)]
+
+    @property
+    def norms(self) -> np.ndarray:
+        """Precomputed L2 norm of each row of the matrix."""
+        return self._norms[:len(self._names)]
+
+    @property
+    def names(self) -> List[str]:
+        """Names in row order. Treat as read-only."""
+        return self._names
+
     @property
     def size(self) -> int:
         """Get the number of faces in the database."""
-        return len(self._encodings)
+        return len(self._names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._index
@@ -0,0 +1,257 @@
+import json
+import multiprocessing
+import os
+import signal
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import cv2
+import numpy as np
+
+from config.general_config import (
+    BATCH_FRAME_STEP,
+    BATCH_CHECKPOINT_INTERVAL,
+    BATCH_QUEUE_DEPTH
+)
+from config.models_config import FRAME_SCALE_FACTOR, MAX_CONCURRENT_PROCESSES
+from core.face.detectors.realtime_detector import RealtimeFaceDetector
+from core.face.matchers import DEFAULT_MATCHER
+from models.face_model import FaceDatabase, FaceLocation
+
+# Per-worker detector, created once by the pool initializer
+_worker_detector: Optional[RealtimeFaceDetector] = None
+
+def _init_worker():
+    """Load the detection and recognition models in a fresh worker process."""
+    global _worker_detector
+    # Ctrl+C reaches the whole process group; the parent decides when workers stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker_detector = RealtimeFaceDetector()
+
+def _analyze_frame(frame_index: int,
+                   small_frame: np.ndarray) -> Tuple[int, List[Tuple[int, int, int, int]], List[np.ndarray]]:
+    """Detect and encode every face in a downscaled frame."""
+    locations = _worker_detector.detect(small_frame)
+    encodings = _worker_detector.get_encodings(small_frame, locations) if locations else []
+    return frame_index, [location.to_tuple() for location in locations], encodings
+
+class BatchVideoProcessor:
+    """
+    Recognizes faces on every frame, or every Nth frame, of a video file as
+    fast as the machine allows.
+    
+    The video is decoded in this process while a pool of worker processes
+    detects and encodes faces on the frames in flight. Results are taken
+    back in frame order, matched in batches against the gallery and
+    written as JSON lines. A checkpoint next to the output records how far
+    the run got, so an interrupted run resumes where it stopped.
+    """
+    
+    def __init__(self,
+                 face_database: FaceDatabase,
+                 max_workers: int = MAX_CONCURRENT_PROCESSES,
+                 frame_step: int = BATCH_FRAME_STEP,
+                 checkpoint_interval: int = BATCH_CHECKPOINT_INTERVAL,
+                 scale_factor: float = FRAME_SCALE_FACTOR):
+        self.face_database = face_database
+        self.matcher = DEFAULT_MATCHER()
+        self.max_workers = max_workers
+        self.frame_step = max(1, frame_step)
+        self.checkpoint_interval = checkpoint_interval
+        self.scale_factor = scale_factor
+        
+    def process(self,
+                video_path: Path,
+                output_path: Path,
+                resume: bool = True,
+                stop_event: Optional[threading.Event] = None) -> int:
+        """
+        Process a video file, writing one JSON object per processed frame.
+        
+        Args:
+            video_path: Video file to read
+            output_path: JSON lines file to write
+            resume: Continue from a matching checkpoint instead of starting over
+            stop_event: Optional event that interrupts the run after a checkpoint
+            
+        Returns:
+            Number of frames processed in this run
+        """
+        video_path, output_path = Path(video_path), Path(output_path)
+        checkpoint_path = output_path.with_name(output_path.name + '.checkpoint')
+        identity = self._video_identity(video_path)
+        
+        start_frame, offset = 0, 0
+        checkpoint = self._load_checkpoint(checkpoint_path) if resume else None
+        if checkpoint and checkpoint.get('video') == identity and output_path.exists():
+            start_frame, offset = checkpoint['next_frame'], checkpoint['output_bytes']
+            
+        capture = self._open(video_path)
+        fps = capture.get(cv2.CAP_PROP_FPS) or 0.0
+        if start_frame and not self._seek(capture, start_frame):
+            # Many codecs only seek to keyframes or ignore the seek; decode up to the frame instead
+            capture.release()
+            capture = self._open(video_path)
+            if not all(capture.grab() for _ in range(start_frame)):
+                print(f"Cannot reach frame {start_frame} of {video_path.name}, starting over")
+                capture.release()
+                capture = self._open(video_path)
+                start_frame, offset = 0, 0
+        if start_frame:
+            print(f"Resuming {video_path.name} from frame {start_frame}")
+            
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output = open(output_path, 'r+b' if offset else 'wb')
+        output.truncate(offset)
+        output.seek(offset)
+        
+        executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker
+        )
+        in_flight: deque = deque()
+        max_in_flight = self.max_workers * BATCH_QUEUE_DEPTH
+        frame_index = start_frame
+        exhausted = False
+        processed = 0
+        since_checkpoint = 0
+        next_frame = start_frame
+        
+        try:
+            while not (stop_event and stop_event.is_set()):
+                # Keep every worker busy while decoding ahead
+                while not exhausted and len(in_flight) < max_in_flight:
+                    if frame_index % self.frame_step:
+                        exhausted = not capture.grab()
+                        frame_index += 1
+                        continue
+                        
+                    ret, frame = capture.read()
+                    if not ret:
+                        exhausted = True
+                        break
+                    small_frame = cv2.resize(frame, (0, 0), fx=self.scale_factor, fy=self.scale_factor)
+                    in_flight.append(executor.submit(_analyze_frame, frame_index, small_frame))
+                    frame_index += 1
+                    
+                if not in_flight:
+                    break
+                    
+                # Take results in submission order, so output stays in frame order
+                results = [in_flight.popleft().result()]
+                while in_flight and in_flight[0].done():
+                    results.append(in_flight.popleft().result())
+                    
+                self._write_results(output, results, fps)
+                processed += len(results)
+                since_checkpoint += len(results)
+                next_frame = results[-1][0] + 1
+                
+                if since_checkpoint >= self.checkpoint_interval:
+                    self._save_checkpoint(checkpoint_path, identity, next_frame, output)
+                    since_checkpoint = 0
+                    
+            if exhausted and not in_flight:
+                # Finished; nothing left to resume
+                if checkpoint_path.exists():
+                    checkpoint_path.unlink()
+            else:
+                self._save_checkpoint(checkpoint_path, identity, next_frame, output)
+                
+        finally:
+            for future in in_flight:
+                future.cancel()
+            executor.shutdown(wait=True)
+            capture.release()
+            output.close()
+            
+        return processed
+        
+    def _write_results(self,
+                       output,
+                       results: List[Tuple[int, List[Tuple[int, int, int, int]], List[np.ndarray]]],
+                       fps: float):
+        """Match the faces of several frames in one batch and append their records."""
+        encodings = [encoding for _, _, frame_encodings in results for encoding in frame_encodings]
+        matches = []
+        if encodings:
+            with self.face_database.lock:
+                matches = self.matcher.batch_match(encodings, self.face_database)
+                
+        lines = []
+        start = 0
+        for frame_index, locations, frame_encodings in results:
+            faces = []
+            for location, match in zip(locations, matches[start:start + len(frame_encodings)]):
+                box = FaceLocation.from_tuple(location).scale(1 / self.scale_factor)
+                faces.append({
+                    'name': match.name if match else "Unknown",
+                    'confidence': round(match.confidence, 4) if match else 0.0,
+                    'box': list(box.to_tuple())
+                })
+            start += len(frame_encodings)
+            
+            lines.append(json.dumps({
+                'frame': frame_index,
+                'time': round(frame_index / fps, 3) if fps else None,
+                'faces': faces
+            }))
+            
+        output.write(('\n'.join(lines) + '\n').encode('utf-8'))
+        
+    @staticmethod
+    def _open(video_path: Path) -> cv2.VideoCapture:
+        capture = cv2.VideoCapture(str(video_path))
+        if not capture.isOpened():
+            raise RuntimeError(f"Failed to open video file: {video_path}")
+        return capture
+        
+    @staticmethod
+    def _seek(capture: cv2.VideoCapture, frame_index: int) -> bool:
+        """Seek to a frame, returning whether the capture landed exactly on it."""
+        if not capture.set(cv2.CAP_PROP_POS_FRAMES, frame_index):
+            return False
+        return int(capture.get(cv2.CAP_PROP_POS_FRAMES)) == frame_index
+        
+    @staticmethod
+    def _video_identity(video_path: Path) -> Dict[str, Any]:
+        """Describe the video so a checkpoint is only reused for the same file."""
+        stat = video_path.stat()
+        return {'path': str(video_path.resolve()), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        
+    def _save_checkpoint(self, checkpoint_path: Path, identity: Dict[str, Any], next_frame: int, output) -> None:
+        """Record progress once the output written so far is safely on disk."""
+        output.flush()
+        os.fsync(output.fileno())
+        temp_file = checkpoint_path.with_name(checkpoint_path.name + '.tmp')
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'video': identity,
+                    'frame_step': self.frame_step,
+                    'next_frame': next_frame,
+                    'output_bytes': output.tell()
+                }, f)
+            temp_file.replace(checkpoint_path)
+        except Exception as e:
+            print(f"Error saving checkpoint: {e}")
+            if temp_file.exists():
+                temp_file.unlink()
+                
+    def _load_checkpoint(self, checkpoint_path: Path) -> Optional[Dict[str, Any]]:
+        if not checkpoint_path.exists():
+            return None
+        try:
+            with open(checkpoint_path, 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error loading checkpoint: {e}")
+            return None
+            
+        # A different frame step would produce a different set of frames
+        if checkpoint.get('frame_step') != self.frame_step:
+            return None
+        return checkpoint
@@ -1,24 +1,33 @@
 import threading
+import time
 from pathlib import Path
 import numpy as np
-from sklearn.cluster import DBSCAN
-from typing import Dict, List
+from typing import Dict, List, Optional
 import face_recognition
 
 from config.models_config import (
     CLUSTERING_EPS,
     CLUSTERING_MIN_SAMPLES,
-    CLUSTERING_METRIC
+    CLUSTERING_REFIT_INTERVAL,
+    CLUSTERING_MATCH_TOLERANCE
 )
 from utils.cache_manager import CacheManager
 from core.face.encoders.cluster_encoder import ClusterFaceEncoder
+from core.face.clusterers.incremental_clusterer import IncrementalClusterer
+from core.face.clusterers.cluster_index import ClusterIndex
 
 class ClusteringService:
     def __init__(self, stop_event: threading.Event):
         self.stop_event = stop_event
         self.encoder = ClusterFaceEncoder()
-        self.cache_manager = CacheManager()
+        # Cluster updates must not wait on disk; the groups are written in the background
+        self.cache_manager = CacheManager(write_behind=True)
+        self.clusterer = IncrementalClusterer(CLUSTERING_EPS, CLUSTERING_MIN_SAMPLES)
         self.clusters: Dict[str, List[np.ndarray]] = {}
+        self._group_index = ClusterIndex({})
+        self._clusters_version: Optional[int] = None  # Clusterer version of the published groups
+        self.refit_interval = CLUSTERING_REFIT_INTERVAL
+        self._last_refit = time.monotonic()
         
         # Threading
         self.process_thread = threading.Thread(target=self._cluster_loop, daemon=True)
@@ -41,68 +50,101 @@ class ClusteringService:
         """Stop the clustering service."""
         with self._lock:
             self.is_running.clear()
+            self.cache_manager.close()
             print("Clustering service stopped")
 
-    def _cluster_faces(self, encodings: List[np.ndarray]) -> Dict[str, List[np.ndarray]]:
-        """Cluster face encodings and assign group names."""
-        if not encodings:
-            return {}
-            
-        # Perform clustering
-        clustering = DBSCAN(
-            eps=CLUSTERING_EPS,
-            min_samples=CLUSTERING_MIN_SAMPLES,
-            metric=CLUSTERING_METRIC
-        ).fit(encodings)
-        
-        # Group encodings by cluster
-        clusters = {}
-        for label, encoding in zip(clustering.labels_, encodings):
-            if label == -1:
-                group_name = f"Group_Single_{len(clusters)}"
-            else:
-                group_name = f"Group_{label}"
-            
-            if group_name not in clusters:
-                clusters[group_name] = []
-            clusters[group_name].append(encoding)
+    def apply_changes(self,
+                      encodings: List[np.ndarray],
+                      names: List[str],
+                      removed_names: Optional[List[str]] = None):
+        """
+        Update face clusters incrementally.
         
-        return clusters
+        Args:
+            encodings: New or changed face encodings
+            names: Name of each encoding
+            removed_names: Names of faces that were deleted
+        """
+        if not len(self.clusterer) and not removed_names:
+            # Nothing to update yet, so cluster the whole batch at once
+            self.clusterer.fit(names, encodings)
+        else:
+            for name in removed_names or []:
+                self.clusterer.remove(name)
+            for name, encoding in zip(names, encodings):
+                self.clusterer.add(name, encoding)
+                
+        self._publish_clusters()
+
+    def update_clusters(self, encodings: List[np.ndarray], names: Optional[List[str]] = None):
+        """Re-cluster a full set of face encodings from scratch."""
+        if names is None:
+            names = [str(i) for i in range(len(encodings))]
+        self.clusterer.fit(names, encodings)
+        self._publish_clusters()
+
+    def _publish_clusters(self):
+        """Expose and cache the clusterer's current groups."""
+        # The refit loop and profile updates publish concurrently; the version
+        # tells which snapshot is newer
+        with self.clusterer.lock:
+            version = self.clusterer.version
+            clusters = self.clusterer.groups()
+        self._set_clusters(clusters, version)
 
-    def update_clusters(self, encodings: List[np.ndarray]):
-        """Update face clusters."""
+    def _set_clusters(self,
+                      clusters: Dict[str, List[np.ndarray]],
+                      version: int,
+                      persist: bool = True):
+        """
+        Swap in new groups along with a lookup index built outside the lock.
+        
+        Args:
+            clusters: Encodings by group name
+            version: Clusterer version the groups were taken at; older or
+                equal snapshots than the published one are dropped
+            persist: Whether to cache the groups once they are swapped in
+        """
+        group_index = ClusterIndex(clusters)
         with self._lock:
-            self.clusters = self._cluster_faces(encodings)
-            self.cache_manager.set('face_groups', self.clusters)
+            if self._clusters_version is not None and version <= self._clusters_version:
+                return
+            self.clusters = clusters
+            self._group_index = group_index
+            self._clusters_version = version
+            
+            # Cached under the lock too, so the cache ends up with the newest groups
+            if persist:
+                self.cache_manager.set('face_groups', clusters)
 
     def get_group_name(self, encoding: np.ndarray) -> str:
         """Get the group name for a face encoding."""
+        return self.get_group_names([encoding])[0]
+
+    def get_group_names(self, encodings: List[np.ndarray]) -> List[str]:
+        """Get the group name for each of a batch of face encodings."""
         with self._lock:
-            if not self.clusters:
-                return "Unknown"
-            
-            # Find the closest matching group
-            min_distance = float('inf')
-            best_group = "Unknown"
-            
-            for group_name, group_encodings in self.clusters.items():
-                for group_encoding in group_encodings:
-                    distance = np.linalg.norm(encoding - group_encoding)
-                    if distance < min_distance and distance < 0.6:
-                        min_distance = distance
-                        best_group = group_name
+            group_index = self._group_index
             
-            return best_group
+        # The index is never mutated, so the lookup runs without the lock
+        names = group_index.nearest_groups(np.asarray(encodings), CLUSTERING_MATCH_TOLERANCE)
+        return [name or "Unknown" for name in names]
 
     def _cluster_loop(self):
         """Main clustering loop."""
         while self.is_running.is_set() and not self.stop_event.is_set():
             try:
-                # Load cached clusters
-                cached_clusters = self.cache_manager.get('face_groups')
-                if cached_clusters:
-                    with self._lock:
-                        self.clusters = cached_clusters
+                if not len(self.clusterer):
+                    # Serve cached clusters until the first profile sync
+                    cached_clusters = self.cache_manager.get('face_groups')
+                    if cached_clusters:
+                        # Older than any groups of the clusterer itself
+                        self._set_clusters(cached_clusters, -1, persist=False)
+                elif self.refit_interval and time.monotonic() - self._last_refit >= self.refit_interval:
+                    # Full re-fit to correct any drift in the incremental updates
+                    if self.clusterer.refit():
+                        self._publish_clusters()
+                    self._last_refit = time.monotonic()
                 
                 # Sleep for a while before next check
                 self.stop_event.wait(60.0)  # Check every minute
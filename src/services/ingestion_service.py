@@ -0,0 +1,162 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Collection, Dict, List, Optional
+import numpy as np
+
+from config.models_config import MAX_CONCURRENT_PROCESSES, ENCODING_DIMENSION
+from core.face.encoders.realtime_encoder import RealtimeFaceEncoder
+from models.face_model import FaceLocation
+from utils.image_processor import ImageCheck, check_profile_image, load_image
+
+# Per-worker encoder, created once by the pool initializer so the dlib
+# models are loaded once per process rather than once per task
+_worker_encoder: Optional[RealtimeFaceEncoder] = None
+
+def _init_worker():
+    """Load the recognition models in a fresh worker process."""
+    global _worker_encoder
+    _worker_encoder = RealtimeFaceEncoder()
+
+def _check_image(image_path: str, encode: bool) -> ImageCheck:
+    """Run the cleanup checks and, if asked, encode a kept image's face from the same decode."""
+    image = load_image(image_path)
+    if image is None:
+        return ImageCheck(valid=False)
+        
+    check = check_profile_image(image_path, image)
+    if encode and check.locations:
+        try:
+            check.encoding = _worker_encoder.encode_face(image, check.locations[0])
+        except Exception as e:
+            print(f"Error encoding profile image: {e}")
+    return check
+
+def _encode_into_shared(shm_name: str,
+                        slot: int,
+                        image_path: str,
+                        face_location: Optional[FaceLocation]) -> bool:
+    """Encode one image and write the result into its slot of a shared block."""
+    face_encoding = _worker_encoder.encode_image_file(Path(image_path), face_location)
+    if face_encoding is None:
+        return False
+        
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        out = np.ndarray(
+            (ENCODING_DIMENSION,),
+            dtype=np.float64,
+            buffer=shm.buf,
+            offset=slot * ENCODING_DIMENSION * np.dtype(np.float64).itemsize
+        )
+        out[:] = face_encoding.encoding
+        del out
+    finally:
+        shm.close()
+    return True
+
+class ProfileIngestionService:
+    """Runs profile cleanup checks and encoding across a pool of processes."""
+    
+    def __init__(self, max_workers: int = MAX_CONCURRENT_PROCESSES):
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Start the pool on first use."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker
+                )
+            return self._executor
+            
+    def check_images(self,
+                     image_paths: List[Path],
+                     encode: Collection[str] = ()) -> List[ImageCheck]:
+        """
+        Run the cleanup checks on every image in parallel, keeping input order.
+        
+        Args:
+            image_paths: Images to check
+            encode: File names of images whose face should be encoded too,
+                from the buffer the checks decoded
+        """
+        if not image_paths:
+            return []
+            
+        executor = self._get_executor()
+        chunksize = max(1, len(image_paths) // (self.max_workers * 4))
+        return list(executor.map(
+            _check_image,
+            [str(path) for path in image_paths],
+            [path.name in encode for path in image_paths],
+            chunksize=chunksize
+        ))
+        
+    def encode_images(self,
+                      image_paths: List[Path],
+                      face_locations: Optional[Dict[str, List[FaceLocation]]] = None) -> List[Optional[np.ndarray]]:
+        """
+        Encode images in parallel. Workers write encodings straight into a
+        shared memory block instead of pickling each array back.
+        
+        Args:
+            image_paths: Images to encode
+            face_locations: Optional known locations by file name, so workers skip detection
+            
+        Returns:
+            Encoding per image, or None where no face was found
+        """
+        if not image_paths:
+            return []
+            
+        face_locations = face_locations or {}
+        executor = self._get_executor()
+        shm = shared_memory.SharedMemory(
+            create=True,
+            size=len(image_paths) * ENCODING_DIMENSION * np.dtype(np.float64).itemsize
+        )
+        try:
+            futures = []
+            for slot, path in enumerate(image_paths):
+                locations = face_locations.get(path.name)
+                futures.append(executor.submit(
+                    _encode_into_shared,
+                    shm.name,
+                    slot,
+                    str(path),
+                    locations[0] if locations else None
+                ))
+                
+            found = []
+            for future in futures:
+                try:
+                    found.append(future.result())
+                except Exception as e:
+                    print(f"Error encoding profile image: {e}")
+                    found.append(False)
+                    
+            encodings = np.ndarray(
+                (len(image_paths), ENCODING_DIMENSION),
+                dtype=np.float64,
+                buffer=shm.buf
+            )
+            results = [encodings[slot].copy() if ok else None for slot, ok in enumerate(found)]
+            del encodings
+            return results
+        finally:
+            shm.close()
+            shm.unlink()
+            
+    def stop(self):
+        """Shut down the worker processes."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
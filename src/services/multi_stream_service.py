@@ -0,0 +1,460 @@
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from queue import Queue, Empty
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+from config.models_config import (
+    TRACK_REVERIFY_INTERVAL,
+    KNOWN_FACE_COLOR,
+    UNKNOWN_FACE_COLOR,
+    STREAM_WORKERS,
+    STREAM_POLL_INTERVAL
+)
+from core.face.detectors.realtime_detector import RealtimeFaceDetector
+from core.face.encoders.descriptor_batch import DescriptorBatch
+from core.face.matchers import DEFAULT_MATCHER
+from core.face.trackers.iou_tracker import IoUFaceTracker
+from core.video.latency_controller import DetectionSettings, LatencyController
+from core.video.motion_detector import MotionDetector
+from models.face_model import FaceDatabase, FaceLocation, FaceTrack, FrameOverlay, OverlayBox
+from utils.frame_context import FrameContext
+from utils.frame_ring import FrameRingBuffer
+
+# Per-worker detector, created once by the pool initializer so the dlib
+# models are loaded once per worker rather than once per stream
+_worker_detector: Optional[RealtimeFaceDetector] = None
+
+def _init_worker():
+    """Load the detection and recognition models in a fresh worker process."""
+    global _worker_detector
+    _worker_detector = RealtimeFaceDetector()
+
+def _detect_faces(small_frame: np.ndarray,
+                  regions: Optional[List[Tuple[int, int, int, int]]],
+                  upsample: int) -> List[Tuple[int, int, int, int]]:
+    _worker_detector.upsample = upsample
+    if regions is not None:
+        regions = [FaceLocation.from_tuple(region) for region in regions]
+    return [location.to_tuple() for location in _worker_detector.detect_regions(small_frame, regions)]
+
+def _extract_chips(small_frame: np.ndarray,
+                   locations: List[Tuple[int, int, int, int]]) -> List[np.ndarray]:
+    return _worker_detector.get_face_chips(
+        small_frame,
+        [FaceLocation.from_tuple(location) for location in locations]
+    )
+
+def _encode_chips(chips: List[np.ndarray]) -> List[np.ndarray]:
+    return _worker_detector.encode_face_chips(chips)
+
+@dataclass
+class StreamPolicy:
+    """How a stream shares the workers and which of its frames may be dropped."""
+    weight: float = 1.0  # Share of the workers relative to other streams
+    max_fps: Optional[float] = None  # Frames beyond this rate are skipped
+    max_latency: Optional[float] = None  # Seconds after which a waiting frame is dropped
+
+class _Stream:
+    """Scheduling and tracking state of one stream."""
+    
+    def __init__(self,
+                 stream_id: str,
+                 frame_buffer: FrameRingBuffer,
+                 overlay_buffer: Queue,
+                 policy: StreamPolicy,
+                 virtual_time: float):
+        self.stream_id = stream_id
+        self.frame_buffer = frame_buffer
+        self.overlay_buffer = overlay_buffer
+        self.policy = policy
+        self.tracker = IoUFaceTracker()
+        self.motion_detector = MotionDetector()
+        self.latency_controller = LatencyController()
+        self.tracker.detection_interval = self.latency_controller.settings.interval
+        
+        # Weighted fair queuing: the stream with the least service per unit of weight goes next
+        self.virtual_time = virtual_time
+        self.busy = False
+        self.last_seq = -1
+        self.last_taken = 0.0
+        
+        # Frame and tracks of the job in flight
+        self.frame_seq = -1
+        self.frame_time = 0.0
+        self.frame_size: Optional[Tuple[int, int]] = None  # Full resolution (width, height)
+        self.frame_source: Optional[str] = None
+        self.frame_context = FrameContext()
+        self.small_frame: Optional[FrameContext] = None
+        self.regions: Optional[List[FaceLocation]] = None
+        self.pending: List[FaceTrack] = []
+        self.tracks: List[FaceTrack] = []
+        
+        self.processed = 0
+        self.dropped = 0
+
+class MultiStreamRecognitionService:
+    """
+    Recognizes faces on many video streams in one process.
+    
+    Detection and encoding run on a shared pool of worker processes. A
+    scheduler thread feeds it fairly, weighted per stream. Each stream has
+    at most one frame in flight, and frames that arrive meanwhile are
+    skipped. Tracking stays per stream in this process. Aligned faces from
+    all streams are gathered into batches for the recognition network, and
+    the encodings of a batch are matched in one call against a single
+    shared gallery.
+    """
+    
+    def __init__(self,
+                 stop_event: threading.Event,
+                 max_workers: int = STREAM_WORKERS):
+        self.stop_event = stop_event
+        self.max_workers = max_workers
+        
+        # Shared recognition components
+        self.matcher = DEFAULT_MATCHER()
+        self.face_database = FaceDatabase()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        
+        self._streams: Dict[str, _Stream] = {}
+        self._completed: Queue = Queue()
+        self._in_flight = 0
+        self._batch = DescriptorBatch()
+        self._reverify = threading.Event()
+        
+        # Threading
+        self.process_thread = threading.Thread(target=self._schedule_loop, daemon=True)
+        
+        # State management
+        self.is_running = threading.Event()
+        self._lock = threading.Lock()
+        
+    def start(self):
+        """Start the worker pool and the scheduler."""
+        with self._lock:
+            if self.is_running.is_set():
+                return
+                
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker
+            )
+            self.is_running.set()
+            self.process_thread.start()
+            print(f"Multi-stream recognition service started ({self.max_workers} workers)")
+            
+    def stop(self):
+        """Stop scheduling and shut down the workers."""
+        with self._lock:
+            self.is_running.clear()
+            
+        if self.process_thread.is_alive():
+            self.process_thread.join(timeout=1.0)
+            
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+            print("Multi-stream recognition service stopped")
+            
+    def add_stream(self,
+                   stream_id: str,
+                   frame_buffer: FrameRingBuffer,
+                   overlay_buffer: Queue,
+                   policy: Optional[StreamPolicy] = None):
+        """
+        Start recognizing a stream.
+        
+        Args:
+            stream_id: Unique name of the stream, attached to its overlays
+            frame_buffer: Ring the stream's frames are published to
+            overlay_buffer: Queue receiving a FrameOverlay per processed frame
+            policy: Scheduling and frame-drop policy for the stream
+        """
+        with self._lock:
+            # Join at the current service level so existing streams are not starved
+            virtual_time = min((s.virtual_time for s in self._streams.values()), default=0.0)
+            self._streams[stream_id] = _Stream(
+                stream_id, frame_buffer, overlay_buffer, policy or StreamPolicy(), virtual_time
+            )
+            
+    def remove_stream(self, stream_id: str):
+        """Stop recognizing a stream. Results still in flight are discarded."""
+        with self._lock:
+            self._streams.pop(stream_id, None)
+            
+    def stream_stats(self) -> Dict[str, Tuple[int, int]]:
+        """Get (processed, dropped) frame counts per stream."""
+        with self._lock:
+            return {
+                stream_id: (stream.processed, stream.dropped)
+                for stream_id, stream in self._streams.items()
+            }
+            
+    def detection_settings(self) -> Dict[str, DetectionSettings]:
+        """Get the detection settings each stream's latency controller chose."""
+        with self._lock:
+            return {
+                stream_id: stream.latency_controller.settings
+                for stream_id, stream in self._streams.items()
+            }
+            
+    def update_known_faces(self,
+                           encodings: List[np.ndarray],
+                           names: List[str],
+                           removed_names: Optional[List[str]] = None):
+        """Apply a delta to the shared gallery: add or replace the given faces and drop removed ones."""
+        with self.face_database.lock:
+            for name in removed_names or []:
+                self.face_database.remove_face(name)
+            if names:
+                self.face_database.add_faces(list(names), np.asarray(encodings))
+                
+        # Identities may have changed; the scheduler re-verifies every track
+        self._reverify.set()
+        
+    def _schedule_loop(self):
+        """Hand out frames to the workers and collect their results."""
+        while self.is_running.is_set() and not self.stop_event.is_set():
+            try:
+                timeout = STREAM_POLL_INTERVAL
+                if len(self._batch):
+                    timeout = max(0.0, min(timeout, self._batch.time_left()))
+                self._collect_results(timeout)
+                
+                if self._batch.due():
+                    self._flush_batch()
+                    
+                with self._lock:
+                    streams = list(self._streams.values())
+                    
+                if self._reverify.is_set():
+                    self._reverify.clear()
+                    for stream in streams:
+                        for track in stream.tracker.tracks:
+                            track.frames_since_verified = None
+                            
+                self._schedule(streams)
+                
+            except Exception as e:
+                print(f"Error in multi-stream loop: {e}")
+                continue
+                
+    def _schedule(self, streams: List[_Stream]):
+        """Give idle streams their next frame, least served first."""
+        for stream in sorted((s for s in streams if not s.busy), key=lambda s: s.virtual_time):
+            needs_detection = stream.tracker.needs_detection()
+            if needs_detection and self._in_flight >= self.max_workers:
+                continue
+                
+            frame = self._take_frame(stream)
+            if frame is None:
+                continue
+            stream.frame_seq, stream.small_frame = frame
+            # A frame of another size drops the stream's tracks
+            needs_detection = needs_detection or stream.tracker.needs_detection()
+            
+            # While nothing moves the last results still hold
+            stream.regions = stream.motion_detector.update(stream.small_frame)
+            idle = stream.regions is not None and not stream.regions
+            if idle and not (stream.motion_detector.refresh_due and self._in_flight < self.max_workers):
+                self._publish(stream)
+                continue
+                
+            # Idle frames that get here are a periodic check of the whole frame
+            if idle or needs_detection:
+                stream.busy = True
+                stream.virtual_time += 1.0 / stream.policy.weight
+                regions = None
+                if stream.regions:
+                    regions = [region.to_tuple() for region in stream.regions]
+                self._submit(stream, 'detect', _detect_faces, stream.small_frame.image, regions,
+                             stream.latency_controller.settings.upsample)
+            else:
+                # Following tracks by optical flow is cheap enough to do here
+                stream.tracks = stream.tracker.predict(stream.small_frame)
+                self._publish(stream)
+                
+    def _take_frame(self, stream: _Stream) -> Optional[Tuple[int, FrameContext]]:
+        """Get the stream's newest unseen frame, downscaled, unless its policy drops it."""
+        policy = stream.policy
+        now = time.monotonic()
+        if policy.max_fps and now - stream.last_taken < 1.0 / policy.max_fps:
+            return None
+            
+        view = stream.frame_buffer.get_latest(stream.last_seq, timeout=0)
+        if view is None:
+            return None
+            
+        with view:
+            if stream.last_seq >= 0:
+                stream.dropped += view.seq - stream.last_seq - 1
+            stream.last_seq = view.seq
+            
+            if policy.max_latency and now - view.timestamp > policy.max_latency:
+                stream.dropped += 1
+                return None
+                
+            # The small frame is resized into the stream's own buffers, which
+            # stay untouched until its jobs are done; the ring slot does not
+            scale = stream.latency_controller.settings.scale
+            if scale == 1.0:
+                small_frame = stream.frame_context.load(view.frame.copy())
+            else:
+                small_frame = stream.frame_context.load(view.frame).scaled(scale)
+            stream.frame_time = view.timestamp
+            if stream.frame_size != (view.frame.shape[1], view.frame.shape[0]):
+                # Tracks and background from a frame of another size do not carry over
+                stream.tracker.reset()
+                stream.motion_detector.reset()
+                stream.frame_size = (view.frame.shape[1], view.frame.shape[0])
+            stream.frame_source = view.label
+            
+        stream.last_taken = now
+        return view.seq, small_frame
+        
+    def _submit(self, owner, stage: str, fn, *args):
+        """Run a stage on the worker pool, queueing its result for the scheduler."""
+        self._in_flight += 1
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(lambda f: self._completed.put((owner, stage, f)))
+        
+    def _flush_batch(self):
+        """Encode the gathered face chips of every waiting stream in one worker call."""
+        owners, chips = self._batch.take()
+        self._submit(owners, 'encode', _encode_chips, chips)
+        
+    def _collect_results(self, timeout: float):
+        """Advance every stream whose worker stage finished, matching encodings in one batch."""
+        try:
+            finished = [self._completed.get(timeout=timeout)]
+        except Empty:
+            return
+        while True:
+            try:
+                finished.append(self._completed.get_nowait())
+            except Empty:
+                break
+                
+        with self._lock:
+            active = set(map(id, self._streams.values()))
+            
+        encoded: List[Tuple[_Stream, List[np.ndarray]]] = []
+        for owner, stage, future in finished:
+            self._in_flight -= 1
+            try:
+                result = future.result()
+            except Exception as e:
+                # An encode batch is owned by every stream that contributed to it
+                streams = [stream for stream, _ in owner] if stage == 'encode' else [owner]
+                for stream in streams:
+                    print(f"Error processing stream {stream.stream_id}: {e}")
+                    stream.busy = False
+                    stream.pending = []
+                continue
+                
+            # Results for removed streams are dropped
+            if stage == 'encode':
+                encoded.extend(
+                    (stream, encodings) for stream, encodings in DescriptorBatch.split(owner, result)
+                    if id(stream) in active
+                )
+                continue
+                
+            stream = owner
+            if id(stream) not in active:
+                continue
+            if stage == 'detect':
+                locations = [FaceLocation.from_tuple(location) for location in result]
+                if stream.regions:
+                    # Only changed regions were searched; faces elsewhere stay put
+                    locations += MotionDetector.outside(
+                        [track.location for track in stream.tracker.tracks], stream.regions
+                    )
+                stream.tracks = stream.tracker.update(stream.small_frame, locations)
+                
+                # Only encode tracks that are new or due for re-verification
+                stream.pending = [
+                    track for track in stream.tracks
+                    if track.misses == 0 and track.due_for_verification(TRACK_REVERIFY_INTERVAL)
+                ]
+                if stream.pending:
+                    self._submit(
+                        stream, 'align', _extract_chips, stream.small_frame.image,
+                        [track.location.to_tuple() for track in stream.pending]
+                    )
+                else:
+                    self._finish(stream)
+            else:
+                # Aligned faces wait for the shared batch to fill or time out
+                self._batch.add(stream, result)
+                
+        if encoded:
+            self._identify(encoded)
+            
+    def _identify(self, encoded: List[Tuple[_Stream, List[np.ndarray]]]):
+        """Match the encodings of several streams against the gallery in one call."""
+        encodings = [encoding for _, stream_encodings in encoded for encoding in stream_encodings]
+        with self.face_database.lock:
+            results = self.matcher.batch_match(encodings, self.face_database)
+            
+        start = 0
+        for stream, stream_encodings in encoded:
+            stop = start + len(stream_encodings)
+            for track, encoding, result in zip(stream.pending, stream_encodings, results[start:stop]):
+                track.assign_identity(result, encoding)
+            start = stop
+            self._finish(stream)
+            
+    def _finish(self, stream: _Stream):
+        stream.busy = False
+        stream.pending = []
+        self._publish(stream)
+        
+    def _publish(self, stream: _Stream):
+        """Send the stream's current tracks as an overlay, dropping old ones if it is behind."""
+        height, width = stream.small_frame.shape[:2]
+        overlay = FrameOverlay(
+            frame_seq=stream.frame_seq,
+            frame_size=(width, height),
+            boxes=[
+                OverlayBox(
+                    location=track.location,
+                    label=track.name,
+                    color=UNKNOWN_FACE_COLOR if track.name == "Unknown" else KNOWN_FACE_COLOR
+                )
+                for track in stream.tracks
+            ],
+            stream_id=stream.stream_id,
+            source_size=stream.frame_size,
+            source=stream.frame_source
+        )
+        stream.processed += 1
+        
+        if stream.overlay_buffer.full():
+            try:
+                while stream.overlay_buffer.qsize() > 1:
+                    stream.overlay_buffer.get_nowait()
+            except Empty:
+                pass
+        stream.overlay_buffer.put_nowait(overlay)
+        self._adjust_detection(stream, time.monotonic() - stream.frame_time)
+        
+    def _adjust_detection(self, stream: _Stream, latency: float):
+        """Feed a frame's latency to the stream's controller and apply any new settings."""
+        controller = stream.latency_controller
+        previous = controller.settings
+        if not controller.record(latency):
+            return
+            
+        settings = controller.settings
+        stream.tracker.detection_interval = settings.interval
+        if settings.scale != previous.scale:
+            # Tracks live in small frame coordinates
+            stream.tracker.rescale(settings.scale / previous.scale)
+        print(f"Detection settings for {stream.stream_id}: {controller.describe()}")
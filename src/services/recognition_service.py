@@ -1,21 +1,211 @@
+import threading
+import time
+from queue import Queue, Empty
+import numpy as np
+from typing import List, Optional, Tuple
+
+from config.models_config import (
+    TRACK_REVERIFY_INTERVAL,
+    KNOWN_FACE_COLOR,
+    UNKNOWN_FACE_COLOR
+)
+from core.face.detectors.realtime_detector import RealtimeFaceDetector
+from core.face.matchers import DEFAULT_MATCHER
+from core.face.trackers.iou_tracker import IoUFaceTracker
+from core.video.latency_controller import DetectionSettings, LatencyController
+from core.video.motion_detector import MotionDetector
+from models.face_model import FaceDatabase, FaceTrack, FrameOverlay, OverlayBox
+from utils.frame_context import FrameContext
+from utils.frame_ring import FrameRingBuffer
+
 class RecognitionService:
+    def __init__(self,
+                 frame_buffer: FrameRingBuffer,
+                 overlay_buffer: Queue,
+                 stop_event: threading.Event):
+        self.frame_buffer = frame_buffer
+        self.overlay_buffer = overlay_buffer
+        self.stop_event = stop_event
+        
+        # Recognition components
+        self.detector = RealtimeFaceDetector()
+        self.matcher = DEFAULT_MATCHER()
+        self.tracker = IoUFaceTracker()
+        self.motion_detector = MotionDetector()
+        self.latency_controller = LatencyController()
+        self.face_database = FaceDatabase()
+        self._frame_context = FrameContext()
+        self._source_size: Optional[Tuple[int, int]] = None
+        self._apply_settings(self.latency_controller.settings)
+        
+        # Threading
+        self.process_thread = threading.Thread(target=self._process_loop, daemon=True)
+        
+        # State management
+        self.is_running = threading.Event()
+        self._lock = threading.Lock()
+        
+    def start(self):
+        """Start the recognition service."""
+        with self._lock:
+            if self.is_running.is_set():
+                return
+                
+            self.is_running.set()
+            self.process_thread.start()
+            print("Recognition service started")
+            
+    def stop(self):
+        """Stop the recognition service."""
+        with self._lock:
+            self.is_running.clear()
+            print("Recognition service stopped")
+            
+    def update_known_faces(self,
+                           encodings: List[np.ndarray],
+                           names: List[str],
+                           removed_names: Optional[List[str]] = None):
+        """Apply a delta to the known faces: add or replace the given faces and drop removed ones."""
+        with self.face_database.lock:
+            for name in removed_names or []:
+                self.face_database.remove_face(name)
+            if names:
+                self.face_database.add_faces(list(names), np.asarray(encodings))
+        
+        with self._lock:
+            # Identities may have changed, so verify every track again
+            for track in self.tracker.tracks:
+                track.frames_since_verified = None
+                
+    @property
+    def detection_settings(self) -> DetectionSettings:
+        """Detection settings currently chosen for the latency budget."""
+        return self.latency_controller.settings
+        
+    def _adjust_detection(self, latency: float):
+        """Feed a frame's latency to the controller and apply any new settings."""
+        previous = self.latency_controller.settings
+        if self.latency_controller.record(latency):
+            self._apply_settings(self.latency_controller.settings, previous)
+            print(f"Detection settings: {self.latency_controller.describe()}")
+            
+    def _apply_settings(self,
+                        settings: DetectionSettings,
+                        previous: Optional[DetectionSettings] = None):
+        self.detector.upsample = settings.upsample
+        self.tracker.detection_interval = settings.interval
+        if previous is not None and settings.scale != previous.scale:
+            # Tracks live in small frame coordinates
+            self.tracker.rescale(settings.scale / previous.scale)
+            
+    def _process_frame(self,
+                       frame: np.ndarray,
+                       frame_seq: int,
+                       source: Optional[str] = None) -> FrameOverlay:
+        """Track faces in a frame, identifying new or stale tracks, and describe the overlay."""
+        # Tracks and background from a frame of another size, e.g. the
+        # previous image of a folder, do not carry over
+        source_size = (frame.shape[1], frame.shape[0])
+        if source_size != self._source_size:
+            self.tracker.reset()
+            self.motion_detector.reset()
+            self._source_size = source_size
+            
+        # Scale down frame for faster processing. Detection, encoding, tracking and
+        # motion checks share the colour conversions of the small frame, and its
+        # buffers are reused for the next frame.
+        scale = self.latency_controller.settings.scale
+        small_frame = self._frame_context.load(frame).scaled(scale)
+        
+        # While nothing moves the last results still hold
+        regions = self.motion_detector.update(small_frame)
+        idle = regions is not None and not regions
+        if idle and not self.motion_detector.refresh_due:
+            return self._build_overlay(small_frame, frame_seq, self.tracker.tracks, source_size, source)
+            
+        # Full detection every few frames, once a track is lost, or now and then while idle
+        if idle or self.tracker.needs_detection():
+            # Search only where something changed; faces elsewhere stay put
+            locations = self.detector.detect_regions(small_frame, regions or None)
+            if regions:
+                locations += MotionDetector.outside(
+                    [track.location for track in self.tracker.tracks], regions
+                )
+            tracks = self.tracker.update(small_frame, locations)
+            
+            # Only encode tracks that are new or due for re-verification
+            pending = [
+                track for track in tracks
+                if track.misses == 0 and track.due_for_verification(TRACK_REVERIFY_INTERVAL)
+            ]
+            if pending:
+                self._identify_tracks(small_frame, pending)
+        else:
+            tracks = self.tracker.predict(small_frame)
+            
+        return self._build_overlay(small_frame, frame_seq, tracks, source_size, source)
+        
+    def _identify_tracks(self, small_frame: FrameContext, tracks: List[FaceTrack]):
+        """Encode and match the given tracks, storing the result on each track."""
+        encodings = self.detector.get_encodings(
+            small_frame,
+            [track.location for track in tracks]
+        )
+        
+        with self.face_database.lock:
+            results = self.matcher.batch_match(encodings, self.face_database)
+        
+        for track, encoding, result in zip(tracks, encodings, results):
+            track.assign_identity(result, encoding)
+            
+    def _build_overlay(self,
+                       small_frame: FrameContext,
+                       frame_seq: int,
+                       tracks: List[FaceTrack],
+                       source_size: Optional[Tuple[int, int]] = None,
+                       source: Optional[str] = None) -> FrameOverlay:
+        """
+        Describe boxes and names for the given tracks in small frame coordinates.
+        
+        Args:
+            small_frame: The downscaled frame the tracks live in
+            frame_seq: Sequence number of the frame
+            tracks: Tracks to draw
+            source_size: (width, height) of the full-resolution frame
+            source: Input the frame was read from, if known
+        """
+        boxes = [
+            OverlayBox(
+                location=track.location,
+                label=track.name,
+                color=UNKNOWN_FACE_COLOR if track.name == "Unknown" else KNOWN_FACE_COLOR
+            )
+            for track in tracks
+        ]
+        height, width = small_frame.shape[:2]
+        return FrameOverlay(
+            frame_seq=frame_seq,
+            frame_size=(width, height),
+            boxes=boxes,
+            source_size=source_size,
+            source=source
+        )
+        
     def _process_loop(self):
         """Main processing loop for face recognition."""
+        last_seq = -1
         while self.is_running.is_set() and not self.stop_event.is_set():
             try:
-                # Skip frames if we're falling behind
-                frames_to_skip = self.frame_buffer.qsize() - 1
-                for _ in range(frames_to_skip):
-                    try:
-                        self.frame_buffer.get_nowait()
-                    except Empty:
-                        break
-                
-                # Get latest frame
-                frame = self.frame_buffer.get(timeout=0.1)
-                
-                # Process frame
-                overlay = self._process_frame(frame)
+                # Get the newest frame, skipping any we were too slow for
+                view = self.frame_buffer.get_latest(last_seq, timeout=0.1)
+                if view is None:
+                    continue
+                    
+                # Process frame while it is pinned in the ring
+                with view:
+                    last_seq = view.seq
+                    overlay = self._process_frame(view.frame, view.seq, view.label)
+                self._adjust_detection(time.monotonic() - view.timestamp)
                 
                 # Update overlay, dropping old ones if we're behind
                 if self.overlay_buffer.full():
@@ -27,8 +217,6 @@ class RecognitionService:
                         
                 self.overlay_buffer.put_nowait(overlay)
                 
-            except Empty:
-                continue
             except Exception as e:
                 print(f"Error in recognition loop: {e}")
                 continue
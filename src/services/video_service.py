@@ -1,28 +1,52 @@
 import cv2
 import threading
+import time
 from queue import Queue, Empty
 import numpy as np
 from typing import Optional
 
 from config.general_config import (
-    CAMERA_WIDTH, 
-    CAMERA_HEIGHT, 
-    CAMERA_INDEX,
-    WINDOW_NAME
+    WINDOW_NAME,
+    OVERLAY_MAX_AGE,
+    HEADLESS_DRAIN_TIMEOUT
 )
+from config.models_config import TEXT_COLOR
+from core.video.base_source import BaseFrameSource
+from core.video.base_sink import BaseResultSink
+from core.video.camera_source import CameraFrameSource
+from models.face_model import FrameOverlay
+from utils.frame_ring import FrameRingBuffer
 
 class VideoService:
-    def __init__(self, stop_event: threading.Event):
+    def __init__(self,
+                 stop_event: threading.Event,
+                 source: Optional[BaseFrameSource] = None,
+                 sink: Optional[BaseResultSink] = None):
+        """
+        Args:
+            stop_event: Set to shut the pipeline down
+            source: Where frames come from, the default camera if not given
+            sink: Where results go when running headless; the frames are
+                shown in a window if not given. The sink may be shared by
+                several services, so the caller closes it
+        """
         self.stop_event = stop_event
-        self.capture: Optional[cv2.VideoCapture] = None
+        self.source = source or CameraFrameSource()
+        self.sink = sink
+        self.headless = sink is not None
+        self.source_finished = threading.Event()
         
-        # Increased buffer sizes
-        self.frame_buffer = Queue(maxsize=10)  # Increased from 2
+        # Frames are shared by display and recognition, not consumed
+        self.frame_buffer = FrameRingBuffer()
         self.overlay_buffer = Queue(maxsize=5)  # Increased from 1
+        self.overlay: Optional[FrameOverlay] = None
         
         # Threading
         self.capture_thread = threading.Thread(target=self._capture_loop, daemon=True)
-        self.display_thread = threading.Thread(target=self._display_loop, daemon=True)
+        self.display_thread = threading.Thread(
+            target=self._sink_loop if self.headless else self._display_loop,
+            daemon=True
+        )
         
         # State management
         self.is_running = threading.Event()
@@ -31,67 +55,111 @@ class VideoService:
         # FPS tracking
         self.fps_time = cv2.getTickCount()
         self.fps = 0
-        
-        # Initialize video capture
-        self.capture = cv2.VideoCapture(CAMERA_INDEX)
-        if not self.capture.isOpened():
-            raise RuntimeError("Failed to open camera")
+
+    def start(self):
+        """Start capturing and displaying or recording frames."""
+        with self._lock:
+            if self.is_running.is_set():
+                return
+                
+            self.is_running.set()
+            self.capture_thread.start()
+            self.display_thread.start()
+            print(f"Video service started ({self.source.name})")
+
+    def stop(self):
+        """Stop the video service and release the source."""
+        with self._lock:
+            self.is_running.clear()
             
-        # Set camera properties
-        self.capture.set(cv2.CAP_PROP_FRAME_WIDTH, CAMERA_WIDTH)
-        self.capture.set(cv2.CAP_PROP_FRAME_HEIGHT, CAMERA_HEIGHT)
-        self.capture.set(cv2.CAP_PROP_FPS, 30)  # Request 30 FPS if possible
-        self.capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Minimize camera buffering
+        for thread in (self.capture_thread, self.display_thread):
+            if thread.is_alive() and thread is not threading.current_thread():
+                thread.join(timeout=1.0)
+                
+        self.source.release()
+        print("Video service stopped")
 
     def _capture_loop(self):
         """Continuous capture loop running in its own thread."""
         while self.is_running.is_set() and not self.stop_event.is_set():
-            if self.capture is None or not self.capture.isOpened():
+            # Read straight into a free ring slot, reusing its buffer
+            index, buffer = self.frame_buffer.reserve()
+            ret, frame = self.source.read(buffer)
+            if not ret:
+                self.frame_buffer.cancel(index)
+                if self.source.is_live:
+                    continue
+                self.source_finished.set()
                 break
                 
-            ret, frame = self.capture.read()
-            if not ret:
-                continue
+            seq = self.frame_buffer.commit(index, frame, self.source.frame_label)
             
-            # Keep only latest frame if buffer is full
-            if self.frame_buffer.full():
-                try:
-                    while self.frame_buffer.qsize() > 1:  # Keep clearing until only one old frame remains
-                        self.frame_buffer.get_nowait()
-                except Empty:
-                    pass
-                    
+            # Offline sources wait for recognition instead of skipping frames
+            if not self.source.is_live:
+                while not self.frame_buffer.wait_for_read(seq, timeout=0.1):
+                    if not self.is_running.is_set() or self.stop_event.is_set():
+                        return
+
+    def _sink_loop(self):
+        """Headless loop writing each frame's results to the sink."""
+        last_written = -1
+        idle_since = None
+        
+        while self.is_running.is_set() and not self.stop_event.is_set():
             try:
-                self.frame_buffer.put_nowait(frame)
-            except:
+                overlay = self.overlay_buffer.get(timeout=0.1)
+            except Empty:
+                # Once an offline source runs dry, stop after its last frame is written
+                if self.source_finished.is_set():
+                    idle_since = idle_since or time.monotonic()
+                    if (last_written >= self.frame_buffer.seq
+                            or time.monotonic() - idle_since >= HEADLESS_DRAIN_TIMEOUT):
+                        self.stop_event.set()
+                        break
                 continue
+                
+            try:
+                # Scale to the frame the results belong to; capture may be on the next one
+                self.sink.write(overlay, overlay.source_size)
+                last_written = overlay.frame_seq
+                idle_since = None
+            except Exception as e:
+                print(f"Error writing results: {e}")
 
     def _display_loop(self):
         """Display loop running in its own thread."""
         cv2.namedWindow(WINDOW_NAME)
+        last_seq = -1
+        frame = None
         
         while self.is_running.is_set() and not self.stop_event.is_set():
             try:
                 # Get latest frame
-                frame = self.frame_buffer.get(timeout=0.1)
+                view = self.frame_buffer.get_latest(last_seq, timeout=0.1)
+                if view is None:
+                    continue
+                    
+                # Draw on our own reusable buffer, never on the shared slot
+                with view:
+                    last_seq = view.seq
+                    if frame is None or frame.shape != view.frame.shape:
+                        frame = np.empty_like(view.frame)
+                    np.copyto(frame, view.frame)
                 
                 # Update FPS counter
                 current_time = cv2.getTickCount()
                 self.fps = cv2.getTickFrequency() / (current_time - self.fps_time)
                 self.fps_time = current_time
                 
-                # Apply latest overlay if available
+                # Keep the newest overlay and redraw it until it goes stale
                 try:
-                    # Clear old overlays if multiple are queued
-                    while self.overlay_buffer.qsize() > 1:
-                        self.overlay_buffer.get_nowait()
-                    
-                    if not self.overlay_buffer.empty():
-                        overlay = self.overlay_buffer.get_nowait()
-                        if overlay is not None:
-                            frame = cv2.addWeighted(frame, 1, overlay, 0.5, 0)
+                    while not self.overlay_buffer.empty():
+                        self.overlay = self.overlay_buffer.get_nowait()
                 except Empty:
                     pass
+                    
+                if self.overlay is not None and last_seq - self.overlay.frame_seq <= OVERLAY_MAX_AGE:
+                    self._draw_overlay(frame, self.overlay)
                 
                 # Draw FPS counter
                 cv2.putText(frame, f"FPS: {self.fps:.1f}", (10, 30), 
@@ -105,8 +173,6 @@ class VideoService:
                     self.stop_event.set()
                     break
                     
-            except Queue.Empty:
-                continue
             except Exception as e:
                 print(f"Error in display loop: {e}")
                 continue
@@ -116,7 +182,17 @@ class VideoService:
                 self.stop_event.set()
                 break
 
+    def _draw_overlay(self, frame: np.ndarray, overlay: FrameOverlay):
+        """Draw the overlay's boxes and labels, scaled to the frame."""
+        height, width = frame.shape[:2]
+        for box in overlay.scaled_boxes(width, height):
+            location = box.location
+            cv2.rectangle(frame, (location.left, location.top),
+                         (location.right, location.bottom), box.color, 2)
+            cv2.putText(frame, box.label, (location.left + 6, location.bottom - 6),
+                       cv2.FONT_HERSHEY_DUPLEX, 0.6, TEXT_COLOR, 1)
+
     @property
     def is_active(self) -> bool:
         """Check if the video service is currently active."""
-        return self.is_running.is_set() and self.capture is not None and self.capture.isOpened()
+        return self.is_running.is_set() and not self.source_finished.is_set()
@@ -1,14 +1,20 @@
 import threading
+from functools import partial
+import numpy as np
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
 from config.general_config import PROFILE_DIR, SUPPORTED_IMAGE_EXTENSIONS
 from services.recognition_service import RecognitionService
 from services.clustering_service import ClusteringService
-from core.face.encoders.realtime_encoder import RealtimeFaceEncoder
+from services.ingestion_service import ProfileIngestionService
+from models.face_model import FaceLocation
 from utils.image_processor import cleanup_profile_images
+from utils.encoding_store import EncodingStore
+from utils.gallery_snapshot import GallerySnapshot
+from utils.file_manager import FileManager
 
 class ProfileChangeHandler(FileSystemEventHandler):
     def __init__(self, recognition_service: RecognitionService, clustering_service: ClusteringService):
@@ -16,7 +22,35 @@ class ProfileChangeHandler(FileSystemEventHandler):
         self.clustering_service = clustering_service
         self.processing_lock = threading.Lock()
         self._processing_thread: Optional[threading.Thread] = None
-        self.encoder = RealtimeFaceEncoder()
+        self.ingestion_service = ProfileIngestionService()
+        self.encoding_store = EncodingStore()
+        self.snapshot = GallerySnapshot()
+        self._initial_sync_done = False
+        self._face_locations: Dict[str, List[FaceLocation]] = {}
+        # Encodings made during the checks, with the (mtime_ns, size) of the file they came from
+        self._face_encodings: Dict[str, Tuple[Tuple[int, int], np.ndarray]] = {}
+        # Faces recognition was given from the snapshot before the first sync
+        self._warm_faces: Dict[str, np.ndarray] = {}
+        
+    def warm_start(self) -> int:
+        """
+        Hand recognition the gallery snapshot, then check it against the
+        profile directory in the background.
+        
+        Returns:
+            Number of faces loaded from the snapshot
+        """
+        faces = self.snapshot.load() or {}
+        if faces:
+            self.recognition_service.update_known_faces(list(faces.values()), list(faces.keys()))
+        self._warm_faces = faces
+        
+        image_paths = FileManager.get_image_files(Path(PROFILE_DIR))
+        if self.snapshot.is_current(image_paths):
+            self._schedule(self._use_snapshot)
+        else:
+            self._schedule(self._process_changes)
+        return len(faces)
 
     def on_any_event(self, event):
         """Handle any change in the profile directory."""
@@ -28,41 +62,108 @@ class ProfileChangeHandler(FileSystemEventHandler):
             return
             
         # Debounce multiple rapid changes
+        self._schedule(self._process_changes)
+        
+    def _schedule(self, target) -> None:
+        """Run target in the background unless a pass is already running."""
         with self.processing_lock:
             if self._processing_thread is None or not self._processing_thread.is_alive():
-                self._processing_thread = threading.Thread(target=self._process_changes)
+                self._processing_thread = threading.Thread(target=target)
                 self._processing_thread.start()
+                
+    def _use_snapshot(self):
+        """Finish a warm start from a snapshot that matches the profile directory."""
+        try:
+            faces, self._warm_faces = self._warm_faces, {}
+            # Clustering keeps its encodings, so give it copies instead of the mapped rows
+            self.clustering_service.apply_changes(
+                [np.array(encoding) for encoding in faces.values()],
+                list(faces.keys())
+            )
+            self._initial_sync_done = True
+        except Exception as e:
+            print(f"Error processing profile changes: {e}")
 
     def _process_changes(self):
         """Process changes in profile directory."""
         try:
-            # Run cleanup
-            cleanup_profile_images(PROFILE_DIR)
+            # Run cleanup, keeping its detections so encoding doesn't detect again.
+            # New or modified images are encoded by the checks, from the same decode.
+            changed = self.encoding_store.changed_files(FileManager.get_image_files(Path(PROFILE_DIR)))
+            face_locations, face_encodings = {}, {}
+            cleanup_profile_images(
+                PROFILE_DIR,
+                face_locations=face_locations,
+                check_images=partial(self.ingestion_service.check_images, encode=changed),
+                face_encodings=face_encodings
+            )
+            self._face_locations = face_locations
+            self._face_encodings = {
+                name: (changed[name], encoding) for name, encoding in face_encodings.items()
+            }
             
             # Get all image files in profile directory
-            image_paths = [
-                Path(f) for f in Path(PROFILE_DIR).iterdir()
-                if f.is_file() and f.suffix.lower() in SUPPORTED_IMAGE_EXTENSIONS
-            ]
+            image_paths = FileManager.get_image_files(Path(PROFILE_DIR))
+            
+            # Encode only new or modified images
+            updated, removed = self.encoding_store.refresh(image_paths, self._encode_files)
             
-            # Encode all faces
-            encodings = []
-            names = []
-            for image_path in image_paths:
-                face_encoding = self.encoder.encode_image_file(image_path)
-                if face_encoding is not None:
-                    encodings.append(face_encoding.encoding)
-                    names.append(face_encoding.name)
+            # The first pass hands over everything the store already knows;
+            # recognition only needs what differs from the snapshot it started with
+            first_pass = not self._initial_sync_done
+            recognition_updated = updated
+            if first_pass:
+                updated = self.encoding_store.get_all()
+                warm_faces, self._warm_faces = self._warm_faces, {}
+                recognition_updated = {
+                    name: encoding for name, encoding in updated.items()
+                    if name not in warm_faces
+                    or not np.array_equal(warm_faces[name], encoding.astype(np.float32))
+                }
+                removed = sorted(set(removed) | {name for name in warm_faces if name not in updated})
+                self._initial_sync_done = True
             
-            # Update recognition service
-            if encodings and names:
-                self.recognition_service.update_known_faces(encodings, names)
+            # Update recognition service with the delta
+            if recognition_updated or removed:
+                self.recognition_service.update_known_faces(
+                    list(recognition_updated.values()),
+                    list(recognition_updated.keys()),
+                    removed
+                )
+            if updated or removed:
                 # Also update clustering
-                self.clustering_service.update_clusters(encodings)
+                self.clustering_service.apply_changes(
+                    list(updated.values()),
+                    list(updated.keys()),
+                    removed
+                )
+                
+            # Keep the snapshot in line for the next start
+            if first_pass or updated or removed:
+                self.snapshot.save(self.encoding_store.get_all(), self.encoding_store.get_manifest())
             
         except Exception as e:
             print(f"Error processing profile changes: {e}")
 
+    def _encode_files(self, image_paths: List[Path]) -> List[Optional[np.ndarray]]:
+        """
+        Encode the faces in a batch of profile images, reusing the encodings
+        the checks made. Files changed since then are encoded across the worker pool.
+        """
+        encodings: Dict[Path, Optional[np.ndarray]] = {}
+        for path in image_paths:
+            checked = self._face_encodings.get(path.name)
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if checked and checked[0] == (stat.st_mtime_ns, stat.st_size):
+                encodings[path] = checked[1]
+                
+        missing = [path for path in image_paths if path not in encodings]
+        encodings.update(zip(missing, self.ingestion_service.encode_images(missing, self._face_locations)))
+        return [encodings[path] for path in image_paths]
+
 class ProfileWatcherService:
     def __init__(self, 
                  stop_event: threading.Event,
@@ -87,11 +188,16 @@ class ProfileWatcherService:
             self.is_running.set()
             print("Profile watcher service started")
 
+    def warm_start(self) -> int:
+        """Load the gallery snapshot and reconcile it with the profile directory in the background."""
+        return self.event_handler.warm_start()
+        
     def stop(self):
         """Stop watching the profile directory."""
         with self._lock:
             if self.is_running.is_set():
                 self.observer.stop()
                 self.observer.join()
+                self.event_handler.ingestion_service.stop()
                 self.is_running.clear()
                 print("Profile watcher service stopped")
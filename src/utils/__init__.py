@@ -1,20 +1,39 @@
 from .image_processor import (
+    load_image,
     is_valid_image,
     get_image_hash,
     smart_crop_and_resize,
     assess_image_quality,
-    cleanup_profile_images
+    check_profile_image,
+    cleanup_profile_images,
+    ImageCheck
 )
 
 from .file_manager import FileManager
-from .cache_manager import CacheManager
+from .cache_manager import CacheManager, CacheStats
+from .array_store import ArrayStore
+from .encoding_store import EncodingStore
+from .gallery_snapshot import GallerySnapshot
+from .frame_ring import FrameRingBuffer, FrameView
+from .frame_context import FrameContext, as_frame_context
 
 __all__ = [
+    'load_image',
     'is_valid_image',
     'get_image_hash',
     'smart_crop_and_resize',
     'assess_image_quality',
+    'check_profile_image',
     'cleanup_profile_images',
+    'ImageCheck',
     'FileManager',
-    'CacheManager'
+    'CacheManager',
+    'CacheStats',
+    'ArrayStore',
+    'EncodingStore',
+    'GallerySnapshot',
+    'FrameRingBuffer',
+    'FrameView',
+    'FrameContext',
+    'as_frame_context'
 ]
@@ -0,0 +1,244 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+
+# Bump when the layout of the index or the data files changes
+ARRAY_STORE_VERSION = 1
+
+class ArrayStore:
+    """
+    Columnar on-disk store for encoding matrices.
+    
+    Each key is a raw float32 row matrix plus a small JSON index giving its
+    row count and layout. Reads map the rows with np.memmap, so processes
+    opening the same key share its pages through the OS page cache instead
+    of each holding a private copy. Rows can be appended in place: the index
+    is only replaced once the new rows are on disk, and readers keep seeing
+    the rows their index listed.
+    
+    Two layouts are stored:
+        - a 1-D or 2-D array, read back as a read-only memmap of that shape
+        - a dict of names to lists of encodings (or 2-D arrays), read back as
+          a dict of lists of memmap rows
+    """
+    
+    dtype = np.float32
+    
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        
+    @classmethod
+    def supports(cls, value: Any) -> bool:
+        """
+        Check whether a value is encoding data this store can hold.
+        
+        Only real floating-point data is accepted, since rows are stored as
+        float32; integers and other dtypes are left to pickle, which keeps them exact.
+        """
+        if isinstance(value, np.ndarray):
+            return value.ndim in (1, 2) and value.shape[-1] > 0 and np.issubdtype(value.dtype, np.floating)
+        if not isinstance(value, dict) or not value:
+            return False
+            
+        dimension = None
+        for name, rows in value.items():
+            if not isinstance(name, str) or not isinstance(rows, (list, tuple, np.ndarray)):
+                return False
+            for row in rows:
+                if not isinstance(row, np.ndarray) or row.ndim != 1 or not np.issubdtype(row.dtype, np.floating):
+                    return False
+                if dimension is None:
+                    dimension = row.shape[0]
+                elif row.shape[0] != dimension:
+                    return False
+        return bool(dimension)
+        
+    def write(self, key: str, value: Any, meta: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Replace the data stored under a key.
+        
+        Args:
+            key: Cache key
+            value: Array or dict of encoding lists, see supports()
+            meta: JSON-serializable fields kept in the index alongside the layout
+        """
+        matrix, layout = self._flatten(value)
+        with self._lock:
+            previous = self._read_index(key)
+            generation = previous['generation'] + 1 if previous else 1
+            data_file = self._data_file(key, generation)
+            try:
+                with open(data_file, 'wb') as f:
+                    f.write(matrix.tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._write_index(key, {
+                    'version': ARRAY_STORE_VERSION,
+                    'generation': generation,
+                    'dimension': matrix.shape[1],
+                    'rows': matrix.shape[0],
+                    'meta': meta or {},
+                    **layout
+                })
+            except Exception:
+                if data_file.exists():
+                    data_file.unlink()
+                raise
+                
+            # Mapped readers keep their pages; platforms that refuse are retried on the next write
+            self._remove_data_files(key, keep=generation)
+            
+    def append(self, key: str, value: Any, meta: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Add rows to the data stored under a key without rewriting it.
+        
+        A 2-D array gets its rows appended; a dict extends each named list.
+        A missing key is written as is.
+        
+        Args:
+            key: Cache key
+            value: Rows to add, in the layout the key was written with
+            meta: Replaces the stored meta fields if given
+        """
+        matrix, layout = self._flatten(value)
+        with self._lock:
+            index = self._read_index(key)
+            if index is None:
+                self.write(key, value, meta)
+                return
+            if index['dimension'] != matrix.shape[1] or index['layout'] != layout['layout']:
+                raise ValueError(f"Rows do not match the layout stored under '{key}'")
+            if index['layout'] == 'array' and len(index['shape']) != 2:
+                raise ValueError(f"Cannot append to the 1-D array stored under '{key}'")
+            self._append_rows(key, index, matrix, layout, meta)
+            
+    def read(self, key: str) -> Optional[Tuple[Any, Dict[str, Any]]]:
+        """
+        Map the data stored under a key.
+        
+        Returns:
+            Tuple of (value, meta fields), or None if the key is not stored
+        """
+        index = self._read_index(key)
+        if index is None:
+            return None
+            
+        shape = (index['rows'], index['dimension'])
+        try:
+            if index['rows']:
+                matrix = np.memmap(self._data_file(key, index['generation']), dtype=self.dtype, mode='r', shape=shape)
+            else:
+                matrix = np.empty(shape, dtype=self.dtype)
+        except (OSError, ValueError):
+            return None
+            
+        if index['layout'] == 'array':
+            return matrix.reshape(index['shape']), index['meta']
+            
+        value: Dict[str, List[np.ndarray]] = {}
+        for name, segments in index['segments'].items():
+            rows = value[name] = []
+            for start, count in segments:
+                rows.extend(matrix[start:start + count])
+        return value, index['meta']
+        
+    def delete(self, key: str) -> None:
+        """Remove a key's index and data files."""
+        with self._lock:
+            self._index_file(key).unlink(missing_ok=True)
+            self._remove_data_files(key)
+            
+    def keys(self) -> List[str]:
+        """Keys with an index on disk."""
+        return [path.name[:-len('.index.json')] for path in self.directory.glob('*.index.json')]
+        
+    def _append_rows(self,
+                     key: str,
+                     index: Dict[str, Any],
+                     matrix: np.ndarray,
+                     layout: Dict[str, Any],
+                     meta: Optional[Dict[str, Any]]) -> None:
+        start = index['rows']
+        row_bytes = index['dimension'] * np.dtype(self.dtype).itemsize
+        with open(self._data_file(key, index['generation']), 'r+b') as f:
+            # Drop rows a crashed append left behind the indexed ones
+            f.truncate(start * row_bytes)
+            f.seek(start * row_bytes)
+            f.write(matrix.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+            
+        index['rows'] = start + matrix.shape[0]
+        if index['layout'] == 'array':
+            index['shape'][0] = index['rows']
+        else:
+            for name, segments in layout['segments'].items():
+                index['segments'].setdefault(name, []).extend(
+                    [segment_start + start, count] for segment_start, count in segments
+                )
+        if meta is not None:
+            index['meta'] = meta
+        self._write_index(key, index)
+        
+    def _flatten(self, value: Any) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """Turn a value into one row matrix and the layout to rebuild it."""
+        if not self.supports(value):
+            raise TypeError("ArrayStore only holds numeric arrays and dicts of encoding lists")
+            
+        if isinstance(value, np.ndarray):
+            matrix = np.ascontiguousarray(np.atleast_2d(value), dtype=self.dtype)
+            return matrix, {'layout': 'array', 'shape': list(value.shape)}
+            
+        segments: Dict[str, List[List[int]]] = {}
+        rows: List[np.ndarray] = []
+        for name, encodings in value.items():
+            segments[name] = [[len(rows), len(encodings)]] if len(encodings) else []
+            rows.extend(encodings)
+        matrix = np.ascontiguousarray(rows, dtype=self.dtype)
+        return matrix, {'layout': 'groups', 'segments': segments}
+        
+    def _read_index(self, key: str) -> Optional[Dict[str, Any]]:
+        index_file = self._index_file(key)
+        if not index_file.exists():
+            return None
+        try:
+            with open(index_file, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if index.get('version') != ARRAY_STORE_VERSION:
+            return None
+        return index
+        
+    def _write_index(self, key: str, index: Dict[str, Any]) -> None:
+        """Replace the index atomically, after the rows it lists are on disk."""
+        index_file = self._index_file(key)
+        temp_file = index_file.with_name(index_file.name + '.tmp')
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(index, f)
+            temp_file.replace(index_file)
+        finally:
+            if temp_file.exists():
+                temp_file.unlink()
+                
+    def _remove_data_files(self, key: str, keep: Optional[int] = None) -> None:
+        for path in self.directory.glob(f"{key}.*.f32"):
+            generation = path.name[len(key) + 1:-len('.f32')]
+            if not generation.isdigit() or int(generation) == keep:
+                continue
+            try:
+                path.unlink()
+            except OSError:
+                pass
+                
+    def _index_file(self, key: str) -> Path:
+        return self.directory / f"{key}.index.json"
+        
+    def _data_file(self, key: str, generation: int) -> Path:
+        return self.directory / f"{key}.{generation}.f32"
@@ -1,50 +1,141 @@
 import pickle
+import sys
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
 from pathlib import Path
-from typing import Any, Optional, Dict, List
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 import time
 from datetime import datetime, timedelta
 import threading
+import numpy as np
 
-from config.general_config import CACHE_DIR
+from config.general_config import (
+    CACHE_DIR,
+    CACHE_MEMORY_BUDGET,
+    CACHE_EVICTION_POLICY,
+    CACHE_FLUSH_INTERVAL
+)
 from .file_manager import FileManager
+from .array_store import ArrayStore
+
+@dataclass
+class CacheStats:
+    """Counters describing a CacheManager's memory cache."""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    bytes: int = 0  # Estimated size of the values held in memory
+    entries: int = 0
 
 class CacheManager:
-    """Manages caching of face recognition data."""
+    """
+    Manages caching of face recognition data.
+    
+    Encoding data (numeric arrays, or dicts of encoding lists such as face
+    groups) goes to a memory-mapped ArrayStore; everything else is pickled.
+    Values kept in memory are bounded by a byte budget: once it is exceeded
+    the least recently (LRU) or least often (LFU) used entries are evicted,
+    and are read from disk again on their next get.
+    
+    In write-behind mode set() only queues the disk write: a background
+    thread writes the latest value of each queued key every flush_interval
+    seconds, so callers never wait on disk I/O. Values must not be mutated
+    after set() then. close() writes whatever is still queued.
+    """
     
-    def __init__(self, cache_dir: Path = CACHE_DIR):
+    def __init__(self,
+                 cache_dir: Path = CACHE_DIR,
+                 memory_budget: int = CACHE_MEMORY_BUDGET,
+                 policy: str = CACHE_EVICTION_POLICY,
+                 write_behind: bool = False,
+                 flush_interval: float = CACHE_FLUSH_INTERVAL):
+        if policy not in ('lru', 'lfu'):
+            raise ValueError(f"Unknown eviction policy: {policy}")
+            
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.memory_budget = memory_budget
+        self.policy = policy
         self._cache_lock = threading.Lock()
-        self._memory_cache: Dict[str, Dict] = {}
+        # Least recently used first
+        self._memory_cache: Dict[str, Dict] = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._uses: Dict[str, int] = {}
+        self._stats = CacheStats()
+        # key -> [lock, callers holding or waiting for it]
+        self._key_locks: Dict[str, List] = {}
+        self.array_store = ArrayStore(self.cache_dir)
+        
+        # Write-behind state: entries set but not yet on disk, latest per key
+        self.write_behind = write_behind
+        self.flush_interval = flush_interval
+        self._pending: Dict[str, Dict] = {}
+        self._closed = threading.Event()
+        self._writer_thread: Optional[threading.Thread] = None
         
     def get(self, key: str, default: Any = None) -> Any:
         """
         Get value from cache. Checks memory first, then disk.
+        Concurrent misses on the same key read the disk once.
+        """
+        found, value = self._get_from_memory(key)
+        if not found:
+            with self._key_lock(key):
+                found, value = self._get_from_disk(key)
+        return value if found else default
+        
+    def get_or_compute(self, key: str, compute: Callable[[], Any], ttl: Optional[int] = None) -> Any:
+        """
+        Get a value, computing and caching it on a miss.
+        
+        Concurrent callers missing the same key run compute once; the
+        others wait for its result. If compute raises, the error goes to
+        its caller and the next waiter tries again.
+        
+        Args:
+            key: Cache key
+            compute: Function producing the value
+            ttl: TTL (in seconds) for a computed value
+            
+        Returns:
+            The cached or computed value
         """
-        # Check memory cache first
+        found, value = self._get_from_memory(key)
+        if found:
+            return value
+            
+        with self._key_lock(key):
+            found, value = self._get_from_disk(key)
+            if not found:
+                value = compute()
+                self.set(key, value, ttl)
+        return value
+        
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """
+        Get several values, checking memory for all of them under one lock.
+        
+        Returns:
+            Values by key, for the keys found
+        """
+        values = {}
+        missing = []
         with self._cache_lock:
-            if key in self._memory_cache:
-                cache_data = self._memory_cache[key]
-                if not self._is_expired(cache_data):
-                    return cache_data['value']
+            for key in keys:
+                found, value = self._get_from_memory(key, locked=True)
+                if found:
+                    values[key] = value
                 else:
-                    del self._memory_cache[key]
+                    missing.append(key)
+                    
+        for key in missing:
+            with self._key_lock(key):
+                found, value = self._get_from_disk(key)
+            if found:
+                values[key] = value
+        return values
         
-        # Check disk cache
-        cache_file = self.cache_dir / f"{key}.cache"
-        if cache_file.exists():
-            try:
-                data = FileManager.load_pickle(cache_file)
-                if data and not self._is_expired(data):
-                    # Update memory cache
-                    with self._cache_lock:
-                        self._memory_cache[key] = data
-                    return data['value']
-            except Exception:
-                pass
-        
-        return default
-    
     def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
         """
         Set value in cache with optional TTL (in seconds).
@@ -55,28 +146,69 @@ class CacheManager:
             'ttl': ttl
         }
         
-        # Update memory cache
-        with self._cache_lock:
-            self._memory_cache[key] = cache_data
+        if self.write_behind:
+            # Queue the write, replacing any queued for the same key. Checked
+            # under the lock close() sets the flag with, so nothing is queued
+            # after its final flush.
+            with self._cache_lock:
+                if not self._closed.is_set():
+                    self._remember(key, cache_data)
+                    self._pending[key] = cache_data
+                    if self._writer_thread is None:
+                        self._writer_thread = threading.Thread(target=self._write_loop, daemon=True)
+                        self._writer_thread.start()
+                    return
+                    
+        with self._key_lock(key):
+            # Update memory cache
+            with self._cache_lock:
+                self._remember(key, cache_data)
+                self._pending.pop(key, None)
+                
+            self._write(key, cache_data)
+            
+    def set_many(self, items: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        """Set several values with the same optional TTL (in seconds)."""
+        for key, value in items.items():
+            self.set(key, value, ttl)
+            
+    def append(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """
+        Append encoding rows to an array entry without rewriting it.
         
-        # Update disk cache
-        cache_file = self.cache_dir / f"{key}.cache"
-        FileManager.save_pickle(cache_data, cache_file)
+        Args:
+            key: Cache key
+            value: 2-D array of rows, or dict of encoding lists extending the stored lists
+            ttl: New TTL (in seconds) for the whole entry
+        """
+        cache_data = {'timestamp': datetime.now(), 'ttl': ttl}
+        with self._key_lock(key):
+            # Rows are appended to what is on disk, so a queued write goes first
+            self._flush_key(key)
+            self.array_store.append(key, value, self._array_meta(cache_data))
+            (self.cache_dir / f"{key}.cache").unlink(missing_ok=True)
+            
+            # The next get maps the grown entry
+            with self._cache_lock:
+                self._forget(key)
     
     def delete(self, key: str) -> None:
         """
         Delete item from cache.
         """
-        # Remove from memory cache
-        with self._cache_lock:
-            self._memory_cache.pop(key, None)
-        
-        # Remove from disk cache
-        cache_file = self.cache_dir / f"{key}.cache"
-        try:
-            cache_file.unlink(missing_ok=True)
-        except Exception:
-            pass
+        with self._key_lock(key):
+            # Remove from memory cache
+            with self._cache_lock:
+                self._forget(key)
+                self._pending.pop(key, None)
+                
+            # Remove from disk cache
+            cache_file = self.cache_dir / f"{key}.cache"
+            try:
+                cache_file.unlink(missing_ok=True)
+                self.array_store.delete(key)
+            except Exception:
+                pass
     
     def clear(self) -> None:
         """
@@ -85,11 +217,17 @@ class CacheManager:
         # Clear memory cache
         with self._cache_lock:
             self._memory_cache.clear()
+            self._pending.clear()
+            self._sizes.clear()
+            self._uses.clear()
+            self._stats.bytes = 0
         
         # Clear disk cache
         try:
             for cache_file in self.cache_dir.glob("*.cache"):
                 cache_file.unlink()
+            for key in self.array_store.keys():
+                self.array_store.delete(key)
         except Exception:
             pass
     
@@ -104,7 +242,7 @@ class CacheManager:
                 if self._is_expired(data)
             ]
             for key in expired_keys:
-                del self._memory_cache[key]
+                self._forget(key)
         
         # Clean disk cache
         try:
@@ -116,8 +254,229 @@ class CacheManager:
                 except Exception:
                     # Remove corrupt cache files
                     cache_file.unlink()
+            for key in self.array_store.keys():
+                data = self._load_arrays(key)
+                if data is None or self._is_expired(data):
+                    self.array_store.delete(key)
         except Exception:
             pass
+            
+    def flush(self) -> None:
+        """Write every queued entry to disk now."""
+        with self._cache_lock:
+            keys = list(self._pending)
+        for key in keys:
+            with self._key_lock(key):
+                self._flush_key(key)
+                
+    def close(self) -> None:
+        """
+        Stop the background writer and write what it had queued. Later sets
+        write directly; entries whose write still fails stay in memory only.
+        """
+        with self._cache_lock:
+            self._closed.set()
+            writer_thread = self._writer_thread
+        if writer_thread is not None:
+            writer_thread.join()
+        self.flush()
+        
+    def _write_loop(self) -> None:
+        """Write queued entries every flush interval until closed."""
+        while not self._closed.wait(self.flush_interval):
+            self.flush()
+            
+    def _flush_key(self, key: str) -> None:
+        """Write a key's queued entry, if any. Call with the key's lock held."""
+        with self._cache_lock:
+            cache_data = self._pending.get(key)
+        if cache_data is None:
+            return
+            
+        try:
+            self._write(key, cache_data)
+        except Exception as e:
+            # Stay queued; the next flush tries again
+            print(f"Error writing cache entry {key}: {e}")
+            return
+            
+        # Keep a newer entry queued meanwhile; it is written on the next flush
+        with self._cache_lock:
+            if self._pending.get(key) is cache_data:
+                del self._pending[key]
+                
+    def _get_from_memory(self, key: str, locked: bool = False) -> Tuple[bool, Any]:
+        """Look a key up in memory, counting a hit. Returns (found, value)."""
+        if not locked:
+            with self._cache_lock:
+                return self._get_from_memory(key, locked=True)
+                
+        cache_data = self._memory_cache.get(key)
+        if cache_data is None:
+            return False, None
+        if self._is_expired(cache_data):
+            self._forget(key)
+            return False, None
+        self._touch(key)
+        self._stats.hits += 1
+        return True, cache_data['value']
+        
+    def _get_from_disk(self, key: str) -> Tuple[bool, Any]:
+        """
+        Look a key up in memory, then on disk, counting the hit or miss.
+        Call with the key's lock held. Returns (found, value).
+        """
+        # Another caller may have loaded the key while this one waited for the lock
+        found, value = self._get_from_memory(key)
+        if found:
+            return found, value
+            
+        # An entry evicted from memory may still be waiting for its write
+        with self._cache_lock:
+            data = self._pending.get(key)
+            
+        # Check the array store, which maps the rows instead of copying them
+        if data is None:
+            data = self._load_arrays(key)
+            
+        # Check disk cache
+        cache_file = self.cache_dir / f"{key}.cache"
+        if data is None and cache_file.exists():
+            try:
+                data = FileManager.load_pickle(cache_file)
+            except Exception:
+                pass
+                
+        with self._cache_lock:
+            if data and not self._is_expired(data):
+                # Update memory cache
+                self._remember(key, data)
+                self._stats.hits += 1
+                return True, data['value']
+            self._stats.misses += 1
+            return False, None
+            
+    def _write(self, key: str, cache_data: Dict) -> None:
+        """Write an entry to disk, dropping any copy kept in the other format. Call with the key's lock held."""
+        cache_file = self.cache_dir / f"{key}.cache"
+        if ArrayStore.supports(cache_data['value']):
+            self.array_store.write(key, cache_data['value'], self._array_meta(cache_data))
+            cache_file.unlink(missing_ok=True)
+        else:
+            FileManager.save_pickle(cache_data, cache_file)
+            self.array_store.delete(key)
+            
+    @contextmanager
+    def _key_lock(self, key: str) -> Iterator[None]:
+        """Hold the lock for one key; locks are dropped once no caller needs them."""
+        with self._cache_lock:
+            entry = self._key_locks.get(key)
+            if entry is None:
+                entry = self._key_locks[key] = [threading.RLock(), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._cache_lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._key_locks[key]
+                    
+    def stats(self) -> CacheStats:
+        """Get a copy of the memory cache counters."""
+        with self._cache_lock:
+            return replace(self._stats, entries=len(self._memory_cache))
+            
+    def _remember(self, key: str, cache_data: Dict) -> None:
+        """Keep an entry in memory, evicting others to stay within the budget. Call with the lock held."""
+        uses = self._uses.get(key, 0)
+        self._forget(key)
+        size = self._estimate_size(cache_data['value'])
+        if size > self.memory_budget:
+            # Too large to keep; gets read it from disk
+            return
+            
+        self._memory_cache[key] = cache_data
+        self._sizes[key] = size
+        self._uses[key] = uses + 1
+        self._stats.bytes += size
+        while self._stats.bytes > self.memory_budget:
+            self._evict(keep=key)
+            
+    def _touch(self, key: str) -> None:
+        """Record a use of an entry held in memory. Call with the lock held."""
+        self._memory_cache.move_to_end(key)
+        self._uses[key] += 1
+        
+    def _forget(self, key: str) -> None:
+        """Drop an entry from memory, if held. Call with the lock held."""
+        if self._memory_cache.pop(key, None) is not None:
+            self._stats.bytes -= self._sizes.pop(key)
+            del self._uses[key]
+            
+    def _evict(self, keep: str) -> None:
+        """Drop the entry the policy values least, other than keep."""
+        candidates = (name for name in self._memory_cache if name != keep)
+        if self.policy == 'lfu':
+            # Ties go to the least recently used, which come first
+            victim = min(candidates, key=self._uses.__getitem__)
+        else:
+            victim = next(candidates)
+        self._forget(victim)
+        self._stats.evictions += 1
+        
+    @staticmethod
+    def _estimate_size(value: Any) -> int:
+        """
+        Approximate the memory a value holds.
+        
+        Arrays count their nbytes, except memory-mapped ones, whose pages
+        belong to the OS page cache. Containers and objects are walked.
+        """
+        size = 0
+        pending = [value]
+        seen = set()
+        while pending:
+            item = pending.pop()
+            if id(item) in seen:
+                continue
+            seen.add(id(item))
+            
+            if isinstance(item, np.memmap):
+                size += sys.getsizeof(item)
+            elif isinstance(item, np.ndarray):
+                size += item.nbytes
+            elif isinstance(item, dict):
+                size += sys.getsizeof(item)
+                pending.extend(item.keys())
+                pending.extend(item.values())
+            elif isinstance(item, (list, tuple, set, frozenset)):
+                size += sys.getsizeof(item)
+                pending.extend(item)
+            elif hasattr(item, '__dict__'):
+                size += sys.getsizeof(item)
+                pending.append(vars(item))
+            else:
+                size += sys.getsizeof(item)
+        return size
+            
+    def _load_arrays(self, key: str) -> Optional[Dict]:
+        """Read an array store entry in the same shape as pickled cache data."""
+        stored = self.array_store.read(key)
+        if stored is None:
+            return None
+        value, meta = stored
+        return {
+            'value': value,
+            'timestamp': datetime.fromisoformat(meta['timestamp']),
+            'ttl': meta.get('ttl')
+        }
+        
+    @staticmethod
+    def _array_meta(cache_data: Dict) -> Dict:
+        """Cache data fields kept in an array store index."""
+        return {'timestamp': cache_data['timestamp'].isoformat(), 'ttl': cache_data['ttl']}
     
     @staticmethod
     def _is_expired(cache_data: Dict) -> bool:
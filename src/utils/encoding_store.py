@@ -0,0 +1,181 @@
+import hashlib
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import numpy as np
+
+from config.general_config import ENCODING_STORE_FILE
+from config.models_config import (
+    RECOGNITION_MODEL,
+    NUM_JITTERS,
+    FRAME_SCALE_FACTOR
+)
+from .file_manager import FileManager
+
+def encoding_settings_key() -> str:
+    """Describe the model settings that affect an encoding."""
+    return f"{RECOGNITION_MODEL}|{NUM_JITTERS}|{FRAME_SCALE_FACTOR}"
+
+class EncodingStore:
+    """
+    On-disk cache of per-image face encodings.
+    
+    Encodings are keyed by a hash of the file contents and the model
+    settings, so only new or modified images are encoded again. Each file
+    is also remembered by mtime and size so unchanged files are not re-read.
+    """
+    
+    def __init__(self,
+                 store_file: Path = ENCODING_STORE_FILE,
+                 settings: Optional[str] = None):
+        self.store_file = Path(store_file)
+        self.settings = settings or encoding_settings_key()
+        self._lock = threading.Lock()
+        
+        data = FileManager.load_pickle(self.store_file, default={}) or {}
+        if data.get('settings') != self.settings:
+            data = {}
+            
+        # filename -> (mtime_ns, size, content key)
+        self._files: Dict[str, Tuple[int, int, str]] = data.get('files', {})
+        # content key -> encoding, or None if no face was found
+        self._encodings: Dict[str, Optional[np.ndarray]] = data.get('encodings', {})
+        
+    def refresh(self,
+                image_paths: List[Path],
+                encode: Callable[[List[Path]], List[Optional[np.ndarray]]]) -> Tuple[Dict[str, np.ndarray], List[str]]:
+        """
+        Bring the store in line with the given images, encoding only what changed.
+        
+        Args:
+            image_paths: All images currently in the profile directory
+            encode: Function encoding a batch of images, giving None where no face was found
+            
+        Returns:
+            Tuple of (names with new or changed encodings, names that were removed)
+        """
+        with self._lock:
+            before = self._by_name()
+            changed_files: List[Path] = []
+            pending: Dict[str, Path] = {}
+            seen = set()
+            dirty = False
+            
+            for path in image_paths:
+                seen.add(path.name)
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                    
+                entry = self._files.get(path.name)
+                if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                    continue
+                    
+                key = self._content_key(path)
+                if key is None:
+                    continue
+                self._files[path.name] = (stat.st_mtime_ns, stat.st_size, key)
+                dirty = True
+                
+                # Touched but identical content
+                if entry and entry[2] == key:
+                    continue
+                    
+                changed_files.append(path)
+                if key not in self._encodings:
+                    pending.setdefault(key, path)
+                    
+            # Encode everything new in one batch
+            if pending:
+                encodings = encode(list(pending.values()))
+                self._encodings.update(zip(pending.keys(), encodings))
+                
+            # Drop files that no longer exist
+            missing = [name for name in self._files if name not in seen]
+            for filename in missing:
+                del self._files[filename]
+                
+            # A name is given by every file with that stem, so report names
+            # as they stand now: deleting a.jpg keeps 'a' while a.png has a face
+            touched = {path.stem for path in changed_files} | {Path(filename).stem for filename in missing}
+            after = self._by_name()
+            updated = {name: after[name] for name in touched if name in after}
+            removed = sorted(name for name in touched if name in before and name not in after)
+            self._warn_shared_names(touched)
+            
+            if dirty or missing:
+                self._prune()
+                self._save()
+                
+            return updated, removed
+            
+    def changed_files(self, image_paths: List[Path]) -> Dict[str, Tuple[int, int]]:
+        """Get the (mtime_ns, size) of the given files the store has not seen as they are, by file name."""
+        changed = {}
+        with self._lock:
+            for path in image_paths:
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entry = self._files.get(path.name)
+                if not entry or entry[:2] != (stat.st_mtime_ns, stat.st_size):
+                    changed[path.name] = (stat.st_mtime_ns, stat.st_size)
+        return changed
+        
+    def get_all(self) -> Dict[str, np.ndarray]:
+        """Get every stored encoding by name."""
+        with self._lock:
+            return self._by_name()
+            
+    def get_manifest(self) -> Dict[str, Tuple[int, int]]:
+        """Get the (mtime_ns, size) of every known file by file name."""
+        with self._lock:
+            return {filename: entry[:2] for filename, entry in self._files.items()}
+            
+    def _by_name(self) -> Dict[str, np.ndarray]:
+        """Encodings by name; of files sharing a stem, the first by file name with a face wins."""
+        names: Dict[str, np.ndarray] = {}
+        for filename in sorted(self._files):
+            encoding = self._encodings.get(self._files[filename][2])
+            if encoding is not None:
+                names.setdefault(Path(filename).stem, encoding)
+        return names
+        
+    def _warn_shared_names(self, names: Set[str]) -> None:
+        """Point out profile images that give the same name."""
+        files: Dict[str, List[str]] = {}
+        for filename in sorted(self._files):
+            stem = Path(filename).stem
+            if stem in names:
+                files.setdefault(stem, []).append(filename)
+        for name, filenames in files.items():
+            if len(filenames) > 1:
+                print(f"Profile images {', '.join(filenames)} share the name '{name}'; only one of them is used")
+                
+    def _content_key(self, path: Path) -> Optional[str]:
+        """Hash the file contents together with the model settings."""
+        digest = hashlib.sha1(self.settings.encode())
+        try:
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(chunk)
+        except OSError:
+            return None
+        return digest.hexdigest()
+        
+    def _prune(self) -> None:
+        """Forget encodings no file refers to any more."""
+        live = {entry[2] for entry in self._files.values()}
+        for key in [key for key in self._encodings if key not in live]:
+            del self._encodings[key]
+            
+    def _save(self) -> None:
+        try:
+            FileManager.save_pickle(
+                {'settings': self.settings, 'files': self._files, 'encodings': self._encodings},
+                self.store_file
+            )
+        except Exception as e:
+            print(f"Error saving encoding store: {e}")
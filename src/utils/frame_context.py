@@ -0,0 +1,105 @@
+import cv2
+import numpy as np
+from typing import Dict, Optional, Tuple, Union
+
+class FrameContext:
+    """
+    Derived views of one frame, each computed at most once.
+    
+    Detectors, encoders and trackers that receive a context instead of a
+    bare frame share its RGB, grayscale and downscaled views instead of
+    converting the frame again. A context can be loaded with the next frame
+    to reuse its buffers; views of the previous frame are overwritten then,
+    so consumers that keep a view across frames must copy it.
+    """
+    
+    def __init__(self, image: Optional[np.ndarray] = None):
+        self.image: Optional[np.ndarray] = None  # BGR frame
+        self._views: Dict[str, np.ndarray] = {}
+        self._buffers: Dict[str, np.ndarray] = {}
+        self._scaled: Dict[float, 'FrameContext'] = {}
+        self._scaled_valid = set()
+        if image is not None:
+            self.load(image)
+            
+    def load(self, image: np.ndarray) -> 'FrameContext':
+        """Point the context at a new frame, dropping the views of the previous one."""
+        self.image = image
+        self._views.clear()
+        self._scaled_valid.clear()
+        return self
+        
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.image.shape
+        
+    @property
+    def rgb(self) -> np.ndarray:
+        """The frame in RGB order, as face_recognition and dlib expect it."""
+        return self._converted('rgb', cv2.COLOR_BGR2RGB, 3)
+        
+    @property
+    def gray(self) -> np.ndarray:
+        """The frame in grayscale."""
+        if self.image.ndim == 2:
+            return self.image
+        return self._converted('gray', cv2.COLOR_BGR2GRAY, None)
+        
+    def scaled(self, scale: float) -> 'FrameContext':
+        """
+        Get the context of the frame resized by the given factor.
+        
+        Args:
+            scale: Resize factor, as for cv2.resize with fx and fy
+            
+        Returns:
+            A context that shares this one's lifetime; it is refreshed
+            when this context is loaded with a new frame
+        """
+        if scale == 1.0:
+            return self
+            
+        context = self._scaled.get(scale)
+        if context is None:
+            context = self._scaled[scale] = FrameContext()
+        if scale not in self._scaled_valid:
+            height, width = self.image.shape[:2]
+            size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            buffer = context._buffer('image', (size[1], size[0]) + self.image.shape[2:], self.image.dtype)
+            context.load(cv2.resize(self.image, size, dst=buffer))
+            self._scaled_valid.add(scale)
+        return context
+        
+    def crop(self, top: int, right: int, bottom: int, left: int) -> 'FrameContext':
+        """
+        Get a context for a region of the frame, sharing the views computed so far.
+        
+        Shared views are copied out contiguously: dlib misreads strided
+        arrays and silently misses faces in them.
+        """
+        context = FrameContext(self.image[top:bottom, left:right])
+        for name, view in self._views.items():
+            context._views[name] = np.ascontiguousarray(view[top:bottom, left:right])
+        return context
+        
+    def _converted(self, name: str, code: int, channels: Optional[int]) -> np.ndarray:
+        view = self._views.get(name)
+        if view is None:
+            height, width = self.image.shape[:2]
+            shape = (height, width) if channels is None else (height, width, channels)
+            view = cv2.cvtColor(self.image, code, dst=self._buffer(name, shape, self.image.dtype))
+            self._views[name] = view
+        return view
+        
+    def _buffer(self, name: str, shape: Tuple[int, ...], dtype) -> np.ndarray:
+        """Reuse the buffer kept under the given name if it still fits."""
+        buffer = self._buffers.get(name)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = self._buffers[name] = np.empty(shape, dtype=dtype)
+        return buffer
+
+def as_frame_context(image: Union[np.ndarray, FrameContext]) -> FrameContext:
+    """Wrap a bare frame in a context, passing existing contexts through."""
+    if isinstance(image, FrameContext):
+        return image
+    return FrameContext(image)
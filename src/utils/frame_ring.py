@@ -0,0 +1,170 @@
+import threading
+import time
+import numpy as np
+from typing import List, Optional, Tuple
+
+from config.general_config import FRAME_RING_SLOTS
+
+class _FrameSlot:
+    """One reusable frame buffer in the ring."""
+    
+    def __init__(self):
+        self.frame: Optional[np.ndarray] = None
+        self.seq = -1
+        self.timestamp = 0.0
+        self.label: Optional[str] = None
+        self.readers = 0
+        self.writing = False
+
+class FrameView:
+    """
+    A pinned, read-only view of a frame in the ring.
+    
+    The slot is not reused until the view is released, so consumers must
+    release it (or use it as a context manager) once they are done.
+    """
+    
+    def __init__(self, ring: 'FrameRingBuffer', slot: _FrameSlot):
+        self._ring = ring
+        self._slot = slot
+        self.seq = slot.seq
+        self.timestamp = slot.timestamp  # time.monotonic() when published
+        self.label = slot.label  # Input the frame came from, if the producer named it
+        self.frame = slot.frame
+        
+    def release(self) -> None:
+        if self._slot is not None:
+            self._ring._release(self._slot)
+            self._slot = None
+            self.frame = None
+            
+    def __enter__(self) -> 'FrameView':
+        return self
+        
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+class FrameRingBuffer:
+    """
+    Preallocated frame slots shared by one producer and any number of consumers.
+    
+    Each published frame gets an increasing sequence number. Consumers ask
+    for the newest frame after the last one they saw, so they never take
+    frames away from each other and simply skip frames they were too slow
+    for. Slots are written in place and reused once no consumer holds them.
+    """
+    
+    def __init__(self, slots: int = FRAME_RING_SLOTS):
+        self._slots: List[_FrameSlot] = [_FrameSlot() for _ in range(max(2, slots))]
+        self._latest: Optional[_FrameSlot] = None
+        self._seq = -1
+        self._read_seq = -1
+        self._cond = threading.Condition()
+        
+    def reserve(self) -> Tuple[int, Optional[np.ndarray]]:
+        """
+        Claim a free slot for writing the next frame.
+        
+        Returns:
+            Tuple of (slot number, buffer to write into). The buffer is None
+            until the slot has held a frame, and must be passed to commit()
+            or cancel() afterwards.
+        """
+        with self._cond:
+            free = [
+                i for i, slot in enumerate(self._slots)
+                if slot.readers == 0 and not slot.writing and slot is not self._latest
+            ]
+            if free:
+                index = min(free, key=lambda i: self._slots[i].seq)
+            else:
+                # Every slot is pinned; grow rather than block the producer
+                self._slots.append(_FrameSlot())
+                index = len(self._slots) - 1
+                
+            slot = self._slots[index]
+            slot.writing = True
+            return index, slot.frame
+            
+    def commit(self, index: int, frame: np.ndarray, label: Optional[str] = None) -> int:
+        """
+        Publish a reserved slot. If the frame was written into the reserved
+        buffer no copy is made; otherwise the slot adopts the new array.
+        
+        Args:
+            index: Slot number from reserve()
+            frame: The frame, usually the reserved buffer
+            label: Optional name of the input the frame came from
+            
+        Returns:
+            Sequence number of the published frame
+        """
+        with self._cond:
+            slot = self._slots[index]
+            slot.frame = frame
+            slot.writing = False
+            self._seq += 1
+            slot.seq = self._seq
+            slot.timestamp = time.monotonic()
+            slot.label = label
+            self._latest = slot
+            self._cond.notify_all()
+            return slot.seq
+            
+    def cancel(self, index: int) -> None:
+        """Give back a reserved slot without publishing it."""
+        with self._cond:
+            self._slots[index].writing = False
+            
+    def put(self, frame: np.ndarray, label: Optional[str] = None) -> int:
+        """Copy a frame into the next free slot and publish it."""
+        index, buffer = self.reserve()
+        if buffer is not None and buffer.shape == frame.shape and buffer.dtype == frame.dtype:
+            np.copyto(buffer, frame)
+            frame = buffer
+        else:
+            frame = frame.copy()
+        return self.commit(index, frame, label)
+        
+    def get_latest(self,
+                   after_seq: int = -1,
+                   timeout: Optional[float] = None) -> Optional[FrameView]:
+        """
+        Get the newest frame published after the given sequence number.
+        
+        Args:
+            after_seq: Sequence number of the last frame the consumer saw
+            timeout: Seconds to wait for a newer frame, None to wait forever
+            
+        Returns:
+            A pinned view of the frame, or None if nothing newer arrived in time
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq > after_seq, timeout):
+                return None
+            slot = self._latest
+            slot.readers += 1
+            if slot.seq > self._read_seq:
+                self._read_seq = slot.seq
+                self._cond.notify_all()
+            return FrameView(self, slot)
+            
+    def wait_for_read(self, seq: int, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until some consumer has taken the frame with the given sequence
+        number or a newer one. Lets offline producers avoid skipping frames.
+        
+        Returns:
+            True if the frame was taken before the timeout
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: self._read_seq >= seq, timeout)
+            
+    def _release(self, slot: _FrameSlot) -> None:
+        with self._cond:
+            slot.readers -= 1
+            
+    @property
+    def seq(self) -> int:
+        """Sequence number of the newest published frame, -1 before the first."""
+        return self._seq
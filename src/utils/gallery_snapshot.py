@@ -0,0 +1,167 @@
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+from config.general_config import GALLERY_SNAPSHOT_FILE, LEGACY_ENCODE_FILE
+from config.models_config import ENCODING_DIMENSION
+from .encoding_store import encoding_settings_key
+from .file_manager import FileManager
+
+# Bump when the layout of the manifest or the matrix file changes
+SNAPSHOT_FORMAT_VERSION = 1
+
+class GallerySnapshot:
+    """
+    Persisted copy of the known-face gallery for warm starts.
+    
+    The encodings are one float32 .npy matrix, memory-mapped on load, and a
+    JSON manifest names its rows and records the mtime and size of every
+    profile image it was built from. Each save writes a new matrix file
+    before the manifest is replaced, so a crash never pairs a manifest with
+    the wrong rows.
+    """
+    
+    def __init__(self,
+                 manifest_file: Path = GALLERY_SNAPSHOT_FILE,
+                 legacy_file: Optional[Path] = LEGACY_ENCODE_FILE,
+                 settings: Optional[str] = None):
+        self.manifest_file = Path(manifest_file)
+        self.legacy_file = Path(legacy_file) if legacy_file else None
+        self.settings = settings or encoding_settings_key()
+        self._generation = 0
+        # filename -> (mtime_ns, size) of the profile images the snapshot reflects
+        self._files: Optional[Dict[str, Tuple[int, int]]] = None
+        
+    def load(self) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Load the last saved gallery.
+        
+        Falls back to the legacy encodings file, which has no manifest and
+        so is never current.
+        
+        Returns:
+            Encodings by name, as read-only rows of the memory-mapped matrix,
+            or None if there is no usable snapshot
+        """
+        self._files = None
+        manifest = self._read_manifest()
+        if manifest is None:
+            return self._load_legacy()
+            
+        try:
+            matrix = np.load(self._matrix_file(manifest['generation']), mmap_mode='r')
+        except (OSError, ValueError) as e:
+            print(f"Error loading gallery snapshot: {e}")
+            return self._load_legacy()
+            
+        names = manifest['names']
+        if matrix.ndim != 2 or matrix.shape[0] != len(names):
+            return self._load_legacy()
+            
+        self._generation = manifest['generation']
+        self._files = {name: tuple(stat) for name, stat in manifest['files'].items()}
+        return dict(zip(names, matrix))
+        
+    def is_current(self, image_paths: List[Path]) -> bool:
+        """Check whether the loaded snapshot was built from exactly these files."""
+        if self._files is None or len(image_paths) != len(self._files):
+            return False
+        for path in image_paths:
+            try:
+                stat = path.stat()
+            except OSError:
+                return False
+            if self._files.get(path.name) != (stat.st_mtime_ns, stat.st_size):
+                return False
+        return True
+        
+    def save(self,
+             encodings: Dict[str, np.ndarray],
+             files: Dict[str, Tuple[int, int]]) -> None:
+        """
+        Persist the gallery.
+        
+        Args:
+            encodings: Encoding of every known face by name
+            files: (mtime_ns, size) of every profile image by file name
+        """
+        names = list(encodings)
+        matrix = np.empty((len(names), ENCODING_DIMENSION), dtype=np.float32)
+        for row, name in enumerate(names):
+            matrix[row] = encodings[name]
+        generation = max([self._generation] + self._saved_generations()) + 1
+        matrix_file = self._matrix_file(generation)
+        temp_file = self.manifest_file.with_name(self.manifest_file.name + '.tmp')
+        try:
+            self.manifest_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(matrix_file, 'wb') as f:
+                np.save(f, matrix)
+                f.flush()
+                os.fsync(f.fileno())
+                
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'version': SNAPSHOT_FORMAT_VERSION,
+                    'settings': self.settings,
+                    'generation': generation,
+                    'names': names,
+                    'files': files
+                }, f)
+            temp_file.replace(self.manifest_file)
+        except Exception as e:
+            print(f"Error saving gallery snapshot: {e}")
+            for path in (temp_file, matrix_file):
+                if path.exists():
+                    path.unlink()
+            return
+            
+        # Earlier matrices may still be mapped by readers; where the platform
+        # refuses to unlink them they are retried on the next save
+        for previous in self._saved_generations():
+            if previous != generation:
+                try:
+                    self._matrix_file(previous).unlink()
+                except OSError:
+                    pass
+        self._generation = generation
+        self._files = dict(files)
+        
+    def _read_manifest(self) -> Optional[dict]:
+        if not self.manifest_file.exists():
+            return None
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error loading gallery snapshot: {e}")
+            return None
+            
+        # Encodings from another format or other model settings are not comparable
+        if manifest.get('version') != SNAPSHOT_FORMAT_VERSION or manifest.get('settings') != self.settings:
+            return None
+        return manifest
+        
+    def _load_legacy(self) -> Optional[Dict[str, np.ndarray]]:
+        """Read the [encodings, names] pickle older versions wrote."""
+        if self.legacy_file is None:
+            return None
+        data = FileManager.load_pickle(self.legacy_file)
+        try:
+            encodings, names = data
+            return {name: np.asarray(encoding, dtype=np.float32) for encoding, name in zip(encodings, names)}
+        except (TypeError, ValueError):
+            return None
+            
+    def _saved_generations(self) -> List[int]:
+        """Generations of the matrix files on disk."""
+        generations = []
+        for path in self.manifest_file.parent.glob(f"{self.manifest_file.stem}.*.npy"):
+            suffix = path.name[len(self.manifest_file.stem) + 1:-len('.npy')]
+            if suffix.isdigit():
+                generations.append(int(suffix))
+        return generations
+        
+    def _matrix_file(self, generation: int) -> Path:
+        return self.manifest_file.with_name(f"{self.manifest_file.stem}.{generation}.npy")
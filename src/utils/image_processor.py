@@ -1,10 +1,12 @@
+import io
+from dataclasses import dataclass, field
 import cv2
 import imagehash
 from PIL import Image
 import face_recognition
 import numpy as np
 from pathlib import Path
-from typing import Optional, Tuple, List
+from typing import Optional, Tuple, List, Dict, Union, Callable
 import os
 
 from config.general_config import SUPPORTED_IMAGE_EXTENSIONS
@@ -12,6 +14,35 @@ from config.models_config import (
     TARGET_FACE_SIZE,
     IMAGE_QUALITY_THRESHOLD
 )
+from models.face_model import FaceLocation
+
+def load_image(image_path: str) -> Optional[np.ndarray]:
+    """
+    Read and decode an image file once into a BGR buffer.
+    Returns None if the file can't be read or decoded.
+    """
+    try:
+        data = np.fromfile(image_path, dtype=np.uint8)
+    except (OSError, ValueError):
+        return None
+    if data.size == 0:
+        return None
+    
+    image = cv2.imdecode(data, cv2.IMREAD_COLOR)
+    if image is None:
+        # OpenCV can't decode some formats (e.g. GIF), so let PIL try the same bytes
+        try:
+            with Image.open(io.BytesIO(data.tobytes())) as img:
+                image = cv2.cvtColor(np.array(img.convert('RGB')), cv2.COLOR_RGB2BGR)
+        except Exception:
+            return None
+    return image
+
+def _to_gray(image: np.ndarray) -> np.ndarray:
+    """Grayscale view of a decoded buffer, converting only if needed."""
+    if image.ndim == 2:
+        return image
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
 
 def is_valid_image(file_path: str) -> bool:
     """Check if file is a valid image."""
@@ -22,10 +53,15 @@ def is_valid_image(file_path: str) -> bool:
     except Exception:
         return False
 
-def get_image_hash(image_path: str) -> str:
-    """Generate a hash for the image for duplicate detection."""
+def get_image_hash(image: Union[str, np.ndarray]) -> str:
+    """
+    Generate a hash for the image for duplicate detection.
+    Accepts a file path or an already decoded BGR or grayscale buffer.
+    """
     try:
-        with Image.open(image_path) as img:
+        if isinstance(image, np.ndarray):
+            return str(imagehash.average_hash(Image.fromarray(_to_gray(image))))
+        with Image.open(image) as img:
             return str(imagehash.average_hash(img))
     except Exception:
         return ""
@@ -45,19 +81,20 @@ def smart_crop_and_resize(image: Image.Image, size: Tuple[int, int] = TARGET_FAC
     cropped = image.crop((left, top, right, bottom))
     return cropped.resize(size, Image.LANCZOS)
 
-def assess_image_quality(image_path: str) -> float:
+def assess_image_quality(image: Union[str, np.ndarray]) -> float:
     """
     Assess image quality based on multiple factors.
+    Accepts a file path or an already decoded BGR or grayscale buffer.
     Returns a score from 0 to 100.
     """
     try:
         # Read image
-        img = cv2.imread(image_path)
+        img = load_image(image) if isinstance(image, str) else image
         if img is None:
             return 0.0
         
         # Convert to grayscale for calculations
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        gray = _to_gray(img)
         
         # Calculate metrics
         blur_score = cv2.Laplacian(gray, cv2.CV_64F).var()  # Blur detection
@@ -74,9 +111,57 @@ def assess_image_quality(image_path: str) -> float:
     except Exception:
         return 0.0
 
-def cleanup_profile_images(folder_path: str, remove_duplicates: bool = True) -> List[str]:
+@dataclass
+class ImageCheck:
+    """Outcome of the cleanup checks on one profile image."""
+    valid: bool
+    quality: float = 0.0
+    image_hash: str = ""
+    locations: List[FaceLocation] = field(default_factory=list)
+    encoding: Optional[np.ndarray] = None  # Face encoding, if the checker was asked for it
+
+def check_profile_image(image_path: str, image: Optional[np.ndarray] = None) -> ImageCheck:
+    """
+    Run the cleanup checks on one image from a single decode.
+    Detection is skipped for images that already fail on quality.
+    If the caller already decoded the file, pass it as image.
+    """
+    try:
+        # Decode once; a file that won't decode is invalid
+        if image is None:
+            image = load_image(image_path)
+        if image is None:
+            return ImageCheck(valid=False)
+        gray = _to_gray(image)
+        
+        quality_score = assess_image_quality(gray)
+        if quality_score < IMAGE_QUALITY_THRESHOLD:
+            return ImageCheck(valid=True, quality=quality_score)
+        
+        locations = face_recognition.face_locations(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+        return ImageCheck(
+            valid=True,
+            quality=quality_score,
+            image_hash=get_image_hash(gray),
+            locations=[FaceLocation.from_tuple(loc) for loc in locations]
+        )
+    except Exception:
+        return ImageCheck(valid=False)
+
+def cleanup_profile_images(folder_path: str,
+                           remove_duplicates: bool = True,
+                           face_locations: Optional[Dict[str, List[FaceLocation]]] = None,
+                           check_images: Optional[Callable[[List[Path]], List[ImageCheck]]] = None,
+                           face_encodings: Optional[Dict[str, np.ndarray]] = None) -> List[str]:
     """
     Clean up profile images folder by removing problematic images.
+    Each image is decoded once and every check runs on that buffer.
+    If face_locations is given, it is filled with the faces detected in
+    each kept file (by file name) so encoding can skip detection.
+    If face_encodings is given, it is filled with the encodings check_images
+    made of kept files, so they need not be decoded again.
+    check_images can run the per-image checks elsewhere, such as in a
+    process pool; removal decisions are still made here, in order.
     Returns list of removed files.
     """
     folder_path = Path(folder_path)
@@ -89,36 +174,37 @@ def cleanup_profile_images(folder_path: str, remove_duplicates: bool = True) ->
         if f.suffix.lower() in SUPPORTED_IMAGE_EXTENSIONS
     ]
     
-    for img_path in image_files:
+    if check_images is not None:
+        checks = check_images(image_files)
+    else:
+        checks = [check_profile_image(str(img_path)) for img_path in image_files]
+    
+    for img_path, check in zip(image_files, checks):
         try:
-            # Check if image is valid
-            if not is_valid_image(str(img_path)):
-                img_path.unlink()
-                removed_files.append(img_path.name)
-                continue
-            
-            # Check image quality
-            quality_score = assess_image_quality(str(img_path))
-            if quality_score < IMAGE_QUALITY_THRESHOLD:
+            # Check if image is valid and of sufficient quality
+            if not check.valid or check.quality < IMAGE_QUALITY_THRESHOLD:
                 img_path.unlink()
                 removed_files.append(img_path.name)
                 continue
             
             # Handle duplicates
             if remove_duplicates:
-                img_hash = get_image_hash(str(img_path))
-                if img_hash in image_hashes:
+                if check.image_hash in image_hashes:
                     img_path.unlink()
                     removed_files.append(img_path.name)
                     continue
-                image_hashes[img_hash] = img_path.name
+                image_hashes[check.image_hash] = img_path.name
             
             # Verify face detection
-            image = face_recognition.load_image_file(str(img_path))
-            if not face_recognition.face_locations(image):
+            if not check.locations:
                 img_path.unlink()
                 removed_files.append(img_path.name)
                 continue
+            
+            if face_locations is not None:
+                face_locations[img_path.name] = check.locations
+            if face_encodings is not None and check.encoding is not None:
+                face_encodings[img_path.name] = check.encoding
                 
         except Exception as e:
             # Remove problematic files